@@ -0,0 +1,88 @@
+"""Benchmark the colour-table lane mask against the cvtColor/inRange chain.
+
+Replays frames (``--source``: synthetic, a video, image directory or .fira
+archive) and times per frame, both writing into preallocated buffers:
+
+    chain          cvtColor to HSV and gray, inRange per lane colour,
+                   threshold, bitwise and/or (colour_mask.chain_mask)
+    table          ColourMask: pad to BGRA, one np.take from the table
+
+It checks the table against the chain on every frame (``bits=8`` must
+match exactly; coarser tables only differ near the range boundaries), and
+reports how long building the table takes, which happens once and again
+only when the rules change.
+
+    python benchmarks/bench_colour_mask.py --frames 200
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.buffers import BufferPool
+from fira_drive.colour_mask import LANE_RULES, ColourMask, chain_mask
+from fira_drive.replay import SYNTHETIC, open_source
+
+
+def per_frame_ms(func, frames):
+    func(frames[0])  # warm up
+    durations = []
+    for frame in frames:
+        start = time.perf_counter()
+        func(frame)
+        durations.append(time.perf_counter() - start)
+    return np.array(durations) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SYNTHETIC)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--bits", type=int, nargs="+", default=[8, 6, 5])
+    args = parser.parse_args()
+
+    frames = [frame.copy() for frame, _ in
+              itertools.islice(open_source(args.source, args.width, args.height), args.frames)]
+    height, width = frames[0].shape[:2]
+    pool = BufferPool()
+    out = np.empty((height, width), np.uint8)
+    expected = [chain_mask(frame) for frame in frames]
+    lane_pixels = np.mean([np.count_nonzero(mask) for mask in expected])
+
+    print(f"{len(frames)} frames {width}x{height} from {args.source}, "
+          f"{lane_pixels:.0f} lane pixels on average")
+    print(f"{'':<10} {'build ms':>9} {'median ms':>10} {'p99 ms':>8} {'speedup':>8} "
+          f"{'differing px':>13}")
+    chain = per_frame_ms(lambda frame: chain_mask(frame, dst=out, pool=pool), frames)
+    base = np.median(chain)
+    print(f"{'chain':<10} {'-':>9} {base:10.3f} {np.percentile(chain, 99):8.3f} "
+          f"{1.0:7.1f}x {'-':>13}")
+
+    for bits in args.bits:
+        start = time.perf_counter()
+        table = ColourMask(LANE_RULES, bits)
+        build = (time.perf_counter() - start) * 1e3
+        differing = max(np.count_nonzero(table(frame) != mask)
+                        for frame, mask in zip(frames, expected))
+        ms = per_frame_ms(lambda frame: table(frame, dst=out), frames)
+        median = np.median(ms)
+        print(f"{f'table {bits}b':<10} {build:9.1f} {median:10.3f} "
+              f"{np.percentile(ms, 99):8.3f} {base / median:7.1f}x {differing:13d}")
+
+    # Re-applying the same rules (e.g. a config reload that did not touch
+    # them) must not rebuild
+    start = time.perf_counter()
+    rebuilt = table.set_rules(LANE_RULES)
+    print(f"set_rules with unchanged rules: rebuilt={rebuilt}, "
+          f"{(time.perf_counter() - start) * 1e3:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
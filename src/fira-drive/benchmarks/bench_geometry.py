@@ -0,0 +1,80 @@
+"""Benchmark cached ROI masks and warp maps against per-frame rebuilding.
+
+    python benchmarks/bench_geometry.py --width 640 --height 480
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.geometry import GeometryCache, remap
+from fira_drive.perception import BIRDS_EYE_SRC_PTS, birds_eye_dst_pts
+
+
+def per_frame_ms(func, frame, repeat):
+    func(frame)  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(frame)
+    return (time.perf_counter() - start) / repeat * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    width, height = args.width, args.height
+
+    rng = np.random.default_rng(0)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    masked = np.empty_like(frame)
+    warped = np.empty_like(frame)
+    cache = GeometryCache()
+
+    polygon = np.array([[
+        (0, height), (width, height),
+        (int(width * 0.8), int(height * 0.5)), (int(width * 0.2), int(height * 0.5))
+    ]], np.int32)
+    src_pts = BIRDS_EYE_SRC_PTS * np.float32([width / 640, height / 480])
+    dst_pts = birds_eye_dst_pts(width, height)
+
+    def mask_rebuilt(frame):
+        mask = np.zeros_like(frame)
+        cv2.fillPoly(mask, polygon, (255, 255, 255))
+        cv2.bitwise_and(frame, mask, dst=masked)
+
+    def mask_cached(frame):
+        cv2.bitwise_and(frame, cache.roi_mask(frame.shape, polygon), dst=masked)
+
+    matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
+
+    def warp_per_frame(frame):
+        cv2.warpPerspective(frame, matrix, (width, height), dst=warped)
+
+    def warp_cached(frame):
+        remap(frame, cache.warp_maps(src_pts, dst_pts, (width, height)), dst=warped)
+
+    start = time.perf_counter()
+    cache.warp_maps(src_pts, dst_pts, (width, height), name="build_timing")
+    build_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"{width}x{height}, {args.repeat} frames")
+    for name, rebuilt, cached in (
+            ("ROI mask", mask_rebuilt, mask_cached),
+            ("bird's-eye", warp_per_frame, warp_cached)):
+        t_rebuilt = per_frame_ms(rebuilt, frame, args.repeat)
+        t_cached = per_frame_ms(cached, frame, args.repeat)
+        print(f"{name:<11} per-frame {t_rebuilt:6.3f} ms   cached {t_cached:6.3f} ms   "
+              f"saving {t_rebuilt - t_cached:6.3f} ms ({t_rebuilt / t_cached:4.2f}x)")
+    print(f"one-off warp map build: {build_ms:.1f} ms, cache builds: {cache.builds}")
+
+
+if __name__ == "__main__":
+    main()
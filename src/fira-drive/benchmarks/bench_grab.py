@@ -0,0 +1,146 @@
+"""Benchmark capture age with inline reads vs. the grab thread.
+
+A simulated camera stands in for ``cv2.VideoCapture``: it exposes a frame
+every 1/``--camera-fps`` seconds into a driver queue of ``--buffers``
+buffers (when the queue is full, new frames are dropped, as V4L2 does),
+``grab()`` takes the oldest buffer and ``retrieve()`` spends
+``--decode-ms`` decoding it. The producer loop publishes at each
+``--fps`` (0 = free-running) and the capture age of every published frame
+is ``publish time - exposure time``.
+
+    inline      capture_into_ring: cap.read() in the publishing loop
+    thread      FrameGrabber, only the newest grabbed frame is decoded
+    keep-stale  FrameGrabber(keep_stale=True), every frame in order
+
+    python benchmarks/bench_grab.py --seconds 3 --fps 0 15 10
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.capture import FrameGrabber, capture_into_ring
+from fira_drive.ring import FrameRing
+from fira_drive.scheduler import CaptureScheduler
+
+
+class SimulatedCamera:
+    """The subset of cv2.VideoCapture the producer uses, with a driver queue."""
+
+    def __init__(self, fps, buffers, decode_s, shape=(480, 640, 3)):
+        self.period = 1.0 / fps
+        self.decode_s = decode_s
+        self.frame = np.zeros(shape, dtype=np.uint8)
+        self.queue = deque()
+        self.buffers = buffers
+        self.grabbed_ns = None
+        self.retrieved_ns = None  # exposure time of the last retrieved frame
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._expose, daemon=True)
+        self._thread.start()
+
+    def _expose(self):
+        next_tick = time.monotonic()
+        while self._running:
+            next_tick += self.period
+            time.sleep(max(next_tick - time.monotonic(), 0))
+            with self._cond:
+                if len(self.queue) < self.buffers:
+                    self.queue.append(time.monotonic_ns())
+                    self._cond.notify()
+
+    def isOpened(self):
+        return self._running
+
+    def grab(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self.queue or not self._running)
+            if not self.queue:
+                return False
+            self.grabbed_ns = self.queue.popleft()
+        return True
+
+    def retrieve(self, image=None):
+        time.sleep(self.decode_s)
+        self.retrieved_ns = self.grabbed_ns
+        if image is None:
+            return True, self.frame.copy()
+        image[...] = self.frame
+        return True, image
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, None
+        return self.retrieve(image)
+
+    def release(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+
+def run(mode, fps, args):
+    cap = SimulatedCamera(args.camera_fps, args.buffers, args.decode_ms / 1e3)
+    ring = FrameRing.create("fira_bench_grab", shape=cap.frame.shape, num_slots=4,
+                             replace=True)
+    scheduler = CaptureScheduler(target_fps=fps)
+    grabber = None
+    if mode != "inline":
+        grabber = FrameGrabber(cap, keep_stale=mode == "keep-stale").start()
+
+    ages = []
+    deadline = time.monotonic() + args.seconds
+    while time.monotonic() < deadline:
+        scheduler.wait()
+        if grabber is None:
+            frame_id = capture_into_ring(cap, ring)
+        else:
+            frame_id, _ = grabber.retrieve_into_ring(ring)
+        if frame_id is None:
+            continue
+        # Stands in for the metadata send and the rest of the loop
+        time.sleep(args.work_ms / 1e3)
+        ages.append(time.monotonic_ns() - cap.retrieved_ns)
+
+    cap.release()
+    if grabber is not None:
+        grabber.stop()
+    ring.close()
+    ring.unlink()
+    ages = np.array(ages[args.warmup:]) / 1e6
+    stale = grabber.stale if grabber is not None else 0
+    return len(ages) / args.seconds, np.percentile(ages, 50), np.percentile(ages, 99), stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--camera-fps", type=float, default=30.0)
+    parser.add_argument("--buffers", type=int, default=4, help="driver queue depth")
+    parser.add_argument("--decode-ms", type=float, default=8.0)
+    parser.add_argument("--work-ms", type=float, default=1.0,
+                        help="rest of the publishing loop per frame")
+    parser.add_argument("--fps", type=float, nargs="*", default=[0, 15, 10],
+                        help="producer target rates (0 = free-running)")
+    parser.add_argument("--warmup", type=int, default=5, help="frames to ignore at the start")
+    args = parser.parse_args()
+
+    print(f"camera {args.camera_fps:g} fps, {args.buffers} buffers, "
+          f"decode {args.decode_ms:g} ms, loop work {args.work_ms:g} ms")
+    print(f"{'target':>7} {'mode':<11} {'published':>10} {'age p50':>9} {'age p99':>9} {'stale':>6}")
+    for fps in args.fps:
+        for mode in ("inline", "thread", "keep-stale"):
+            rate, p50, p99, stale = run(mode, fps, args)
+            target = f"{fps:g} fps" if fps else "free"
+            print(f"{target:>7} {mode:<11} {rate:6.1f} fps {p50:6.1f} ms {p99:6.1f} ms {stale:6d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Benchmark producing and decoding lane result records.
+
+Times the lane fit on Hough segments of synthetic road frames, encoding a
+record, decoding it from bytes (what a controller does per message) and
+writing/reading the results ring, and checks that a record survives the
+round trip unchanged.
+
+    python benchmarks/bench_lane_results.py
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench_pipeline import load_frames
+from fira_drive.lanes import LANE_RESULT_SIZE, LaneResultRing, fit_lanes, unpack_lane_result
+from fira_drive.perception import build_pipeline
+
+
+RING_NAME = "fira_bench_lanes"
+
+
+def per_call_us(func, repeat):
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+
+    frames = load_frames(None, args.frames, 640, 480)
+    height, width = frames[0].shape[:2]
+    pipeline = build_pipeline(width, height, ["hough"])
+    lines = [pipeline.run(frame, ["lines"])["lines"].copy() for frame in frames]
+
+    results = [fit_lanes(segments, width, height, frame_id=i) for i, segments in enumerate(lines)]
+    data = results[-1].tobytes()
+
+    ring = LaneResultRing.create(RING_NAME, replace=True)
+    reader = LaneResultRing.attach(RING_NAME)
+    try:
+        timings = {
+            "fit_lanes": per_call_us(
+                lambda: fit_lanes(lines[0], width, height, out=results[0]), args.repeat // 10),
+            "encode (tobytes)": per_call_us(lambda: results[0].tobytes(), args.repeat),
+            "decode": per_call_us(lambda: unpack_lane_result(data), args.repeat),
+            "ring write": per_call_us(lambda: ring.write(results[0]), args.repeat),
+            "ring read latest": per_call_us(reader.latest, args.repeat),
+        }
+
+        ring.write(results[-1])
+        ok = (reader.latest().tobytes() == data
+              and unpack_lane_result(data).tobytes() == data)
+    finally:
+        reader.close()
+        ring.close()
+        ring.unlink()
+
+    found = sum(int(r["flags"]) == 3 for r in results)
+    offsets = np.array([float(r["offset_px"]) for r in results])
+    print(f"{LANE_RESULT_SIZE}-byte record, both lanes found in {found}/{len(results)} frames, "
+          f"offset {np.nanmean(offsets):+.1f} px on average")
+    for name, us in timings.items():
+        print(f"{name:<17} {us:8.2f} us")
+    print(f"round trip        {'ok' if ok else 'MISMATCH'}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Benchmark fused vs separate execution of the perception steps.
+
+"separate" runs the noise-filter, morphology, Canny and Hough chains as four
+independent pipelines, like four perception-tests scripts each converting
+and blurring the same frame. "fused" declares the same chains in one
+pipeline, which computes the shared grayscale and blur stages once.
+
+Minor page faults per frame are reported too: every stage allocates fresh
+output arrays, and when the allocator hands memory back to the OS between
+frames the faults can eat most of the saving.
+
+    python benchmarks/bench_pipeline.py --video lap.avi
+"""
+
+import argparse
+import resource
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.perception import build_pipeline
+
+
+CHAINS = ["noise_filter", "morphology", "canny", "hough"]
+# What each perception-tests script actually uses from its chain
+OUTPUTS = {
+    "noise_filter": ["gaussian", "median"],
+    "morphology": ["closing"],
+    "canny": ["edges"],
+    "hough": ["lines"],
+}
+
+
+def load_frames(video, count, width, height):
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if frames:
+            return frames
+        print(f"Could not read frames from {video}, using synthetic frames")
+
+    # Synthetic road: two lane lines on a noisy grey background
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(60, 90, (height, width, 3), dtype=np.uint8)
+        shift = int(20 * np.sin(i / 10))
+        cv2.line(frame, (width // 6 + shift, height), (width * 2 // 5 + shift, height // 2),
+                 (255, 255, 255), 8)
+        cv2.line(frame, (width * 5 // 6 + shift, height), (width * 3 // 5 + shift, height // 2),
+                 (0, 220, 255), 8)
+        frames.append(frame)
+    return frames
+
+
+def time_per_frame(frames, run, repeat):
+    """Return ``(seconds, minor page faults)`` per frame."""
+    run(frames[0])  # warm up
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            run(frame)
+    elapsed = time.perf_counter() - start
+    faults = resource.getrusage(resource.RUSAGE_SELF).ru_minflt - faults
+    n = repeat * len(frames)
+    return elapsed / n, faults / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="recorded frames to use instead of synthetic ones")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.width, args.height)
+    height, width = frames[0].shape[:2]
+
+    separate = [(build_pipeline(width, height, [chain]), OUTPUTS[chain]) for chain in CHAINS]
+    fused = build_pipeline(width, height, CHAINS)
+    fused_outputs = [name for chain in CHAINS for name in OUTPUTS[chain]]
+
+    def run_separate(frame):
+        for pipe, outputs in separate:
+            pipe.run(frame, outputs)
+
+    def run_fused(frame):
+        fused.run(frame, fused_outputs)
+
+    t_separate, faults_separate = time_per_frame(frames, run_separate, args.repeat)
+    t_fused, faults_fused = time_per_frame(frames, run_fused, args.repeat)
+
+    stages_separate = sum(len(pipe) for pipe, _ in separate)
+    print(f"{len(frames)} frames {width}x{height}")
+    print(f"separate  {t_separate * 1e3:7.2f} ms/frame  {stages_separate:3d} stages  "
+          f"{faults_separate:6.0f} page faults/frame")
+    print(f"fused     {t_fused * 1e3:7.2f} ms/frame  {len(fused):3d} stages  "
+          f"{faults_fused:6.0f} page faults/frame")
+    print(f"speedup   {t_separate / t_fused:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Benchmark derived planes: producer cost once vs. consumer cost per consumer.
+
+For each plane, the producer row is the time :class:`PlaneSet` spends
+deriving it per frame. The consumer rows are what one consumer spends per
+frame to get a private grayscale image: reading the BGR frame and converting
+it itself, or reading the ``gray`` / ``half_gray`` / ``road_gray`` plane the
+producer already computed. With N consumers the conversion is paid N times
+in the first case and once in the others.
+
+    python benchmarks/bench_planes.py --consumers 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench_pipeline import load_frames
+from fira_drive.planes import PlaneSet
+from fira_drive.ring import FrameRing
+
+
+RING_NAME = "fira_bench_planes"
+PLANES = ["frame", "gray", "half_gray", "road_gray"]
+
+
+def per_frame_ms(func, frame_ids, repeat):
+    func(frame_ids[0])  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame_id in frame_ids:
+            func(frame_id)
+    return (time.perf_counter() - start) / (repeat * len(frame_ids)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--consumers", type=int, default=4)
+    args = parser.parse_args()
+
+    frames = load_frames(None, args.frames, args.width, args.height)
+    shape = frames[0].shape
+
+    # Producer: plain write vs. write plus derived planes
+    single = FrameRing.create(RING_NAME, shape=shape, num_slots=4, replace=True)
+    index = iter(range(1 << 62))
+    t_write = per_frame_ms(lambda _: single.write(frames[next(index) % len(frames)]),
+                           range(len(frames)), args.repeat)
+    single.close()
+    single.unlink()
+
+    planes = PlaneSet(PLANES, shape)
+    ring = FrameRing.create(RING_NAME, num_slots=4, planes=planes.layout, replace=True)
+    t_planes = per_frame_ms(lambda _: planes.write(ring, frames[next(index) % len(frames)]),
+                            range(len(frames)), args.repeat)
+
+    # Consumers work on the frames currently in the ring
+    frame_ids = [ring.write_index - 1 - i for i in range(ring.num_slots)]
+    bgr = ring.empty_frame("frame")
+    gray = np.empty(shape[:2], np.uint8)
+    outs = {name: ring.empty_frame(name) for name in PLANES}
+
+    def convert_itself(frame_id):
+        ring.read(frame_id, out=bgr, plane="frame")
+        cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY, dst=gray)
+
+    consumers = [("read frame + cvtColor", "frame", convert_itself)]
+    for name in PLANES[1:]:
+        consumers.append((f"read {name}", name,
+                          lambda frame_id, name=name: ring.read(frame_id, out=outs[name], plane=name)))
+
+    print(f"{args.width}x{args.height}, {args.consumers} consumers")
+    print(f"producer  write frame only       {t_write:7.3f} ms/frame")
+    print(f"producer  write + derive planes  {t_planes:7.3f} ms/frame "
+          f"(+{t_planes - t_write:.3f} ms, paid once)")
+    print()
+    print(f"{'consumer':<22} {'bytes read':>11} {'ms/frame':>9} {'x':>6} "
+          f"{f'total for {args.consumers}':>14}")
+    base = None
+    for label, plane, func in consumers:
+        ms = per_frame_ms(func, frame_ids, args.repeat * len(frames) // len(frame_ids))
+        base = base or ms
+        nbytes = outs[plane].nbytes
+        print(f"{label:<22} {nbytes:11,d} {ms:9.3f} {base / ms:5.1f}x {ms * args.consumers:11.3f} ms")
+
+    ring.close()
+    ring.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark the frame recorder: dropped frames and CPU use at camera rate.
+
+A producer process publishes synthetic frames at ``--fps`` through a frame
+ring and ZeroMQ, like the capture script, while the recorder appends them to
+an archive in ``--dir``. Afterwards the archive is read back through
+np.memmap in random order and checked against the frames that were sent.
+
+    python benchmarks/bench_recorder.py --fps 30 60 120 --seconds 5
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.archive import FrameArchive
+from fira_drive.metadata import frame_metadata, pack_metadata
+from fira_drive.recorder import Recorder
+from fira_drive.replay import synthetic_track
+from fira_drive.ring import FrameRing
+from fira_drive.scheduler import CaptureScheduler
+
+
+RING_NAME = "fira_bench_recorder"
+ENDPOINT = "tcp://127.0.0.1:5597"
+TOPIC = b"cam0_metadata"
+SEED = 3
+
+
+def producer(fps, count, ready, go):
+    ring = FrameRing.create(RING_NAME, shape=(480, 640, 3), replace=True)
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind(ENDPOINT.replace("127.0.0.1", "*"))
+    frames = [frame.copy() for frame, _ in synthetic_track(count=64, seed=SEED)]
+    ready.set()
+    go.wait()
+    scheduler = CaptureScheduler(target_fps=fps)
+    try:
+        for _ in range(count):
+            scheduler.wait()
+            frame_id, view = ring.begin_write()
+            view[:] = frames[frame_id % len(frames)]
+            ring.commit(frame_id)
+            socket.send_multipart(
+                [TOPIC, pack_metadata(frame_metadata(ring, frame_id, time.monotonic_ns()))])
+        time.sleep(0.5)  # let the last notifications drain
+    finally:
+        socket.close(linger=1000)
+        ring.close()
+        ring.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fps", type=float, nargs="+", default=[30, 60, 120])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--dir", default=None, help="where to write the archive (default: temp)")
+    args = parser.parse_args()
+
+    expected = [frame.copy() for frame, _ in synthetic_track(count=64, seed=SEED)]
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        for fps in args.fps:
+            count = int(fps * args.seconds)
+            path = os.path.join(tmp, f"bench_{fps:g}.fira")
+            ready, go = mp.Event(), mp.Event()
+            proc = mp.Process(target=producer, args=(fps, count, ready, go))
+            proc.start()
+            ready.wait()
+
+            with Recorder(path, count, name=RING_NAME, endpoint=ENDPOINT, topic=TOPIC) as recorder:
+                time.sleep(0.2)  # let the subscription propagate before frames flow
+                go.set()
+                start_cpu = time.process_time()
+                start = time.monotonic()
+                while not recorder.full and recorder.poll(timeout_ms=1000) is not None:
+                    pass
+                elapsed = time.monotonic() - start
+                cpu = (time.process_time() - start_cpu) / elapsed
+                stats = (recorder.recorded, recorder.skipped, recorder.torn)
+            proc.join()
+
+            archive = FrameArchive.open(path)
+            order = np.random.default_rng(0).permutation(len(archive))
+            start = time.perf_counter()
+            mismatched = sum(
+                not np.array_equal(archive.frames[i],
+                                   expected[int(archive.index[i]["frame_id"]) % len(expected)])
+                for i in order)
+            read_ms = (time.perf_counter() - start) / max(len(archive), 1) * 1e3
+            size_mb = os.path.getsize(path) / 2**20
+            archive.close()
+
+            print(f"{fps:5g} fps  recorded {stats[0]:5d}/{count}  skipped {stats[1]}  "
+                  f"torn {stats[2]}  CPU {cpu:5.1%}  {size_mb:7.1f} MiB  "
+                  f"random read+check {read_ms:.2f} ms/frame  mismatched {mismatched}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark crop-first (ROI) execution against full-frame execution.
+
+Runs the noise-filter, morphology, Canny and Hough chains as one fused
+pipeline, once on the whole frame and once on the road ROI (the lower half by
+default), and checks that the Hough segments found in the ROI come back in
+full-frame coordinates.
+
+    python benchmarks/bench_roi.py --video lap.avi --roi-top 0.5
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench_pipeline import OUTPUTS, load_frames, time_per_frame
+from fira_drive.geometry import Roi
+from fira_drive.perception import build_pipeline
+
+
+CHAINS = ["noise_filter", "morphology", "canny", "hough"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--video", help="recorded frames to use instead of synthetic ones")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--roi-top", type=float, default=0.5)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames, args.width, args.height)
+    height, width = frames[0].shape[:2]
+    roi = Roi(top=args.roi_top)
+    outputs = [name for chain in CHAINS for name in OUTPUTS[chain]]
+
+    full = build_pipeline(width, height, CHAINS)
+    cropped = build_pipeline(width, height, CHAINS, roi=roi)
+
+    t_full, _ = time_per_frame(frames, lambda frame: full.run(frame, outputs), args.repeat)
+    t_roi, _ = time_per_frame(frames, lambda frame: cropped.run(frame, outputs), args.repeat)
+
+    # The mapped segments must lie inside the ROI, in full-frame pixels
+    y0, y1, x0, x1 = roi.bounds(frames[0].shape)
+    outside = segments = 0
+    for frame in frames:
+        lines = cropped.run(frame, ["lines"])["lines"]
+        if lines is None:
+            continue
+        lines = lines.reshape(-1, 4)
+        segments += len(lines)
+        xs, ys = lines[:, 0::2], lines[:, 1::2]
+        outside += int(np.count_nonzero(((xs < x0) | (xs >= x1) | (ys < y0) | (ys >= y1)).any(axis=1)))
+
+    pixels = (y1 - y0) * (x1 - x0) / (width * height)
+    print(f"{len(frames)} frames {width}x{height}, {roi}")
+    print(f"full frame  {t_full * 1e3:7.2f} ms/frame")
+    print(f"ROI         {t_roi * 1e3:7.2f} ms/frame  ({pixels:.0%} of the pixels)")
+    print(f"speedup     {t_full / t_roi:7.2f}x")
+    print(f"segments    {segments} found in the ROI, {outside} outside it after mapping back")
+    if outside:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Benchmark the capture scheduler: achieved frame rate and inter-frame jitter.
+
+A simulated camera stands in for ``cap.read()`` (each read takes
+``--capture-ms`` milliseconds), so the numbers only reflect the pacing logic.
+The legacy row reproduces the old fixed ``time.sleep(0.1)`` after each frame.
+
+    python benchmarks/bench_scheduler.py --seconds 3 --capture-ms 4
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.scheduler import CaptureScheduler
+
+
+def run(scheduler, seconds, capture_s, legacy_sleep=0.0):
+    stamps = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        scheduler.wait()
+        time.sleep(capture_s)  # simulated cap.read()
+        scheduler.frame_done()
+        stamps.append(time.monotonic())
+        if legacy_sleep:
+            time.sleep(legacy_sleep)
+    return np.diff(np.array(stamps))
+
+
+def report(name, intervals, scheduler):
+    if len(intervals) == 0:
+        print(f"{name:<14} no frames")
+        return
+    mean = intervals.mean()
+    jitter = np.abs(intervals - mean)
+    print(f"{name:<14} {1.0 / mean:8.1f} fps  "
+          f"mean {mean * 1e3:7.2f} ms  "
+          f"jitter std {intervals.std() * 1e3:6.3f} ms  "
+          f"p99 {np.percentile(jitter, 99) * 1e3:6.3f} ms  "
+          f"dropped {scheduler.dropped}  overruns {scheduler.overruns}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--capture-ms", type=float, default=4.0)
+    parser.add_argument("--fps", type=float, nargs="*", default=[15, 30, 60])
+    args = parser.parse_args()
+    capture_s = args.capture_ms / 1e3
+
+    scheduler = CaptureScheduler()
+    report("legacy 0.1s", run(scheduler, args.seconds, capture_s, legacy_sleep=0.1), scheduler)
+
+    scheduler = CaptureScheduler()
+    report("free", run(scheduler, args.seconds, capture_s), scheduler)
+
+    for fps in args.fps:
+        scheduler = CaptureScheduler(target_fps=fps)
+        report(f"paced {fps:g}", run(scheduler, args.seconds, capture_s), scheduler)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark the sliding-window lane search on the bird's-eye binary mask.
+
+Replays frames (``--source``: synthetic, a video, image directory or .fira
+archive) through 05_birds_eye + 06_morphological_ops to get the clean
+bird's-eye mask, then times per frame:
+
+    mask (05 + 06)        warp, grayscale, blur, threshold, open, close
+    nonzero + polyfit     the same windows, listing the lane pixels with
+                          np.nonzero and fitting them with np.polyfit
+    find_lanes            fira_drive.sliding_window (row sums + normal
+                          equations, no pixel lists)
+
+and checks that both searches give the same polynomials. The target is
+``find_lanes`` well under 2 ms at 640x480.
+
+    python benchmarks/bench_sliding_window.py --frames 300
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from fira_drive.replay import SYNTHETIC, open_source
+from fira_drive.scripts import load_step
+from fira_drive.sliding_window import MIN_FIT_PIXELS, find_lanes, search_lanes
+
+
+TARGET_MS = 2.0
+
+
+def nonzero_polyfit(mask):
+    """Reference: the windows of search_lanes, fitted from listed pixels."""
+    polys = []
+    for side, (_, windows) in search_lanes(mask).items():
+        ys, xs = [], []
+        for x0, y0, x1, y1 in windows:
+            window_ys, window_xs = np.nonzero(mask[y0:y1, x0:x1])
+            ys.append(window_ys + y0)
+            xs.append(window_xs + x0)
+        ys = np.concatenate(ys) if ys else np.empty(0)
+        xs = np.concatenate(xs) if xs else np.empty(0)
+        polys.append(np.polyfit(ys, xs, 2) if len(ys) >= MIN_FIT_PIXELS else None)
+    return polys
+
+
+def per_frame_ms(func, inputs):
+    func(inputs[0])  # warm up
+    durations = []
+    results = []
+    for item in inputs:
+        start = time.perf_counter()
+        results.append(func(item))
+        durations.append(time.perf_counter() - start)
+    return np.array(durations) * 1e3, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SYNTHETIC)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    frames = [frame.copy() for frame, _ in
+              itertools.islice(open_source(args.source, args.width, args.height), args.frames)]
+    height, width = frames[0].shape[:2]
+    birds_eye = load_step("05_birds_eye", "make_birds_eye")(width, height)
+    morphological_ops = load_step("06_morphological_ops", "morphological_ops")
+
+    mask_ms, masks = per_frame_ms(lambda frame: morphological_ops(birds_eye(frame))[2].copy(),
+                                  frames)
+    ref_ms, reference = per_frame_ms(nonzero_polyfit, masks)
+    ms, found = per_frame_ms(find_lanes, masks)
+
+    # Largest difference between the two fits at the bottom, middle and top rows
+    rows = [height - 1, height / 2, 0]
+    deviation = 0.0
+    for expected, polys in zip(reference, found):
+        for a, b in zip(expected, polys):
+            if (a is None) != (b is None):
+                deviation = float("inf")
+            elif a is not None:
+                deviation = max(deviation, np.abs(np.polyval(a, rows) - np.polyval(b, rows)).max())
+    lanes_found = np.mean([[poly is not None for poly in polys] for polys in found])
+
+    print(f"{len(frames)} frames {width}x{height} from {args.source}, "
+          f"{np.mean([np.count_nonzero(m) for m in masks]):.0f} mask pixels on average")
+    print(f"{'':<20} {'median ms':>10} {'p99 ms':>8}")
+    for label, values in (("mask (05 + 06)", mask_ms), ("nonzero + polyfit", ref_ms),
+                          ("find_lanes", ms)):
+        print(f"{label:<20} {np.median(values):10.3f} {np.percentile(values, 99):8.3f}")
+    print(f"lanes found {lanes_found:.0%}, max difference to np.polyfit {deviation:.2g} px")
+    median = np.median(ms)
+    print(f"find_lanes {'within' if median < TARGET_MS else 'OVER'} the {TARGET_MS} ms target "
+          f"({median / TARGET_MS:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Benchmark capture-to-result latency of blocking vs latest-only subscribers.
+
+A producer process publishes synthetic frames at ``--fps`` through a frame
+ring and ZeroMQ, exactly like the capture script. The consumer simulates a
+perception step that takes ``--work-ms`` per frame. When the work is slower
+than the camera, the blocking loop falls behind and works on stale frames;
+the latest-only mode should keep latency bounded to about one frame of work.
+
+    python benchmarks/bench_subscriber.py --fps 60 --work-ms 30
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.metadata import frame_metadata, latency_ms, pack_metadata
+from fira_drive.ring import FrameRing
+from fira_drive.scheduler import CaptureScheduler
+from fira_drive.subscriber import FrameSubscriber
+
+
+RING_NAME = "fira_bench_subscriber"
+ENDPOINT = "tcp://127.0.0.1:5599"
+TOPIC = b"cam0_metadata"
+
+
+def producer(fps, seconds, ready):
+    ring = FrameRing.create(RING_NAME, shape=(480, 640, 3), replace=True)
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind(ENDPOINT.replace("127.0.0.1", "*"))
+    ready.set()
+    scheduler = CaptureScheduler(target_fps=fps)
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            scheduler.wait()
+            frame_id, view = ring.begin_write()
+            view.fill(frame_id % 251)
+            ring.commit(frame_id)
+            capture_ns = time.monotonic_ns()
+            socket.send_multipart(
+                [TOPIC, pack_metadata(frame_metadata(ring, frame_id, capture_ns))])
+    finally:
+        socket.close(linger=0)
+        ring.close()
+        ring.unlink()
+
+
+def consume(latest_only, seconds, work_s):
+    ring = FrameRing.attach(RING_NAME)
+    frame = ring.empty_frame()
+    latencies = []
+    with FrameSubscriber(ring, ENDPOINT, TOPIC, latest_only=latest_only) as sub:
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            meta, _ = sub.recv(out=frame, timeout_ms=1000)
+            if meta is None:
+                break
+            time.sleep(work_s)  # simulated perception step
+            latencies.append(latency_ms(meta))
+        skipped = sub.skipped
+    ring.close()
+    return np.array(latencies), skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fps", type=float, default=60)
+    parser.add_argument("--work-ms", type=float, default=30)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    for name, latest_only in (("blocking", False), ("latest-only", True)):
+        ready = mp.Event()
+        proc = mp.Process(target=producer, args=(args.fps, args.seconds + 1, ready))
+        proc.start()
+        ready.wait()
+        time.sleep(0.2)  # let the subscription propagate before frames flow
+        latencies, skipped = consume(latest_only, args.seconds, args.work_ms / 1e3)
+        proc.join()
+
+        if len(latencies) == 0:
+            print(f"{name:<12} no frames received")
+            continue
+        print(f"{name:<12} {len(latencies):5d} frames  "
+              f"latency p50 {np.percentile(latencies, 50):7.1f} ms  "
+              f"p99 {np.percentile(latencies, 99):7.1f} ms  "
+              f"max {latencies.max():7.1f} ms  skipped {skipped}")
+
+
+if __name__ == "__main__":
+    main()
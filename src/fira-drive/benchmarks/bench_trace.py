@@ -0,0 +1,100 @@
+"""Microbenchmark the cost of trace spans, disabled and enabled.
+
+Times an empty loop, an empty ``with trace.span(...)`` and the flag-test +
+``trace.record`` idiom with tracing off and on, and the fused perception
+pipeline (one record per stage, flag-test idiom) both ways. The disabled
+overhead per frame is the per-stage cost times the number of stages,
+reported as a fraction of the pipeline's frame time.
+
+    python benchmarks/bench_trace.py --trace-json /tmp/pipeline.json
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench_pipeline import load_frames
+from fira_drive import trace
+from fira_drive.perception import build_pipeline
+
+
+def loop_ns(body, n):
+    start = time.perf_counter_ns()
+    body(n)
+    return (time.perf_counter_ns() - start) / n
+
+
+def empty(n):
+    for _ in range(n):
+        pass
+
+
+def spans(n):
+    # Module attribute lookup included, as in the instrumented code
+    for _ in range(n):
+        with trace.span("bench"):
+            pass
+
+
+def records(n):
+    tracer = trace.tracer
+    for _ in range(n):
+        if tracer.enabled:
+            start_ns = time.monotonic_ns()
+        if tracer.enabled:
+            trace.record("bench", start_ns, time.monotonic_ns())
+
+
+def frame_ms(pipeline, frames, repeat):
+    pipeline.run(frames[0])  # warm up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for frame in frames:
+            pipeline.run(frame)
+    return (time.perf_counter() - start) / (repeat * len(frames)) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--trace-json", help="write the pipeline spans as a Chrome trace")
+    args = parser.parse_args()
+
+    trace.disable()
+    base = loop_ns(empty, args.iterations)
+    cost = {}
+    for name, body in (("span", spans), ("flag + record", records)):
+        disabled = loop_ns(body, args.iterations) - base
+        trace.enable()
+        enabled = loop_ns(body, args.iterations // 10) - base
+        trace.disable()
+        cost[name] = (disabled, enabled)
+    trace.tracer.clear()
+
+    frames = load_frames(None, args.frames, 640, 480)
+    pipeline = build_pipeline(640, 480)
+    t_off = frame_ms(pipeline, frames, args.repeat)
+    trace.enable()
+    t_on = frame_ms(pipeline, frames, args.repeat)
+    trace.disable()
+
+    stages = len(pipeline)
+    for name, (disabled, enabled) in cost.items():
+        print(f"{name:<14} disabled {disabled:7.1f} ns   enabled {enabled:7.1f} ns")
+    print(f"pipeline ({stages} stages)  off {t_off:.3f} ms/frame  on {t_on:.3f} ms/frame")
+    disabled = cost["flag + record"][0]
+    print(f"disabled overhead {disabled * stages / 1e3:.2f} us/frame "
+          f"= {disabled * stages / (t_off * 1e6):.4%} of the frame time")
+    print()
+    print(trace.format_summary(trace.tracer))
+    if args.trace_json:
+        trace.dump_chrome_trace(trace.tracer, args.trace_json)
+        print(f"Chrome trace written to {args.trace_json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark the lane tracker against a full search on every frame.
+
+Replays frames (``--source``: synthetic, a video, image directory or .fira
+archive) through:
+
+    hough (09)       09_hough_lines.hough_lines + fit_lanes, every frame
+    detect always    LaneTracker reset before every frame, so each frame
+                     gets the full bird's-eye Hough search
+    track, raw       LaneTracker without smoothing (huge process noise)
+    track            LaneTracker as configured
+
+and reports the per-frame cost, how often the full search ran, and the
+jitter of the lane position: the standard deviation of the frame-to-frame
+change in slope of each lane's x at the bottom and middle rows (second
+difference, bird's-eye pixels), which is 0 for perfectly smooth motion.
+
+    python benchmarks/bench_tracking.py --frames 600
+"""
+
+import argparse
+import itertools
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from fira_drive.lanes import empty_result, fit_lanes
+from fira_drive.replay import SYNTHETIC, open_source
+from fira_drive.scripts import load_step
+from fira_drive.tracking import LaneTracker
+
+
+def jitter(positions):
+    """Std of the second difference over runs of frames where the lane exists."""
+    values = []
+    for series in positions.T:
+        second = np.diff(series, 2)
+        values.append(second[~np.isnan(second)])
+    values = np.concatenate(values)
+    return float(np.std(values)) if len(values) else float("nan")
+
+
+def run_tracker(tracker, frames, reset=False):
+    rows = np.array([tracker.height - 1, (tracker.height - 1) / 2])
+    positions = np.full((len(frames), 4), np.nan)
+    durations = []
+    detections = tracker.detections
+    for i, frame in enumerate(frames):
+        start = time.perf_counter()
+        if reset:
+            tracker.reset()
+        left, right = tracker.update(frame)
+        durations.append(time.perf_counter() - start)
+        if left is not None:
+            positions[i, :2] = np.polyval(left, rows)
+        if right is not None:
+            positions[i, 2:] = np.polyval(right, rows)
+    found = (~np.isnan(positions[:, ::2])).mean()
+    return (np.array(durations) * 1e3, tracker.detections - detections, jitter(positions), found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SYNTHETIC)
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    frames = [frame.copy() for frame, _ in
+              itertools.islice(open_source(args.source, args.width, args.height), args.frames)]
+    height, width = frames[0].shape[:2]
+
+    hough_lines = load_step("09_hough_lines", "hough_lines")
+    result = empty_result()
+    hough_lines(frames[0])
+    durations = []
+    for frame in frames:
+        start = time.perf_counter()
+        fit_lanes(hough_lines(frame), width, height, out=result)
+        durations.append(time.perf_counter() - start)
+    baseline = np.median(durations) * 1e3
+
+    print(f"{len(frames)} frames {width}x{height} from {args.source}")
+    print(f"{'':<15} {'median ms':>10} {'p99 ms':>8} {'speedup':>8} {'full searches':>14} "
+          f"{'lanes found':>12} {'jitter px':>10}")
+    print(f"{'hough (09)':<15} {baseline:10.3f} {np.percentile(durations, 99) * 1e3:8.3f} "
+          f"{1.0:7.1f}x {len(frames):14d} {'-':>12} {'-':>10}")
+    for label, tracker, reset in (
+            ("detect always", LaneTracker(width, height), True),
+            ("track, raw", LaneTracker(width, height, process_noise=1e4), False),
+            ("track", LaneTracker(width, height), False)):
+        tracker.update(frames[0])  # warm up
+        tracker.reset()
+        ms, detections, smoothness, found = run_tracker(tracker, frames, reset)
+        median = np.median(ms)
+        print(f"{label:<15} {median:10.3f} {np.percentile(ms, 99):8.3f} "
+              f"{baseline / median:7.1f}x {detections:14d} {found:12.0%} {smoothness:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""Benchmark perception throughput of the worker pool at 1, 2, 4 and 8 workers.
+
+A producer process publishes synthetic road frames at ``--fps`` through a
+frame ring and ZeroMQ, like the capture script. Each worker runs the fused
+noise-filter, morphology, Canny and Hough chains on its frames. The pool's
+throughput stops growing at the number of free cores, or at ``--fps``.
+
+With ``--kill-after`` one worker is SIGKILLed that many seconds into each
+run, to check that it is restarted and the result stream carries on. With
+``--hang-after`` one worker is SIGSTOPped instead: it stays alive but never
+answers, and its frames must time out without stalling the others.
+
+    python benchmarks/bench_workers.py --fps 1000 --seconds 5
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from bench_pipeline import OUTPUTS, load_frames
+from fira_drive.metadata import frame_metadata, pack_metadata
+from fira_drive.perception import build_pipeline
+from fira_drive.ring import FrameRing
+from fira_drive.scheduler import CaptureScheduler
+from fira_drive.workers import WorkerPool
+
+
+RING_NAME = "fira_bench_workers"
+ENDPOINT = "tcp://127.0.0.1:5598"
+TOPIC = b"cam0_metadata"
+# Enough slots that a frame survives while every worker has a backlog
+NUM_SLOTS = 32
+
+CHAINS = ["noise_filter", "morphology", "canny", "hough"]
+_pipeline = None
+
+
+def lane_lines(frame):
+    """The step run by every worker; returns the number of Hough segments."""
+    global _pipeline
+    if _pipeline is None:
+        height, width = frame.shape[:2]
+        _pipeline = build_pipeline(width, height, CHAINS)
+    results = _pipeline.run(frame, [name for chain in CHAINS for name in OUTPUTS[chain]])
+    return 0 if results["lines"] is None else len(results["lines"])
+
+
+def producer(fps, seconds, ready):
+    frames = load_frames(None, 50, 640, 480)
+    ring = FrameRing.create(RING_NAME, shape=frames[0].shape, num_slots=NUM_SLOTS,
+                             replace=True)
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind(ENDPOINT.replace("127.0.0.1", "*"))
+    ready.set()
+    time.sleep(0.5)  # let the pool attach and subscribe
+    scheduler = CaptureScheduler(target_fps=fps)
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            scheduler.wait()
+            frame_id, view = ring.begin_write()
+            view[:] = frames[frame_id % len(frames)]
+            ring.commit(frame_id)
+            socket.send_multipart(
+                [TOPIC, pack_metadata(frame_metadata(ring, frame_id, time.monotonic_ns()))])
+    finally:
+        socket.close(linger=0)
+        ring.close()
+        ring.unlink()
+
+
+def run(workers, args):
+    ready = mp.Event()
+    proc = mp.Process(target=producer, args=(args.fps, args.seconds + 1.5, ready))
+    proc.start()
+    ready.wait()
+
+    pool = WorkerPool(lane_lines, workers=workers, name=RING_NAME, endpoint=ENDPOINT, topic=TOPIC)
+    out_of_order = 0
+    last_id = -1
+    killed = args.kill_after is None
+    hung = None
+    with pool:
+        start = None
+        for meta, _ in pool:
+            now = time.monotonic()
+            if start is None:
+                # Measure from the first result, once every worker is warm
+                start, count = now, 0
+                continue
+            count += 1
+            out_of_order += meta.frame_id <= last_id
+            last_id = meta.frame_id
+            if not killed and now - start >= args.kill_after:
+                os.kill(pool.pids[0], signal.SIGKILL)
+                killed = True
+            if hung is None and args.hang_after is not None and now - start >= args.hang_after:
+                hung = pool.pids[-1]
+                os.kill(hung, signal.SIGSTOP)
+            if now - start >= args.seconds:
+                break
+        elapsed = time.monotonic() - start
+        if hung in pool.pids:
+            # Not replaced yet; a stopped process cannot exit
+            os.kill(hung, signal.SIGCONT)
+    proc.join()
+    return count / elapsed, pool, out_of_order
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fps", type=float, default=1000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--kill-after", type=float, default=None,
+                        help="SIGKILL one worker this many seconds into each run")
+    parser.add_argument("--hang-after", type=float, default=None,
+                        help="SIGSTOP one worker this many seconds into each run")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, producer at {args.fps:g} fps")
+    baseline = None
+    for workers in args.workers:
+        fps, pool, out_of_order = run(workers, args)
+        baseline = baseline or fps
+        print(f"{workers:2d} workers  {fps:8.1f} frames/s  ({fps / baseline:4.2f}x)  "
+              f"dropped {pool.dropped:6d}  stale {pool.stale:4d}  lost {pool.lost:2d}  "
+              f"timed out {pool.timed_out:2d}  restarts {pool.restarts}  "
+              f"out of order {out_of_order}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Check that the perception steps do not allocate image buffers per frame.
+
+Each perception-tests step function and the fused pipeline are warmed up on
+a few frames (which allocates their buffer pools), then run over N more
+frames under tracemalloc. NumPy reports its array allocations to
+tracemalloc, including the arrays OpenCV returns, so a stage that allocates
+a new output per frame shows up as a peak of at least one image plane. The
+check fails if any step's peak exceeds ``--limit-kib`` above its baseline.
+
+    python benchmarks/check_allocations.py --frames 50
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from fira_drive.perception import build_pipeline
+from fira_drive.scripts import load_step
+
+
+# script -> name of its per-frame step function
+STEPS = {
+    "01_grayscale": "grayscale",
+    "02_hsv_conversion": "hsv_channels",
+    "03_noise_filter": "noise_filters",
+    "04_roi_crop": "roi_crop",
+    "06_morphological_ops": "morphological_ops",
+    "07_canny_edges": "canny_edges",
+    "08_clahe_normalize": "clahe_normalize",
+    "09_hough_lines": "hough_lines",
+}
+
+
+def synthetic_frames(count, width, height):
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(count):
+        frame = rng.integers(60, 90, (height, width, 3), dtype=np.uint8)
+        cv2.line(frame, (width // 6 + i, height), (width * 2 // 5, height // 2),
+                 (255, 255, 255), 8)
+        frames.append(frame)
+    return frames
+
+
+def peak_growth(step, frames, warmup):
+    """Peak traced memory above the baseline while running ``step`` on ``frames``."""
+    for frame in frames[:warmup]:
+        step(frame)
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for frame in frames[warmup:]:
+            step(frame)
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--limit-kib", type=float, default=64,
+                        help="allowed peak growth; one 640x480 gray plane is 300 KiB")
+    args = parser.parse_args()
+
+    frames = synthetic_frames(args.warmup + args.frames, args.width, args.height)
+
+    steps = {script: load_step(script, function) for script, function in STEPS.items()}
+    steps["05_birds_eye"] = load_step("05_birds_eye", "make_birds_eye")(args.width, args.height)
+    pipeline = build_pipeline(args.width, args.height)
+    steps["fused pipeline"] = pipeline.run
+
+    failed = []
+    for name, step in steps.items():
+        growth = peak_growth(step, frames, args.warmup) / 1024
+        ok = growth <= args.limit_kib
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<22} peak +{growth:8.1f} KiB")
+        if not ok:
+            failed.append(name)
+
+    if failed:
+        print(f"{len(failed)} step(s) allocate per frame: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
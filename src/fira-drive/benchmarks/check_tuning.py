@@ -0,0 +1,148 @@
+"""Check that tuning reloads reach running steps and rebuild only what changed.
+
+Works on a copy of ``fira-drive.toml`` in a temporary directory, edited
+while the steps of 05_birds_eye and 06_morphological_ops keep running on
+frames:
+
+    touched         same contents, new mtime: no reload, nothing rebuilt
+    canny.low       reload; the warp maps are not rebuilt
+    src_pts         reload; the warp maps are rebuilt once, then reused
+    kernel          reload; 06 uses the new kernel size
+    invalid         reported and ignored, the previous values stay
+    watcher thread  an edit is picked up without calling check()
+    import          the steps import without reading the (invalid) file
+
+Also reports what a frame pays for reading the tuning and looking up the
+cached derived data when nothing changed.
+
+    python benchmarks/check_tuning.py
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from fira_drive.config import find_config
+from fira_drive.scripts import load_script
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher, morph_kernel
+
+
+def edit(path, pattern, replacement):
+    text = path.read_text()
+    path.write_text(re.sub(pattern, replacement, text, count=1, flags=re.MULTILINE))
+    # Make sure the mtime differs even on coarse filesystem clocks
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def main():
+    source = find_config()
+    if source is None:
+        raise SystemExit("No fira-drive.toml found")
+
+    failed = []
+
+    def check(name, ok, detail=""):
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<16} {detail}")
+        if not ok:
+            failed.append(name)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "fira-drive.toml"
+        path.write_text(source.read_text())
+        birds_eye_module = load_script("05_birds_eye")
+        morphology_module = load_script("06_morphological_ops")
+
+        frame = np.zeros((480, 640, 3), np.uint8)
+        birds_eye = birds_eye_module.make_birds_eye(640, 480)
+        geometry = birds_eye_module.geometry
+        # The scripts' main() passes the current values to the steps like this
+        watcher = TuningWatcher(path)
+
+        def run_frames(count=3):
+            for _ in range(count):
+                params = watcher.current
+                birds_eye(frame, params.birds_eye.src_pts)
+                morphology_module.morphological_ops(frame, params.morphology)
+
+        run_frames()
+        builds = geometry.builds
+        before = watcher.current
+
+        edit(path, r"^", "")
+        check("touched", not watcher.check() and watcher.current is before,
+              f"reloads={watcher.reloads}")
+
+        edit(path, r"^low = \d+", "low = 80")
+        reloaded = watcher.check()
+        run_frames()
+        check("canny.low", reloaded and watcher.current.canny.low == 80
+              and watcher.current.birds_eye == before.birds_eye and geometry.builds == builds,
+              f"canny={watcher.current.canny}, warp builds +{geometry.builds - builds}")
+
+        edit(path, r"^src_pts = .*", "src_pts = [[200, 300], [440, 300], [640, 450], [0, 450]]")
+        reloaded = watcher.check()
+        run_frames(10)
+        check("src_pts", reloaded and geometry.builds == builds + 1,
+              f"warp builds +{geometry.builds - builds} over 10 frames")
+
+        edit(path, r"^kernel = \d+", "kernel = 7")
+        reloaded = watcher.check()
+        _, opening, _ = morphology_module.morphological_ops(frame, watcher.current.morphology)
+        check("kernel", reloaded and watcher.current.morphology.kernel == 7
+              and morph_kernel(7).shape == (7, 7) and opening.shape == frame.shape[:2],
+              f"morphology={watcher.current.morphology}")
+
+        current = watcher.current
+        edit(path, r"^clip_limit = .*", "clip_limit = -1")
+        check("invalid", not watcher.check() and watcher.current is current
+              and watcher.errors == 1, watcher.error or "")
+
+        with watcher:
+            watcher.interval = 0.05
+            edit(path, r"^clip_limit = .*", "clip_limit = 3.0")
+            deadline = time.monotonic() + 2.0
+            while watcher.current.clahe.clip_limit != 3.0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        check("watcher thread", watcher.current.clahe.clip_limit == 3.0,
+              f"clahe={watcher.current.clahe}")
+
+        edit(path, r"^clip_limit = .*", "clip_limit = -1")
+        os.environ["FIRA_DRIVE_CONFIG"] = str(path)
+        try:
+            for script in ("05_birds_eye", "06_morphological_ops", "07_canny_edges",
+                           "08_clahe_normalize", "09_hough_lines"):
+                load_script(script)
+        except ValueError as e:
+            check("import", False, f"{script}: {e}")
+        else:
+            check("import", True, "05-09 with an invalid file")
+        finally:
+            del os.environ["FIRA_DRIVE_CONFIG"]
+
+        # Per-frame cost of staying in step when nothing changed
+        count = 10000
+        start = time.perf_counter()
+        for _ in range(count):
+            params = watcher.current
+            geometry.warp_maps(params.birds_eye.src_pts, np.float32([[0, 0], [640, 0],
+                               [640, 480], [0, 480]]), (640, 480))
+            morph_kernel(params.morphology.kernel)
+        print(f"     per frame: read tuning + cached warp maps + kernel "
+              f"{(time.perf_counter() - start) / count * 1e6:.1f} us")
+
+    print(f"defaults: {DEFAULT_TUNING.canny}, {DEFAULT_TUNING.morphology}")
+    if failed:
+        print(f"{len(failed)} check(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Stress test for the shared-memory frame ring.
+
+Runs one writer that publishes frames as fast as it can and several readers,
+each in its own process. Every pixel of frame ``n`` is set to ``n % 251``, so
+a reader can tell a torn frame (mixed values) from a clean one. The seqlock
+must reject every torn copy: the test fails if a reader ever accepts one.
+
+    python benchmarks/ring_stress.py --readers 4 --seconds 5
+
+tests/test_ring.py runs it for a second as part of the test suite.
+"""
+
+import argparse
+import multiprocessing as mp
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.ring import FrameRing
+
+
+RING_NAME = "fira_ring_stress"
+
+
+def writer(shape, num_slots, seconds, ready):
+    ring = FrameRing.create(RING_NAME, shape=shape, num_slots=num_slots, replace=True)
+    ready.set()
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            frame_id, view = ring.begin_write()
+            # Fill in two halves so a reader racing the writer can see a mix
+            half = view.shape[0] // 2
+            view[:half] = frame_id % 251
+            view[half:] = frame_id % 251
+            ring.commit(frame_id)
+        print(f"writer: {ring.write_index} frames")
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def reader(index, seconds, results):
+    ring = FrameRing.attach(RING_NAME)
+    frame = ring.empty_frame()
+    accepted = rejected = corrupt = 0
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            frame_id = ring.write_index - 1
+            if ring.read(frame_id, out=frame) is None:
+                rejected += 1
+                continue
+            accepted += 1
+            expected = frame_id % 251
+            if frame.min() != expected or frame.max() != expected:
+                corrupt += 1
+    finally:
+        ring.close()
+    results.put((index, accepted, rejected, corrupt))
+
+
+def run(readers=4, seconds=5.0, slots=4, shape=(480, 640, 3)):
+    """Run the writer and ``readers`` readers; returns ``(index, accepted, rejected, corrupt)`` each."""
+    ready = mp.Event()
+    results = mp.Queue()
+
+    producer = mp.Process(target=writer, args=(shape, slots, seconds + 1, ready))
+    producer.start()
+    ready.wait()
+
+    consumers = [
+        mp.Process(target=reader, args=(i, seconds, results))
+        for i in range(readers)
+    ]
+    for p in consumers:
+        p.start()
+
+    counts = sorted(results.get() for _ in consumers)
+    for p in consumers:
+        p.join()
+    producer.join()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    args = parser.parse_args()
+
+    counts = run(args.readers, args.seconds, args.slots, (args.height, args.width, 3))
+    total_corrupt = 0
+    for index, accepted, rejected, corrupt in counts:
+        total_corrupt += corrupt
+        print(f"reader {index}: {accepted} accepted, {rejected} torn/stale rejected, "
+              f"{corrupt} corrupt accepted")
+
+    if total_corrupt:
+        print("FAIL: torn frames got past the seqlock")
+        sys.exit(1)
+    print("OK: no torn frame was accepted")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""Benchmark suite: capture transport and every perception step, no camera needed.
+
+Measures, at each ``--resolution``:
+
+    shm/write   FrameRing.write of a frame (the producer's copy into a slot)
+    shm/read    FrameRing.read of a frame (seqlock-checked copy out of a slot)
+    zmq/notify  publishing a metadata message until a subscriber receives it
+    step/<name> each perception-tests step function (01 .. 09)
+
+Frames come from ``--source`` (a video, image directory, .fira archive or
+"synthetic"), resized to each resolution. Every case is timed in
+``--repeat`` runs, interleaved with the other cases. Results are written as
+JSON; with ``--baseline`` every case is compared against a saved run, and
+the suite exits with status 1 if any case got slower by more than
+``--threshold`` in every run: even the fastest of its per-run medians must
+be that much slower than the slowest of the baseline's. Timing noise on a
+busy or frequency-scaling machine easily moves a median by 10-20%, and
+moves whole runs; a noisy case has overlapping runs instead of a
+regression. Comparing takes at least ``MIN_REPEAT`` runs on both sides, as
+a few runs can miss each other by chance.
+
+    python benchmarks/suite.py --output baseline.json
+    python benchmarks/suite.py --baseline baseline.json --output new.json
+"""
+
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import zmq
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+from fira_drive.metadata import frame_metadata, pack_metadata, unpack_metadata
+from fira_drive.replay import SYNTHETIC, open_source
+from fira_drive.ring import FrameRing
+from fira_drive.scripts import load_script
+
+
+RESOLUTIONS = ["320x240", "640x480", "1280x720"]
+
+# Runs per case needed to compare against a baseline
+MIN_REPEAT = 5
+
+RING_NAME = "fira_bench_suite"
+ENDPOINT = "tcp://127.0.0.1:5596"
+TOPIC = b"cam0_metadata"
+
+# name -> (script, step function)
+STEPS = {
+    "grayscale": ("01_grayscale", "grayscale"),
+    "hsv": ("02_hsv_conversion", "hsv_channels"),
+    "lane_mask": ("02_hsv_conversion", "lane_mask"),
+    "noise_filter": ("03_noise_filter", "noise_filters"),
+    "roi": ("04_roi_crop", "roi_crop"),
+    "birds_eye": ("05_birds_eye", "make_birds_eye"),
+    "morphology": ("06_morphological_ops", "morphological_ops"),
+    "canny": ("07_canny_edges", "canny_edges"),
+    "clahe": ("08_clahe_normalize", "clahe_normalize"),
+    "lighting": ("08_clahe_normalize", "normalize_lighting"),
+    "hough": ("09_hough_lines", "hough_lines"),
+}
+
+
+def stats(durations_ns, runs=1):
+    """Summary of ``durations_ns``, which are ``runs`` consecutive equal runs."""
+    ms = np.asarray(durations_ns, dtype=np.float64) / 1e6
+    return {
+        "n": len(ms),
+        "median_ms": float(np.median(ms)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+        # Compared run by run against a baseline (see compare())
+        "run_medians_ms": [float(np.median(run)) for run in np.array_split(ms, runs)],
+    }
+
+
+def time_calls(func, items):
+    """Per-call durations of ``func(item)`` over ``items``."""
+    durations = []
+    for item in items:
+        start = time.perf_counter_ns()
+        func(item)
+        durations.append(time.perf_counter_ns() - start)
+    return durations
+
+
+def shm_cases(frames, cleanup):
+    """Write and read cases on a ring of the frames' geometry."""
+    ring = FrameRing.create(f"{RING_NAME}_{frames[0].shape[1]}x{frames[0].shape[0]}",
+                            shape=frames[0].shape, num_slots=4, replace=True)
+    cleanup.callback(ring.unlink)
+    cleanup.callback(ring.close)
+    out = ring.empty_frame()
+    for frame in frames[:ring.num_slots]:
+        ring.write(frame)
+
+    def read(back):
+        # Slots written by the last write run, so every read is a full copy
+        return ring.read(ring.write_index - 1 - back, out)
+
+    # As many reads as writes, cycling over the slots
+    reads = list(itertools.islice(itertools.cycle(range(ring.num_slots)), len(frames)))
+    return (ring.write, frames), (read, reads)
+
+
+def notify_case(count, cleanup):
+    """Publishing a metadata message until the subscriber has it, ``count`` times."""
+    ring = FrameRing.create(RING_NAME, shape=(2, 2, 3), num_slots=4, replace=True)
+    cleanup.callback(ring.unlink)
+    cleanup.callback(ring.close)
+    context = zmq.Context.instance()
+    pub = context.socket(zmq.PUB)
+    cleanup.callback(pub.close, linger=0)
+    pub.bind(ENDPOINT)
+    sub = context.socket(zmq.SUB)
+    cleanup.callback(sub.close, linger=0)
+    sub.connect(ENDPOINT)
+    sub.setsockopt(zmq.SUBSCRIBE, TOPIC)
+    # Wait for the subscription to reach the publisher
+    while True:
+        pub.send_multipart([TOPIC, pack_metadata(frame_metadata(ring, 0, 0))])
+        if sub.poll(100):
+            sub.recv_multipart()
+            break
+
+    def notify(frame_id):
+        pub.send_multipart([TOPIC, pack_metadata(frame_metadata(ring, frame_id, 0))])
+        unpack_metadata(sub.recv_multipart()[1])
+
+    return notify, range(count)
+
+
+def load_frames(source, count):
+    frames = []
+    for frame, _ in itertools.islice(open_source(source), count):
+        frames.append(np.ascontiguousarray(frame).copy())
+    if not frames:
+        raise SystemExit(f"No frames in {source}")
+    return frames
+
+
+def run(args, warmup=3):
+    base_frames = load_frames(args.source, args.frames)
+    modules = {script: load_script(script) for script, _ in STEPS.values()}
+    durations = {}
+
+    with contextlib.ExitStack() as cleanup:
+        # case name -> (function, its arguments for one run)
+        cases = {"zmq/notify": notify_case(args.frames, cleanup)}
+        for resolution in args.resolution:
+            width, height = (int(v) for v in resolution.split("x"))
+            frames = [cv2.resize(frame, (width, height)) for frame in base_frames]
+            cases[f"shm/write/{resolution}"], cases[f"shm/read/{resolution}"] = \
+                shm_cases(frames, cleanup)
+
+            for name, (script, function) in STEPS.items():
+                module = modules[script]
+                step = getattr(module, function)
+                if name == "birds_eye":
+                    # Calibration points are in 640x480 pixels
+                    step = step(width, height,
+                                module.SRC_PTS * np.float32([width / 640, height / 480]))
+                cases[f"step/{name}/{resolution}"] = (step, frames)
+
+        for func, items in cases.values():
+            for item in list(items)[:warmup]:
+                func(item)
+        # One run of every case per repeat, so each case's runs are spread
+        # over the whole suite and their spread includes the slow and fast
+        # periods of the machine, not just one of them
+        for _ in range(args.repeat):
+            for name, (func, items) in cases.items():
+                durations.setdefault(name, []).extend(time_calls(func, items))
+
+    results = {name: stats(values, args.repeat) for name, values in durations.items()}
+    for resolution in args.resolution:
+        width, height = (int(v) for v in resolution.split("x"))
+        mb = height * width * base_frames[0].shape[2] / 2**20
+        for case in ("write", "read"):
+            result = results[f"shm/{case}/{resolution}"]
+            result["mb_per_s"] = mb / (result["median_ms"] / 1e3)
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "zmq": zmq.zmq_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_medians(result):
+    return result.get("run_medians_ms") or [result["median_ms"]]
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table; return the names of the cases that regressed.
+
+    A case regressed if its median is more than ``threshold`` slower than
+    the baseline's and so is its fastest run compared to the baseline's
+    slowest.
+    """
+    regressions = []
+    print(f"{'case':<28} {'baseline ms':>12} {'now ms':>10} {'change':>8} {'runs':>8}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            print(f"{name:<28} {'-':>12} {result['median_ms']:10.3f}      new")
+            continue
+        change = result["median_ms"] / old["median_ms"] - 1
+        # Fastest run now against the slowest run then
+        runs = min(run_medians(result)) / max(run_medians(old)) - 1
+        flag = ""
+        if change > threshold and runs > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<28} {old['median_ms']:12.3f} {result['median_ms']:10.3f} "
+              f"{change:+8.1%} {runs:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=SYNTHETIC,
+                        help="video, image directory, .fira archive or 'synthetic'")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=MIN_REPEAT,
+                        help="runs per case, interleaved with the other cases")
+    parser.add_argument("--resolution", nargs="+", default=RESOLUTIONS)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous --output")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed slowdown of a case before it is flagged "
+                             "(of its median and of every run)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        if args.repeat < MIN_REPEAT:
+            parser.error(f"comparing needs --repeat {MIN_REPEAT} or more")
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        runs = min(len(run_medians(result)) for result in baseline.values())
+        if runs < MIN_REPEAT:
+            parser.error(f"{args.baseline} has only {runs} run(s) per case; "
+                         f"record it with --repeat {MIN_REPEAT} or more")
+
+    results = run(args)
+    report = {"environment": environment(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%} in every run: "
+                  f"{', '.join(regressions)}")
+            sys.exit(1)
+        return
+
+    print(f"{'case':<28} {'median ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for name, result in results.items():
+        extra = f"  {result['mb_per_s']:8.0f} MiB/s" if "mb_per_s" in result else ""
+        print(f"{name:<28} {result['median_ms']:10.3f} {result['p99_ms']:10.3f} "
+              f"{result['max_ms']:10.3f}{extra}")
+
+
+if __name__ == "__main__":
+    main()
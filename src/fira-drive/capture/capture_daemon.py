@@ -0,0 +1,57 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.cameras import CaptureDaemon
+from fira_drive.config import find_config, load_config
+
+
+# Capture every camera listed in fira-drive.toml into its own ring, with one
+# PUB socket and a "<name>_metadata" topic per camera. Perception steps read
+# a camera with FrameSource("<name>"), synchronised views of several with
+# fira_drive.sync.SyncedFrameSource.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish frames of several cameras to shared memory.")
+    parser.add_argument("cameras", nargs="*", help="cameras to start (default: all configured)")
+    parser.add_argument("--config", help="configuration file (default: fira-drive.toml)")
+    args = parser.parse_args()
+
+    config_path = args.config or find_config()
+    config = load_config(config_path) if config_path else {}
+    try:
+        daemon = CaptureDaemon.from_config(config, names=args.cameras)
+    except ValueError as e:
+        print(f"Error: {e}")
+        exit()
+
+    timeout = 5.0
+    failed = daemon.start(timeout)
+    for thread in failed:
+        print(f"Error: {thread.error}")
+    for thread in daemon.threads:
+        if thread in failed:
+            continue
+        ring = thread.ring
+        if ring is None:
+            # Still opening (a slow driver or stream): it keeps trying in
+            # the background and publishes once it has a frame
+            print(f"{thread.camera.name}: not ready after {timeout:g} s, still opening "
+                  f"{thread.camera.device!r}")
+            continue
+        print(f"{thread.camera.name}: {ring.width}x{ring.height} "
+              f"from {thread.camera.device!r} on topic {thread.metadata_topic.decode()}")
+
+    try:
+        while daemon.running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.stop()
+    # Cameras that failed after start-up: late to open, or stopped delivering
+    for thread in daemon.threads:
+        if thread.error is not None and thread not in failed:
+            print(f"Error: {thread.error}")
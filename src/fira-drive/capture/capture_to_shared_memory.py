@@ -1,33 +1,64 @@
+import sys
 import time
-import struct
-from multiprocessing.shared_memory import SharedMemory
+import argparse
+from pathlib import Path
 
 import cv2
 import zmq
-import numpy as np
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive import trace
+from fira_drive.ring import FrameRing
+from fira_drive.capture import CAPTURE_MODES, ZERO_COPY, CopyStats, FrameGrabber, capture_into_ring
+from fira_drive.planes import PLANE_NAMES, PlaneSet
+from fira_drive.scheduler import CaptureScheduler
+from fira_drive.metadata import frame_metadata, pack_metadata
 
-# Define the number of slots and maximum sequence number
+
+# Define the number of slots
 NUM_SLOTS = 4
-MAX_SEQUENCE = 10000  # Define the max sequence number before reset
+STATS_INTERVAL = 300  # Print/publish statistics every N frames
 
 # ZeroMQ setup (Publisher)
 context = zmq.Context()
 socket = context.socket(zmq.PUB)
 socket.bind("tcp://*:5555")  # Bind to a port for PUB/SUB communication
 
-def send_sequence_number(sequence_number):
+def send_frame_metadata(ring, frame_id, capture_ns):
     # 1. Define the topic (must be bytes)
     topic = b"cam0_metadata"
     
-    # 2. Pack the sequence number
-    sequence_bytes = struct.pack('>I', sequence_number)
+    # 2. Pack the frame metadata (frame id, timestamps, slot, geometry, format)
+    metadata_bytes = pack_metadata(frame_metadata(ring, frame_id, capture_ns))
     
     # 3. Send as a multipart message
     # send_multipart takes a list of bytes
-    socket.send_multipart([topic, sequence_bytes])
+    socket.send_multipart([topic, metadata_bytes])
+
+def send_capture_stats(scheduler):
+    # Frames, dropped frames and overruns since start, on their own topic
+    socket.send_multipart([b"cam0_stats", scheduler.pack_stats()])
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publish camera frames to shared memory.")
+    parser.add_argument("--mode", choices=CAPTURE_MODES, default=ZERO_COPY,
+                        help="zero-copy: decode straight into the ring slot; "
+                             "copy: decode into a temporary frame, then copy it in")
+    parser.add_argument("--fps", type=float, default=0,
+                        help="target frame rate; 0 publishes every frame as soon "
+                             "as it is captured (free-running)")
+    parser.add_argument("--inline-grab", action="store_true",
+                        help="read the camera in the publishing loop instead of "
+                             "draining it on a grab thread (frames queue up in the "
+                             "driver whenever the loop is slower than the camera)")
+    parser.add_argument("--keep-stale", action="store_true",
+                        help="with the grab thread, publish every grabbed frame "
+                             "instead of only the newest one")
+    parser.add_argument("--planes", nargs="+", choices=PLANE_NAMES,
+                        help="planes to publish in each slot, the first being the "
+                             "primary one, e.g. 'frame gray half_gray' (default: frame only)")
+    args = parser.parse_args()
+
     cap = cv2.VideoCapture(0)
     
     if not cap.isOpened():
@@ -39,42 +70,72 @@ if __name__ == "__main__":
         print("Error: Could not read frame from the camera.")
         exit()
 
-    # Calculate BUFFER_SIZE based on the grabbed image size
-    BUFFER_SIZE = np.prod(frame.shape)
-
-    # Create shared memory for camera frames only
-    shared_memory_cam0 = SharedMemory(
-        name='cam0',
-        create=True,
-        size=int(NUM_SLOTS * BUFFER_SIZE))
-
-    buff_cam0 = shared_memory_cam0.buf
-    sequence_number = 0
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            continue
-
-        # Sequence number logic: alternating odd/even
-        sequence_number = (sequence_number + 1) % MAX_SEQUENCE
-        
-        # Write the buffer to shared memory (for frame data only)
-        slot_index = (sequence_number // 2) % NUM_SLOTS
-        buff_cam0[slot_index * BUFFER_SIZE : (slot_index + 1) * BUFFER_SIZE] = frame.flatten()
-
-        # Sequence number logic: alternating odd/even
-        sequence_number = (sequence_number + 1) % MAX_SEQUENCE
-
-        # Send the sequence number via ZeroMQ
-        send_sequence_number(sequence_number)
-
-        # Optional: Control frame rate
-        time.sleep(0.1)
+    # Create the frame ring from the grabbed image geometry. The ring header
+    # carries the geometry, so consumers do not need to know it in advance.
+    planes = None
+    if args.planes:
+        # Derived planes are computed once here instead of in every consumer
+        planes = PlaneSet(args.planes, frame.shape, frame.dtype)
+        ring = FrameRing.create('cam0', num_slots=NUM_SLOTS, planes=planes.layout)
+    else:
+        ring = FrameRing.create('cam0', shape=frame.shape, dtype=frame.dtype,
+                                num_slots=NUM_SLOTS)
+
+    stats = CopyStats()
+    scheduler = CaptureScheduler(target_fps=args.fps)
+
+    # The grab thread keeps the driver queue empty, so the loop below decodes
+    # the newest frame instead of the oldest one the driver kept
+    grabber = None
+    if not args.inline_grab:
+        grabber = FrameGrabber(cap, keep_stale=args.keep_stale).start()
+
+    try:
+        while cap.isOpened():
+            # Paced mode sleeps until the next tick; free-running returns at once
+            scheduler.wait()
+
+            # Capture into the next slot (guarded by the slot's seqlock)
+            start_ns = time.monotonic_ns()
+            grab_ns = None
+            if grabber is None:
+                frame_id = capture_into_ring(cap, ring, mode=args.mode, stats=stats,
+                                             planes=planes)
+            else:
+                frame_id, grab_ns = grabber.retrieve_into_ring(ring, mode=args.mode, stats=stats,
+                                                               planes=planes)
+                if frame_id is None and grabber.failed:
+                    print("Error: the camera stopped delivering frames.")
+                    break
+            if frame_id is None:
+                scheduler.frame_dropped()
+                continue
+            decoded_ns = time.monotonic_ns()
+            trace.record("capture", start_ns, decoded_ns, frame_id)
+            scheduler.frame_done()
+
+            # Notify subscribers that a new frame is ready. The timestamp is
+            # when the grab thread grabbed it, so the latency consumers see
+            # includes the time the frame waited to be decoded.
+            capture_ns = grab_ns if grab_ns is not None else decoded_ns
+            with trace.span("notify", frame_id):
+                send_frame_metadata(ring, frame_id, capture_ns)
+
+            if stats.frames == STATS_INTERVAL:
+                stale = f", stale={grabber.stale}" if grabber is not None else ""
+                print(f"[{args.mode}] {stats}, dropped={scheduler.dropped}, "
+                      f"overruns={scheduler.overruns}{stale}")
+                send_capture_stats(scheduler)
+                stats.reset()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if grabber is not None:
+            grabber.stop()
 
     # Clean up
-    shared_memory_cam0.close()
-    shared_memory_cam0.unlink()
+    ring.close()
+    ring.unlink()
 
     cap.release()
     cv2.destroyAllWindows()
@@ -0,0 +1,77 @@
+import sys
+import argparse
+from pathlib import Path
+
+import cv2
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.debug import DEFAULT_HZ, DEFAULT_PREFIX, find_debug_rings
+from fira_drive.ring import FrameRing
+from fira_drive.scheduler import CaptureScheduler
+
+
+def read_latest(name):
+    # Attach for every read: the perception script recreates a ring when the
+    # image geometry changes, and at a few Hz attaching costs nothing
+    try:
+        ring = FrameRing.attach(name)
+    except FileNotFoundError:
+        return None
+    try:
+        _, image = ring.read_latest()
+        return image
+    finally:
+        ring.close()
+
+def main(args):
+    socket = None
+    if args.jpeg_endpoint:
+        # JPEG frames for remote viewing, one topic per debug image
+        socket = zmq.Context.instance().socket(zmq.PUB)
+        socket.bind(args.jpeg_endpoint)
+    encode_params = [cv2.IMWRITE_JPEG_QUALITY, args.quality]
+
+    # Poll the rings at a fixed, low rate; the perception side never waits on us
+    scheduler = CaptureScheduler(target_fps=args.hz)
+    try:
+        while True:
+            scheduler.wait()
+            # Rediscover every time: publishers come and go, and each script
+            # has its own rings under the common prefix
+            for name in find_debug_rings(args.prefix, args.names):
+                image = read_latest(name)
+                if image is None:
+                    continue
+                if socket is not None:
+                    ok, jpeg = cv2.imencode(".jpg", image, encode_params)
+                    if ok:
+                        socket.send_multipart([name.encode(), jpeg.tobytes()])
+                if not args.no_window:
+                    cv2.imshow(name, image)
+            scheduler.frame_done()
+
+            if not args.no_window and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+    except KeyboardInterrupt:
+        pass
+
+    if socket is not None:
+        socket.close()
+    if not args.no_window:
+        cv2.destroyAllWindows()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the debug images of headless perception steps.")
+    parser.add_argument("names", nargs="*",
+                        help="debug images to show (default: every one that exists)")
+    parser.add_argument("--prefix", default=DEFAULT_PREFIX,
+                        help="only publishers under this prefix, e.g. cam0_debug_07_canny_edges")
+    parser.add_argument("--hz", type=float, default=DEFAULT_HZ, help="refresh rate")
+    parser.add_argument("--jpeg-endpoint",
+                        help="also publish JPEGs here, e.g. tcp://*:5557")
+    parser.add_argument("--quality", type=int, default=80, help="JPEG quality")
+    parser.add_argument("--no-window", action="store_true",
+                        help="do not open windows (JPEG publishing only)")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,43 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.recorder import Recorder
+
+
+STATS_INTERVAL = 300  # Print statistics every N frames
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record camera frames to a memory-mapped archive.")
+    parser.add_argument("output", help="archive to write, e.g. lap.fira")
+    parser.add_argument("--capacity", type=int, default=1800,
+                        help="frames to preallocate (1800 = one minute at 30 fps)")
+    parser.add_argument("--no-preallocate", action="store_true",
+                        help="do not reserve the disk space up front")
+    args = parser.parse_args()
+
+    try:
+        recorder = Recorder(args.output, args.capacity, preallocate=not args.no_preallocate)
+    except FileNotFoundError:
+        print("Error: Shared memory 'cam0' not found. Start the Producer first!")
+        exit()
+    print(f"Recording to {args.output} (up to {args.capacity} frames)...")
+
+    start_cpu = time.process_time()
+    start = time.monotonic()
+    with recorder:
+        try:
+            while not recorder.full:
+                if recorder.poll() is None:
+                    continue
+                if recorder.recorded % STATS_INTERVAL == 0:
+                    elapsed = time.monotonic() - start
+                    cpu = (time.process_time() - start_cpu) / elapsed
+                    print(f"{recorder.recorded} frames, {recorder.skipped} skipped, "
+                          f"{recorder.torn} torn, CPU {cpu:.1%}")
+        except KeyboardInterrupt:
+            pass
+        print(f"Recorded {recorder.recorded} frames "
+              f"({recorder.skipped} skipped, {recorder.torn} torn)")
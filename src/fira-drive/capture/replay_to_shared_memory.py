@@ -0,0 +1,98 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import cv2
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive import trace
+from fira_drive.planes import PLANE_NAMES, PlaneSet
+from fira_drive.ring import FrameRing
+from fira_drive.replay import ORIGINAL, SYNTHETIC, TIMING_MODES, ReplayTimer, open_source
+from fira_drive.metadata import frame_metadata, pack_metadata
+
+
+# Same ring, port and topic as capture_to_shared_memory.py, so every
+# perception step runs unchanged against a recording
+NUM_SLOTS = 4
+STATS_INTERVAL = 300  # Print statistics every N frames
+
+context = zmq.Context()
+socket = context.socket(zmq.PUB)
+socket.bind("tcp://*:5555")
+
+def send_frame_metadata(ring, frame_id, capture_ns):
+    metadata_bytes = pack_metadata(frame_metadata(ring, frame_id, capture_ns))
+    socket.send_multipart([b"cam0_metadata", metadata_bytes])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded frames into shared memory.")
+    parser.add_argument("source", nargs="?", default=SYNTHETIC,
+                        help="video file, image directory, .fira archive or 'synthetic'")
+    parser.add_argument("--timing", choices=TIMING_MODES, default=ORIGINAL,
+                        help="original: recorded timing; fixed: --fps; fast: no waiting")
+    parser.add_argument("--fps", type=float, default=30,
+                        help="rate for fixed timing, and for sources without timestamps")
+    parser.add_argument("--loop", action="store_true", help="start over at the end")
+    parser.add_argument("--width", type=int, default=640, help="synthetic frame width")
+    parser.add_argument("--height", type=int, default=480, help="synthetic frame height")
+    parser.add_argument("--planes", nargs="+", choices=PLANE_NAMES,
+                        help="planes to publish in each slot, as in capture_to_shared_memory.py")
+    args = parser.parse_args()
+
+    def frames():
+        return open_source(args.source, args.width, args.height, args.fps)
+
+    try:
+        source = frames()
+        frame, timestamp_ns = next(source)
+    except (FileNotFoundError, StopIteration):
+        print(f"Error: no frames in {args.source}")
+        exit()
+
+    # The ring takes the geometry of the first frame, like the camera producer
+    planes = None
+    if args.planes:
+        planes = PlaneSet(args.planes, frame.shape, frame.dtype)
+        ring = FrameRing.create('cam0', num_slots=NUM_SLOTS, planes=planes.layout)
+    else:
+        ring = FrameRing.create('cam0', shape=frame.shape, dtype=frame.dtype,
+                                num_slots=NUM_SLOTS)
+    dsize = (frame.shape[1], frame.shape[0])
+    timer = ReplayTimer(args.timing, fps=args.fps)
+
+    published = 0
+    start = time.monotonic()
+    try:
+        while True:
+            timer.wait(timestamp_ns)
+
+            if frame.shape[:2] != (dsize[1], dsize[0]):
+                # Image directories may mix sizes; the ring has one geometry
+                frame = cv2.resize(frame, dsize)
+            with trace.span("ring_write"):
+                frame_id = ring.write(frame) if planes is None else planes.write(ring, frame)
+            with trace.span("notify", frame_id):
+                send_frame_metadata(ring, frame_id, time.monotonic_ns())
+            published += 1
+
+            if published % STATS_INTERVAL == 0:
+                elapsed = time.monotonic() - start
+                print(f"[{args.timing}] {published} frames, {published / elapsed:.1f} fps")
+
+            try:
+                frame, timestamp_ns = next(source)
+            except StopIteration:
+                if not args.loop:
+                    break
+                source = frames()
+                frame, timestamp_ns = next(source)
+                timer.restart()
+    except KeyboardInterrupt:
+        pass
+
+    print(f"Replayed {published} frames")
+    ring.close()
+    ring.unlink()
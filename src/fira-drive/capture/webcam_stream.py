@@ -1,68 +1,51 @@
-import struct
-from multiprocessing.shared_memory import SharedMemory
+import sys
+import argparse
+from pathlib import Path
 
 import cv2
-import numpy as np
-import zmq
 
-# Define the number of slots and frame resolution (must match Publisher exactly)
-NUM_SLOTS = 4
-WIDTH, HEIGHT, CHANNELS = 640, 480, 3 
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.metadata import latency_ms
+
+REPORT_INTERVAL = 100  # Print latency and skipped frames every N frames
+
+def receive_sequence_number_and_display(latest_only=False):
+    # Connect to the existing frame ring and its metadata topic (geometry and
+    # slot count come from the ring header)
+    try:
+        source = FrameSource('cam0', latest_only=latest_only)
+    except FileNotFoundError:
+        print("Error: Shared memory 'cam0' not found. Is the publisher running?")
+        return
+    print("Listening for topic: cam0_metadata...")
+
+    shown = 0
+    total_latency = 0.0
+
+    with source:
+        # Each item is the frame's metadata and a zero-copy view of its slot;
+        # frames overwritten before we got to them are skipped
+        for meta, frame in source:
+            shown += 1
+            total_latency += latency_ms(meta)
+            if shown == REPORT_INTERVAL:
+                print(f"capture-to-display latency {total_latency / shown:.2f} ms, "
+                      f"{source.skipped} frames skipped")
+                shown = 0
+                total_latency = 0.0
+
+            # Display
+            cv2.imshow("Video Stream", frame)
+
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
 
-# ZeroMQ setup (Subscriber)
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-
-# --- UPDATE: Subscribe to a specific topic ---
-TOPIC = b"cam0_metadata"
-socket.setsockopt(zmq.SUBSCRIBE, TOPIC)
-
-# Connect to the existing shared memory
-try:
-    shared_memory_cam0 = SharedMemory(name='cam0', create=False)
-    buff_cam0 = shared_memory_cam0.buf
-except FileNotFoundError:
-    print("Error: Shared memory 'cam0' not found. Is the publisher running?")
-    exit()
-
-def receive_sequence_number_and_display():
-    print(f"Listening for topic: {TOPIC.decode()}...")
-    
-    while True:
-        # ZeroMQ strips the topic for you if you check frames, 
-        # but recv_multipart returns the whole list.
-        parts = socket.recv_multipart()
-        
-        if len(parts) < 2:
-            continue
-
-        topic_received = parts[0]
-        sequence_bytes = parts[1]
-        
-        # Unpack the 4-byte integer
-        sequence_number = struct.unpack('>I', sequence_bytes)[0]
-        
-        # Calculate the slot index (matching the publisher logic)
-        slot_index = (sequence_number // 2) % NUM_SLOTS
-        
-        # Extract the frame from shared memory
-        start = slot_index * BUFFER_SIZE
-        end = start + BUFFER_SIZE
-        
-        # Create a non-copying view of the memory for performance
-        frame_data = np.frombuffer(buff_cam0[start:end], dtype=np.uint8)
-        frame = frame_data.reshape((HEIGHT, WIDTH, CHANNELS))
-
-        # Display
-        cv2.imshow("Video Stream", frame)
-
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
-
-    shared_memory_cam0.close()
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    receive_sequence_number_and_display()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Display frames from shared memory.")
+    parser.add_argument("--latest-only", action="store_true",
+                        help="always show the newest frame, skipping queued ones")
+    args = parser.parse_args()
+    receive_sequence_number_and_display(latest_only=args.latest_only)
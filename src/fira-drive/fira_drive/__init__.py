@@ -0,0 +1,11 @@
+"""Shared building blocks for the FIRA Drive capture and perception scripts.
+
+Submodules are imported on first use so consumers start quickly.
+"""
+
+
+def __getattr__(name):
+    if name == "FrameSource":
+        from .frames import FrameSource
+        return FrameSource
+    raise AttributeError(f"module 'fira_drive' has no attribute '{name}'")
@@ -0,0 +1,168 @@
+"""Raw frame archive: fixed-size frame records in one memory-mapped file.
+
+Layout (all integers little-endian):
+
+    [ header (64 bytes) ][ index: capacity x INDEX_DTYPE ][ frame 0 ][ frame 1 ] ...
+
+The header describes the frame geometry and dtype, the capacity (number of
+preallocated records) and how many of them are filled. Frames start on a
+page boundary and are ``frame_size`` bytes each, so frame ``i`` lives at a
+fixed offset and both the index and the frames are plain ``np.memmap``
+arrays: reading a frame is a zero-copy slice of the mapping.
+
+    archive = FrameArchive.open("lap.fira")
+    for i in range(len(archive)):
+        frame = archive.frames[i]
+        frame_id, capture_ns, _ = archive.index[i]
+"""
+
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b"FIRAARCH"
+VERSION = 1
+
+# magic, version, header_size, width, height, channels, dtype, capacity,
+# count, index_offset, data_offset
+HEADER_FORMAT = "<8sHHIII8sQQQQ"
+HEADER_SIZE = 64
+COUNT_OFFSET = struct.calcsize("<8sHHIII8sQ")
+PAGE_SIZE = 4096
+
+SUFFIX = ".fira"
+
+INDEX_DTYPE = np.dtype([
+    ("frame_id", "<u8"),      # frame id assigned by the producer
+    ("capture_ns", "<i8"),    # producer's time.monotonic_ns() at capture
+    ("record_ns", "<i8"),     # when the frame was written to the archive
+])
+
+
+def _align(value, alignment=PAGE_SIZE):
+    return (value + alignment - 1) // alignment * alignment
+
+
+class FrameArchive:
+    """A preallocated archive file; see the module docstring for the layout.
+
+    Use :meth:`create` to write and :meth:`open` to read. ``frames`` and
+    ``index`` cover every preallocated record; only the first ``len(archive)``
+    are filled.
+    """
+
+    def __init__(self, path, mode="r"):
+        self.path = os.fspath(path)
+        self.mode = mode
+        with open(self.path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        (magic, version, _, width, height, channels, dtype, capacity,
+         count, index_offset, data_offset) = struct.unpack(HEADER_FORMAT, header)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a frame archive")
+        if version != VERSION:
+            raise ValueError(f"Frame archive version {version} is not supported "
+                             f"(expected {VERSION})")
+
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        self.capacity = capacity
+        self.shape = (height, width) if channels == 1 else (height, width, channels)
+
+        self._header = np.memmap(self.path, dtype=np.uint8, mode=mode, shape=(HEADER_SIZE,))
+        self._count = self._header[COUNT_OFFSET:COUNT_OFFSET + 8].view("<u8")
+        self.index = np.memmap(self.path, dtype=INDEX_DTYPE, mode=mode,
+                               offset=index_offset, shape=(capacity,))
+        self.frames = np.memmap(self.path, dtype=self.dtype, mode=mode,
+                                offset=data_offset, shape=(capacity,) + self.shape)
+
+    @classmethod
+    def create(cls, path, shape, dtype=np.uint8, capacity=1000, preallocate=False):
+        """Create (or truncate) an archive with room for ``capacity`` frames.
+
+        With ``preallocate`` the disk blocks are reserved up front, so
+        recording never waits for the filesystem to allocate (or run out of)
+        space mid-lap; otherwise the file is sparse until written.
+        """
+        height, width = shape[:2]
+        channels = shape[2] if len(shape) > 2 else 1
+        dtype = np.dtype(dtype)
+        index_offset = HEADER_SIZE
+        data_offset = _align(index_offset + capacity * INDEX_DTYPE.itemsize)
+        frame_size = height * width * channels * dtype.itemsize
+        size = data_offset + capacity * frame_size
+
+        with open(path, "wb") as f:
+            f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, HEADER_SIZE, width, height,
+                                channels, dtype.str.encode(), capacity, 0,
+                                index_offset, data_offset))
+            f.truncate(size)
+            if preallocate and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, size)
+        return cls(path, mode="r+")
+
+    @classmethod
+    def open(cls, path, writable=False):
+        return cls(path, mode="r+" if writable else "r")
+
+    def __len__(self):
+        """Number of frames written so far."""
+        return int(self._count[0])
+
+    def append(self, frame, frame_id, capture_ns, record_ns=0):
+        """Copy ``frame`` into the next record. Returns its position, or None if full."""
+        count = len(self)
+        if count >= self.capacity:
+            return None
+        np.copyto(self.frames[count], frame.reshape(self.shape), casting="no")
+        self.index[count] = (frame_id, capture_ns, record_ns)
+        # Publish the record only once it is complete
+        self._count[0] = count + 1
+        return count
+
+    def append_from_ring(self, ring, frame_id, capture_ns, record_ns=0):
+        """Copy ``frame_id`` straight from a frame ring into the next record.
+
+        The pixels are copied once, from shared memory into the file
+        mapping. Returns the record's position, or None if the archive is
+        full or the frame was overwritten in the ring during the copy.
+        """
+        count = len(self)
+        if count >= self.capacity:
+            return None
+        if ring.read(frame_id, out=self.frames[count]) is None:
+            return None
+        self.index[count] = (frame_id, capture_ns, record_ns)
+        self._count[0] = count + 1
+        return count
+
+    def flush(self):
+        if self.mode != "r":
+            self._header.flush()
+            self.index.flush()
+            self.frames.flush()
+
+    def close(self, trim=False):
+        """Flush and unmap. ``trim`` shrinks the file to the records written."""
+        self.flush()
+        count = len(self)
+        data_offset = self.frames.offset
+        frame_size = self.frames[0].nbytes if self.capacity else 0
+        if trim and self.mode != "r" and count < self.capacity:
+            # Later readers see only the written records
+            self._header[COUNT_OFFSET - 8:COUNT_OFFSET].view("<u8")[0] = count
+            self._header.flush()
+        # np.memmap unmaps when the last reference goes away
+        self._header = self._count = self.index = self.frames = None
+        if trim and self.mode != "r" and count < self.capacity:
+            os.truncate(self.path, data_offset + count * frame_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,54 @@
+"""Preallocated per-stage output buffers.
+
+Perception stages pass these to OpenCV as ``dst=`` so that, once the first
+frame of a given geometry has been processed, no full-size array is
+allocated per frame. A buffer returned from the pool is overwritten the next
+time the same stage runs.
+"""
+
+import numpy as np
+
+
+class BufferPool:
+    """Named arrays, reallocated only when the requested geometry changes."""
+
+    def __init__(self):
+        self._buffers = {}
+        # Number of arrays the pool had to (re)allocate; stays constant in
+        # steady state
+        self.allocations = 0
+
+    def array(self, name, shape, dtype=np.uint8, init=None):
+        """Return the buffer ``name`` with the given shape and dtype.
+
+        ``init(buffer)`` is called only when the buffer is (re)allocated, so
+        constant contents such as masks are filled in once per geometry.
+        """
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+            self.allocations += 1
+            if init is not None:
+                init(buffer)
+        return buffer
+
+    def get(self, key):
+        return self._buffers.get(key)
+
+    def put(self, key, buffer):
+        if self._buffers.get(key) is not buffer:
+            self._buffers[key] = buffer
+            self.allocations += 1
+
+    def clear(self):
+        self._buffers.clear()
+
+    def __len__(self):
+        return len(self._buffers)
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
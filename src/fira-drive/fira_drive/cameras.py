@@ -0,0 +1,280 @@
+"""Several cameras in one capture process.
+
+Each camera gets its own capture thread and its own frame ring, named after
+the camera, and announces frames on its own topic (``f"{name}_metadata"``,
+statistics on ``f"{name}_stats"``) of one shared PUB socket. ``cap.read``
+releases the GIL while it waits for and decodes a frame, so a slow or
+stalled camera does not hold the others back; the only shared step is
+sending the ~40-byte notification, done under a lock because ZeroMQ
+sockets must not be used from two threads at once.
+
+Cameras are described in ``fira-drive.toml`` (see :mod:`fira_drive.config`):
+
+    [tool.fira-drive.capture]
+    endpoint = "tcp://*:5555"
+    slots = 4
+
+    [[tool.fira-drive.cameras]]
+    name = "cam0"
+    device = 0          # camera index, or a video file / stream URL
+    fps = 0             # 0 runs free, otherwise paced (see CaptureScheduler)
+    width = 640         # optional, requested from the driver
+    height = 480
+    mode = "zero-copy"  # or "copy"
+    keep_stale = false  # publish every frame instead of only the newest
+    planes = ["frame", "gray"]  # optional, see fira_drive.planes
+
+Live cameras are drained by a :class:`~fira_drive.capture.FrameGrabber`,
+so a paced or slow camera thread publishes the newest frame rather than
+one that waited in the driver queue.
+
+Consumers read a single camera with ``FrameSource(name)`` as before, or
+synchronised views of several with :class:`~fira_drive.sync.SyncedFrameSource`.
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+import cv2
+import zmq
+
+from . import trace
+from .capture import CAPTURE_MODES, ZERO_COPY, CopyStats, FrameGrabber, capture_into_ring
+from .metadata import frame_metadata, pack_metadata
+from .planes import PLANE_NAMES, PlaneSet
+from .ring import FrameRing
+from .scheduler import CaptureScheduler
+
+
+DEFAULT_ENDPOINT = "tcp://*:5555"
+NUM_SLOTS = 4
+STATS_INTERVAL = 300  # Publish statistics every N frames
+
+CameraConfig = namedtuple("CameraConfig",
+                          "name device fps width height mode keep_stale planes")
+CameraConfig.__new__.__defaults__ = (0, None, None, ZERO_COPY, False, None)
+REQUIRED_SETTINGS = ("name", "device")
+
+
+def camera_configs(config):
+    """The :class:`CameraConfig` list from a loaded ``[tool.fira-drive]`` table.
+
+    Without a ``cameras`` array this is the single default camera ``cam0``
+    on device 0, which is what capture_to_shared_memory.py publishes.
+    """
+    entries = config.get("cameras") or [{"name": "cam0", "device": 0}]
+    cameras = []
+    for index, entry in enumerate(entries):
+        where = f"cameras[{index}]"
+        if not isinstance(entry, dict):
+            raise ValueError(f"{where} must be a table, not {entry!r}")
+        unknown = set(entry) - set(CameraConfig._fields)
+        if unknown:
+            raise ValueError(f"{where}: unknown camera settings: {', '.join(sorted(unknown))}")
+        missing = [key for key in REQUIRED_SETTINGS if key not in entry]
+        if missing:
+            raise ValueError(f"{where}: missing {', '.join(missing)}")
+        camera = CameraConfig(**entry)
+        if camera.mode not in CAPTURE_MODES:
+            raise ValueError(f"{camera.name}: mode must be one of {CAPTURE_MODES}")
+        unknown = set(camera.planes or ()) - set(PLANE_NAMES)
+        if unknown:
+            raise ValueError(f"{camera.name}: unknown planes {', '.join(sorted(unknown))}")
+        cameras.append(camera)
+    names = [camera.name for camera in cameras]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Camera names must be unique: {names}")
+    return cameras
+
+
+class Notifier:
+    """One PUB socket shared by the capture threads."""
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, context=None):
+        self.context = context or zmq.Context.instance()
+        self.socket = self.context.socket(zmq.PUB)
+        self.socket.bind(endpoint)
+        self._lock = threading.Lock()
+
+    def send(self, topic, payload):
+        with self._lock:
+            self.socket.send_multipart([topic, payload])
+
+    def close(self):
+        self.socket.close(linger=0)
+
+
+class CameraThread(threading.Thread):
+    """Captures one camera into its ring and announces every frame.
+
+    The ring is created from the first frame's geometry and unlinked when
+    the thread ends. The thread ends when a video file runs out of frames,
+    or with ``error`` set when a live camera stops delivering them.
+    """
+
+    def __init__(self, camera, notifier, num_slots=NUM_SLOTS):
+        super().__init__(name=f"capture-{camera.name}", daemon=True)
+        self.camera = camera
+        self.notifier = notifier
+        self.num_slots = num_slots
+        self.metadata_topic = f"{camera.name}_metadata".encode()
+        self.stats_topic = f"{camera.name}_stats".encode()
+        self.stats = CopyStats()
+        self.scheduler = CaptureScheduler(target_fps=camera.fps)
+        self.ring = None
+        self.planes = None
+        self.error = None
+        self._stopping = threading.Event()
+        self._ready = threading.Event()
+
+    def open(self):
+        device = self.camera.device
+        cap = cv2.VideoCapture(device)
+        if self.camera.width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.camera.width)
+        if self.camera.height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.camera.height)
+        if not cap.isOpened():
+            raise RuntimeError(f"{self.camera.name}: could not open {device!r}")
+        ret, frame = cap.read()
+        if not ret:
+            raise RuntimeError(f"{self.camera.name}: could not read a frame from {device!r}")
+        if self.camera.planes:
+            self.planes = PlaneSet(self.camera.planes, frame.shape, frame.dtype)
+            self.ring = FrameRing.create(self.camera.name, num_slots=self.num_slots,
+                                         planes=self.planes.layout)
+        else:
+            self.ring = FrameRing.create(self.camera.name, shape=frame.shape,
+                                         dtype=frame.dtype, num_slots=self.num_slots)
+        return cap
+
+    @property
+    def live(self):
+        """True for a camera index, False for a file or stream."""
+        return isinstance(self.camera.device, int)
+
+    def wait_ready(self, timeout=None):
+        """Block until the ring exists (or opening failed, see ``error``)."""
+        return self._ready.wait(timeout)
+
+    def stop(self):
+        self._stopping.set()
+
+    def run(self):
+        try:
+            cap = self.open()
+        except Exception as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        grabber = FrameGrabber(cap, self.camera.keep_stale).start() if self.live else None
+        try:
+            self._capture(cap, grabber)
+        finally:
+            if grabber is not None:
+                grabber.stop()
+            cap.release()
+            self.ring.close()
+            self.ring.unlink()
+
+    def _capture(self, cap, grabber):
+        name = self.camera.name
+        while not self._stopping.is_set():
+            self.scheduler.wait()
+
+            start_ns = time.monotonic_ns()
+            grab_ns = None
+            if grabber is None:
+                frame_id = capture_into_ring(cap, self.ring, mode=self.camera.mode,
+                                             stats=self.stats, planes=self.planes)
+            else:
+                # Time out now and then to notice stop()
+                frame_id, grab_ns = grabber.retrieve_into_ring(self.ring, mode=self.camera.mode,
+                                                               stats=self.stats, timeout=0.5,
+                                                               planes=self.planes)
+                if frame_id is None and grabber.failed:
+                    self.error = RuntimeError(f"{name}: the camera stopped delivering frames")
+                    break
+            if frame_id is None:
+                if not self.live:
+                    break
+                self.scheduler.frame_dropped()
+                continue
+            decoded_ns = time.monotonic_ns()
+            trace.record(f"{name}_capture", start_ns, decoded_ns, frame_id)
+            self.scheduler.frame_done()
+
+            # Grab time when there is a grab thread, as in capture_to_shared_memory.py
+            capture_ns = grab_ns if grab_ns is not None else decoded_ns
+            with trace.span(f"{name}_notify", frame_id):
+                self.notifier.send(self.metadata_topic,
+                                   pack_metadata(frame_metadata(self.ring, frame_id, capture_ns)))
+
+            if self.stats.frames == STATS_INTERVAL:
+                print(f"[{name}] {self.stats}, dropped={self.scheduler.dropped}, "
+                      f"overruns={self.scheduler.overruns}")
+                self.notifier.send(self.stats_topic, self.scheduler.pack_stats())
+                self.stats.reset()
+
+
+class CaptureDaemon:
+    """Runs a :class:`CameraThread` per camera behind one :class:`Notifier`."""
+
+    def __init__(self, cameras, endpoint=DEFAULT_ENDPOINT, num_slots=NUM_SLOTS,
+                 context=None):
+        self.notifier = Notifier(endpoint, context)
+        self.threads = [CameraThread(camera, self.notifier, num_slots)
+                        for camera in cameras]
+
+    @classmethod
+    def from_config(cls, config, names=None, context=None):
+        """Build the daemon from a loaded ``[tool.fira-drive]`` table.
+
+        ``names`` restricts it to some of the configured cameras.
+        """
+        cameras = camera_configs(config)
+        if names:
+            missing = set(names) - {camera.name for camera in cameras}
+            if missing:
+                raise ValueError(f"Cameras not configured: {', '.join(sorted(missing))}")
+            cameras = [camera for camera in cameras if camera.name in names]
+        capture = config.get("capture", {})
+        return cls(cameras, endpoint=capture.get("endpoint", DEFAULT_ENDPOINT),
+                   num_slots=capture.get("slots", NUM_SLOTS), context=context)
+
+    def start(self, timeout=5.0):
+        """Start every camera; return the ones that failed to open.
+
+        The others keep running, so one unplugged camera does not take the
+        rest down. The cameras open in parallel and all of them get the
+        same ``timeout``.
+        """
+        for thread in self.threads:
+            thread.start()
+        deadline = time.monotonic() + timeout
+        failed = []
+        for thread in self.threads:
+            thread.wait_ready(max(deadline - time.monotonic(), 0))
+            if thread.error is not None:
+                failed.append(thread)
+        return failed
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+    def stop(self):
+        for thread in self.threads:
+            thread.stop()
+        for thread in self.threads:
+            if thread.is_alive():
+                thread.join()
+        self.notifier.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,201 @@
+"""Helpers for moving camera frames into a :class:`~fira_drive.ring.FrameRing`."""
+
+import threading
+import time
+
+import numpy as np
+
+
+ZERO_COPY = "zero-copy"
+COPY = "copy"
+CAPTURE_MODES = (ZERO_COPY, COPY)
+
+
+class CopyStats:
+    """Counts the full-frame copies the producer makes after decoding.
+
+    The decoder writing the frame is not counted; in zero-copy mode that write
+    lands directly in the shared-memory slot, so the hot path should report
+    zero copies per frame.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.copies = 0
+        self.bytes_copied = 0
+
+    def add_copy(self, nbytes):
+        self.copies += 1
+        self.bytes_copied += nbytes
+
+    def copies_per_frame(self):
+        return self.copies / self.frames if self.frames else 0.0
+
+    def bytes_per_frame(self):
+        return self.bytes_copied / self.frames if self.frames else 0.0
+
+    def reset(self):
+        self.frames = self.copies = self.bytes_copied = 0
+
+    def __str__(self):
+        return (f"{self.frames} frames, {self.copies_per_frame():.2f} copies/frame, "
+                f"{self.bytes_per_frame() / 1024:.1f} KiB copied/frame")
+
+
+def capture_into_ring(cap, ring, mode=ZERO_COPY, stats=None, planes=None):
+    """Read one frame from ``cap`` into the next ring slot.
+
+    In zero-copy mode the slot itself is handed to ``cap.read(image=...)`` so
+    the decoder writes straight into shared memory. If the decoder had to
+    allocate anyway (geometry or dtype mismatch) the frame is copied and the
+    copy is counted. Returns the committed frame id, or None if the read failed.
+
+    A failed read leaves the slot marked busy, so readers never see its
+    half-written contents; the next call reuses the same frame id.
+
+    With a :class:`~fira_drive.planes.PlaneSet` the derived planes are
+    computed into the slot before it is committed.
+    """
+    return _decode_into_ring(cap.read, ring, mode, stats, planes)
+
+
+def _decode_into_ring(read, ring, mode, stats, planes=None):
+    # read is cap.read or cap.retrieve; both take image= and return (ret, image)
+    frame_id, view = ring.begin_write()
+    if planes is not None:
+        view = planes.capture_target(ring, frame_id)
+
+    if mode == ZERO_COPY:
+        ret, image = read(image=view)
+        if not ret:
+            return None
+        if image is not view and not np.may_share_memory(image, view):
+            np.copyto(view, image.reshape(view.shape))
+            if stats is not None:
+                stats.add_copy(view.nbytes)
+    else:
+        ret, image = read()
+        if not ret:
+            return None
+        np.copyto(view, image.reshape(view.shape))
+        if stats is not None:
+            stats.add_copy(view.nbytes)
+
+    if planes is not None:
+        planes.derive(ring, frame_id, view)
+    ring.commit(frame_id)
+    if stats is not None:
+        stats.frames += 1
+    return frame_id
+
+
+class FrameGrabber:
+    """Keeps a camera drained on a thread of its own.
+
+    ``cap.read()`` is ``cap.grab()`` (take the next buffer from the driver)
+    followed by ``cap.retrieve()`` (decode it). A loop that reads, copies
+    and publishes, or sleeps to keep a target FPS, stops taking buffers in
+    the meantime; the driver queues frames up and every read then returns
+    an old one. The grabber calls ``grab()`` continuously, so the driver
+    queue stays empty, and :meth:`retrieve_into_ring` decodes only the
+    newest grabbed frame. Frames grabbed but replaced before they were
+    decoded are counted in ``stale``.
+
+    With ``keep_stale=True`` the grabber waits for each grabbed frame to be
+    retrieved before grabbing the next, so every frame is published, in
+    order, as with ``cap.read()``; decoding still overlaps the next grab.
+
+    Only use it with live cameras: a video file has no driver queue, and
+    the grab thread would race through it.
+    """
+
+    def __init__(self, cap, keep_stale=False):
+        self.cap = cap
+        self.keep_stale = keep_stale
+        self.grabbed = 0
+        self.retrieved = 0
+        self.stale = 0
+        self.failed = False
+        self.grab_ns = None  # time.monotonic_ns() of the newest grab
+        # _cap_lock serialises grab() and retrieve(), which must not overlap;
+        # _cond guards the state shared with the grab thread
+        self._cap_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._pending = False
+        self._waiting = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="grab", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # grab() blocks until the driver has a frame, holding the
+                # capture lock; hand a waiting consumer the frame first
+                while (self._pending and (self.keep_stale or self._waiting)
+                       and not self._stopping):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+            with self._cap_lock:
+                ok = self.cap.grab()
+            with self._cond:
+                if not ok:
+                    self.failed = True
+                    self._cond.notify_all()
+                    return
+                if self._pending:
+                    self.stale += 1
+                self._pending = True
+                self.grab_ns = time.monotonic_ns()
+                self.grabbed += 1
+                self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """Block until a grabbed frame is waiting. False on timeout or failure."""
+        with self._cond:
+            self._waiting = True
+            self._cond.wait_for(lambda: self._pending or self.failed, timeout)
+            if not self._pending:
+                self._waiting = False
+            return self._pending
+
+    def retrieve_into_ring(self, ring, mode=ZERO_COPY, stats=None, timeout=None,
+                           planes=None):
+        """Decode the newest grabbed frame into the next ring slot.
+
+        Waits up to ``timeout`` seconds for a frame. Returns
+        ``(frame_id, grab_ns)``, or ``(None, None)`` on timeout or failure;
+        check ``failed`` to tell them apart.
+        """
+        if not self.wait(timeout):
+            return None, None
+        # Holding the capture lock, no new grab can slip in between taking
+        # the pending frame and decoding it
+        with self._cap_lock:
+            with self._cond:
+                self._pending = False
+                self._waiting = False
+                grab_ns = self.grab_ns
+                self._cond.notify_all()
+            frame_id = _decode_into_ring(self.cap.retrieve, ring, mode, stats, planes)
+        if frame_id is None:
+            return None, None
+        self.retrieved += 1
+        return frame_id, grab_ns
+
+    def stop(self):
+        """Stop grabbing. A grab blocked in the driver is abandoned (daemon thread)."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
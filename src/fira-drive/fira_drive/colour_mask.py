@@ -0,0 +1,124 @@
+"""Lane paint mask straight from BGR through a precomputed colour table.
+
+Picking white and yellow paint takes a chain of full-frame passes:
+
+    hsv = cvtColor(frame, BGR2HSV)          gray = cvtColor(frame, BGR2GRAY)
+    white = inRange(hsv, ...) & (gray >= 200)
+    yellow = inRange(hsv, ...)
+    mask = white | yellow
+
+Every one of those only looks at one pixel's colour, so the whole chain is
+a function of the 24-bit BGR value. :class:`ColourMask` evaluates it once
+for every colour (through the same OpenCV conversions, so the result is
+identical) into a 16 MiB table, and each frame is then one gather:
+
+    mask = ColourMask()(frame)         # uint8, 255 on lane paint
+
+The frame is padded to BGRA (one cheap pass), and its 32-bit pixels with
+the alpha byte cleared are the table indices. ``bits`` below 8 evaluates
+the rules on a coarser colour grid (2**(3 * bits) colours) for a faster
+build; the per-frame cost is the same. The table is only rebuilt when the
+rules change (:meth:`ColourMask.set_rules`).
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from .buffers import BufferPool
+
+
+# A colour of lane paint: an HSV box (OpenCV scale, H 0..179) and a
+# minimum gray level
+ColourRule = namedtuple("ColourRule", "lower upper min_gray")
+
+LANE_RULES = (
+    # White: unsaturated and bright; 200 is the threshold of 06_morphological_ops
+    ColourRule((0, 0, 0), (179, 40, 255), 200),
+    # Yellow
+    ColourRule((15, 80, 120), (35, 255, 255), 0),
+)
+
+
+def normalize_rules(rules):
+    """``rules`` as hashable :class:`ColourRule` tuples of ints."""
+    return tuple(ColourRule(tuple(int(v) for v in rule[0]), tuple(int(v) for v in rule[1]),
+                            int(rule[2]))
+                 for rule in rules)
+
+
+def chain_mask(frame, rules=LANE_RULES, dst=None, pool=None):
+    """The rules applied with cvtColor + inRange + threshold + bitwise ops.
+
+    With a :class:`~fira_drive.buffers.BufferPool` the intermediate images
+    are reused between calls.
+    """
+    plane = frame.shape[:2]
+    pool = pool or BufferPool()
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=pool.array("hsv", frame.shape))
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.array("gray", plane))
+    part = pool.array("part", plane)
+    bright = pool.array("bright", plane)
+    mask = np.empty(plane, np.uint8) if dst is None else dst
+    mask[:] = 0
+    for lower, upper, min_gray in rules:
+        cv2.inRange(hsv, lower, upper, dst=part)
+        if min_gray > 0:
+            cv2.threshold(gray, min_gray - 1, 255, cv2.THRESH_BINARY, dst=bright)
+            cv2.bitwise_and(part, bright, dst=part)
+        cv2.bitwise_or(mask, part, dst=mask)
+    return mask
+
+
+class ColourMask:
+    """BGR frame -> lane mask through a 24-bit lookup table."""
+
+    def __init__(self, rules=LANE_RULES, bits=8):
+        self.bits = bits
+        self.rules = None
+        self.table = None
+        self.builds = 0
+        self._bgra = None
+        self._index = None
+        self.set_rules(rules)
+
+    def set_rules(self, rules):
+        """Use ``rules``; the table is rebuilt only if they differ. Returns True if rebuilt."""
+        rules = normalize_rules(rules)
+        if rules == self.rules:
+            return False
+        self.rules = rules
+        self.table = self.build_table(rules, self.bits)
+        self.builds += 1
+        return True
+
+    @staticmethod
+    def build_table(rules, bits=8):
+        """Mask value for every 32-bit index ``b | g << 8 | r << 16``."""
+        levels = 1 << bits
+        cell = 256 >> bits
+        # Cell centres of the colour grid, as an image OpenCV can convert
+        values = (np.arange(levels) * cell + cell // 2).astype(np.uint8)
+        r, g, b = np.meshgrid(values, values, values, indexing="ij")
+        colours = np.stack([b, g, r], axis=-1).reshape(levels * levels, levels, 3)
+        small = chain_mask(colours, rules).reshape(levels, levels, levels)
+        # Every colour in a cell gets the cell's value
+        table = np.empty((levels, cell, levels, cell, levels, cell), np.uint8)
+        table[:] = small[:, None, :, None, :, None]
+        return table.reshape(-1)
+
+    def __call__(self, frame, dst=None):
+        height, width = frame.shape[:2]
+        if self._bgra is None or self._bgra.shape[:2] != (height, width):
+            self._bgra = np.empty((height, width, 4), np.uint8)
+            # np.take would convert 32-bit indices to a fresh intp array on
+            # every call; masking straight into this buffer avoids that
+            self._index = np.empty((height, width), np.intp)
+        bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=self._bgra)
+        index = np.bitwise_and(bgra.view("<u4").reshape(height, width), 0xFFFFFF,
+                               out=self._index)
+        if dst is None:
+            dst = np.empty((height, width), np.uint8)
+        # mode="clip" skips the bounds check; the indices are < 2**24
+        return np.take(self.table, index, out=dst, mode="clip")
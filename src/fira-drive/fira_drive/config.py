@@ -0,0 +1,57 @@
+"""Settings from ``fira-drive.toml``.
+
+The file is the project's pyproject-style manifest; FIRA Drive settings
+live under ``[tool.fira-drive]``:
+
+    [tool.fira-drive.capture]
+    endpoint = "tcp://*:5555"
+
+    [[tool.fira-drive.cameras]]
+    name = "cam0"
+    device = 0
+
+The file is found through the ``FIRA_DRIVE_CONFIG`` environment variable,
+or by looking for ``fira-drive.toml`` in the working directory, the
+directories above it and the directories above this package.
+"""
+
+import os
+from pathlib import Path
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python 3.10
+    import tomli as tomllib
+
+
+CONFIG_NAME = "fira-drive.toml"
+CONFIG_ENV = "FIRA_DRIVE_CONFIG"
+SECTION = "fira-drive"
+
+
+def find_config():
+    """Path of the configuration file, or None if there is none."""
+    path = os.environ.get(CONFIG_ENV)
+    if path:
+        return Path(path)
+    for start in (Path.cwd(), Path(__file__).resolve().parent):
+        for directory in (start, *start.parents):
+            candidate = directory / CONFIG_NAME
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def load_config(path=None):
+    """The ``[tool.fira-drive]`` table of the configuration file as a dict.
+
+    Returns an empty dict if no file is found; raises FileNotFoundError if
+    an explicitly given ``path`` does not exist.
+    """
+    if path is None:
+        path = find_config()
+        if path is None:
+            return {}
+    with open(path, "rb") as f:
+        document = tomllib.load(f)
+    return document.get("tool", {}).get(SECTION, {})
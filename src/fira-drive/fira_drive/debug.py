@@ -0,0 +1,127 @@
+"""Debug images for an optional viewer process, off the perception hot path.
+
+Perception steps run headless. Instead of ``cv2.imshow`` they hand images to
+a :class:`DebugPublisher`, which copies an image into a small frame ring of
+its own at most ``max_hz`` times per second and otherwise returns at once;
+nothing is drawn, encoded or displayed in the perception process.
+``capture/debug_viewer.py`` attaches to those rings from another process,
+shows them and/or publishes them as JPEG.
+
+Each publisher has its own prefix, by default the script name and process
+id under ``cam0_debug``, and each image name gets a ring called
+``f"{prefix}__{name}"``, e.g. ``cam0_debug_07_canny_edges_4242__edges``.
+Two scripts publishing the same image name therefore never share a ring;
+the viewer finds all of them by the common ``cam0_debug`` prefix.
+"""
+
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from . import trace
+from .ring import FrameRing
+
+
+DEFAULT_PREFIX = "cam0_debug"
+DEFAULT_HZ = 5.0
+DEBUG_SLOTS = 2
+
+SHM_DIR = "/dev/shm"
+
+
+def _slug(name):
+    # Runs of other characters become one "_", so a slug never contains "__"
+    return re.sub(r'[^0-9A-Za-z]+', '_', name).strip('_').lower()
+
+
+def publisher_prefix(base=DEFAULT_PREFIX):
+    """Prefix unique to this process: ``base``, the script name and the pid."""
+    script = _slug(Path(sys.argv[0]).stem) if sys.argv and sys.argv[0] else "python"
+    return f"{base}_{script or 'python'}_{os.getpid()}"
+
+
+def ring_name(prefix, name):
+    """Shared-memory name for the debug image ``name`` of the publisher ``prefix``."""
+    return f"{prefix}__{_slug(name)}"
+
+
+def image_name(ring):
+    """The debug image name a ring was created for."""
+    return ring.rpartition("__")[2]
+
+
+def find_debug_rings(prefix=DEFAULT_PREFIX, names=None):
+    """Names of the debug rings that currently exist (Linux only).
+
+    ``prefix`` matches every publisher under it; ``names`` keeps only the
+    rings of those debug images.
+    """
+    try:
+        entries = os.listdir(SHM_DIR)
+    except FileNotFoundError:
+        return []
+    wanted = {_slug(name) for name in names} if names else None
+    return sorted(entry for entry in entries
+                  if entry.startswith(prefix + "_") and "__" in entry
+                  and (wanted is None or image_name(entry) in wanted))
+
+
+class DebugPublisher:
+    """Rate-limited writer of named debug images into shared-memory rings.
+
+    Call :meth:`wants` before drawing an overlay, so the drawing is skipped
+    on the frames that would not be published anyway. The rings belong to
+    this publisher and are unlinked by :meth:`close`. ``prefix`` defaults to
+    :func:`publisher_prefix`.
+    """
+
+    def __init__(self, prefix=None, max_hz=DEFAULT_HZ, enabled=True,
+                 clock=time.monotonic):
+        self.prefix = prefix or publisher_prefix()
+        self.interval = 1.0 / max_hz if max_hz else 0.0
+        self.enabled = enabled
+        self.clock = clock
+        self._rings = {}
+        self._last = {}
+
+    def wants(self, name):
+        """True if an image for ``name`` would be published right now."""
+        if not self.enabled:
+            return False
+        last = self._last.get(name)
+        return last is None or self.clock() - last >= self.interval
+
+    def show(self, name, image):
+        """Publish ``image`` as ``name`` if its rate limit allows it."""
+        if not self.wants(name):
+            return False
+        with trace.span("debug_show"):
+            self._write(name, image)
+        self._last[name] = self.clock()
+        return True
+
+    def _write(self, name, image):
+        ring = self._rings.get(name)
+        if ring is None or ring.shape != image.shape or ring.dtype != image.dtype:
+            if ring is not None:
+                # The viewer re-attaches by name, so a new geometry just replaces the ring
+                ring.close()
+                ring.unlink()
+            ring = FrameRing.create(ring_name(self.prefix, name), shape=image.shape,
+                                    dtype=image.dtype, num_slots=DEBUG_SLOTS)
+            self._rings[name] = ring
+        ring.write(image)
+
+    def close(self):
+        for ring in self._rings.values():
+            ring.close()
+            ring.unlink()
+        self._rings.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,114 @@
+"""FrameSource: the one way perception steps get frames from the camera.
+
+    from fira_drive.frames import FrameSource
+
+    def grayscale(frame):
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    with FrameSource('cam0') as source:
+        for meta, gray in source.map(grayscale):
+            ...
+
+Importing this module is cheap: NumPy and ZeroMQ are only imported, and
+the socket only created, when a FrameSource is constructed.
+"""
+
+import time
+
+DEFAULT_ENDPOINT = "tcp://localhost:5555"
+
+
+class FrameSource:
+    """Iterates over ``(meta, frame)`` pairs published by the capture process.
+
+    ``frame`` is a zero-copy view of the ring slot, valid until the producer
+    comes around to that slot again. Use :meth:`map` to run a step
+    ``f(frame) -> result`` and get only results whose input was not
+    overwritten while the step ran, or pass ``copy=True`` to get a private
+    copy of each frame instead.
+
+    ``latest_only`` (the default) skips queued frames so a slow step always
+    works on the newest one; see :class:`~fira_drive.subscriber.FrameSubscriber`.
+    ``plane`` picks a plane the producer derived for every frame, e.g.
+    ``"gray"``, instead of the primary one (see :mod:`fira_drive.planes`).
+    Raises FileNotFoundError if the producer has not created the ring yet,
+    and KeyError if it does not publish ``plane``.
+    """
+
+    def __init__(self, name="cam0", endpoint=DEFAULT_ENDPOINT, topic=None,
+                 latest_only=True, copy=False, plane=None):
+        from .ring import FrameRing
+        from .subscriber import FrameSubscriber
+
+        if topic is None:
+            topic = f"{name}_metadata".encode()
+        self.ring = FrameRing.attach(name)
+        self.plane = plane
+        if plane is not None and plane not in self.ring.planes:
+            self.ring.close()
+            raise KeyError(f"Ring '{name}' has no plane '{plane}' "
+                           f"(planes: {', '.join(self.ring.planes)})")
+        self.subscriber = FrameSubscriber(self.ring, endpoint, topic,
+                                          latest_only=latest_only, plane=plane)
+        self._out = self.ring.empty_frame(plane) if copy else None
+
+    @property
+    def shape(self):
+        if self.plane is None:
+            return self.ring.shape
+        return self.ring.planes[self.plane].shape
+
+    @property
+    def skipped(self):
+        """Frames published but never handed to the consumer."""
+        return self.subscriber.skipped
+
+    def next(self, timeout_ms=None):
+        """Return the next ``(meta, frame)``, or ``(None, None)`` on timeout."""
+        if self._out is not None:
+            return self.subscriber.recv(out=self._out, timeout_ms=timeout_ms)
+        while True:
+            meta = self.subscriber.recv_metadata(timeout_ms)
+            if meta is None:
+                return None, None
+            if self.ring.is_valid(meta.frame_id):
+                return meta, self.ring.view(meta.frame_id, self.plane)
+            self.subscriber.skipped += 1
+
+    def __iter__(self):
+        while True:
+            yield self.next()
+
+    def is_valid(self, meta):
+        """True if the frame described by ``meta`` has not been overwritten yet."""
+        return self.ring.is_valid(meta.frame_id)
+
+    def map(self, step):
+        """Yield ``(meta, step(frame))`` for frames that stayed intact during ``step``.
+
+        With tracing enabled (see :mod:`fira_drive.trace`) the step and the
+        capture-to-result latency are recorded for every frame.
+        """
+        from . import trace
+
+        name = getattr(step, "__name__", "step")
+        for meta, frame in self:
+            with trace.span(name, meta.frame_id):
+                result = step(frame)
+            if self._out is not None or self.is_valid(meta):
+                trace.record("capture_to_result", meta.capture_ns, time.monotonic_ns(),
+                             meta.frame_id)
+                yield meta, result
+            else:
+                self.subscriber.skipped += 1
+
+    def close(self):
+        self.subscriber.close()
+        # Only detach: the segment belongs to the producer, which unlinks it
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
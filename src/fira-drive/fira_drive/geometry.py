@@ -0,0 +1,178 @@
+"""ROI masks and warp maps cached per camera geometry.
+
+A mask or a bird's-eye warp only depends on the resolution and the
+calibration points, so it is built once and reused for every frame. The
+perspective warp is turned into fixed-point ``cv2.remap`` tables, which
+avoids ``cv2.warpPerspective`` recomputing the inverse mapping for every
+pixel of every frame.
+
+Entries are keyed on (resolution, points): asking for the same name with
+different points (a calibration change) rebuilds that entry.
+
+:class:`Roi` describes the part of the frame worth processing at all;
+:data:`ROAD_ROI` is the road.
+"""
+
+import cv2
+import numpy as np
+
+
+def perspective_maps(matrix, dsize, fixed_point=True):
+    """Remap tables equivalent to ``cv2.warpPerspective(src, matrix, dsize)``.
+
+    Returns ``(map1, map2)`` for ``cv2.remap``. With ``fixed_point`` the maps
+    are converted to the compact CV_16SC2 form, which remaps faster than
+    float maps.
+    """
+    width, height = dsize
+    xs, ys = np.meshgrid(np.arange(width, dtype=np.float64),
+                         np.arange(height, dtype=np.float64))
+    # warpPerspective maps destination pixels back through the inverse matrix
+    inverse = np.linalg.inv(matrix)
+    denom = inverse[2, 0] * xs + inverse[2, 1] * ys + inverse[2, 2]
+    map_x = ((inverse[0, 0] * xs + inverse[0, 1] * ys + inverse[0, 2]) / denom).astype(np.float32)
+    map_y = ((inverse[1, 0] * xs + inverse[1, 1] * ys + inverse[1, 2]) / denom).astype(np.float32)
+    if fixed_point:
+        return cv2.convertMaps(map_x, map_y, cv2.CV_16SC2)
+    return map_x, map_y
+
+
+def source_index(matrix, dsize, src_size):
+    """Flat source-pixel index of every warped pixel (nearest neighbour).
+
+    ``index[y, x]`` is ``sy * src_width + sx`` for the source pixel that
+    ``cv2.warpPerspective(src, matrix, dsize)`` would put at ``(x, y)``,
+    or -1 where that falls outside the source. Lets a caller sample a few
+    warped pixels straight from the source frame without warping it all.
+    """
+    map_x, map_y = perspective_maps(matrix, dsize, fixed_point=False)
+    src_width, src_height = src_size
+    sx = np.rint(map_x).astype(np.int32)
+    sy = np.rint(map_y).astype(np.int32)
+    inside = (sx >= 0) & (sx < src_width) & (sy >= 0) & (sy < src_height)
+    return np.where(inside, sy * src_width + sx, -1).astype(np.int32)
+
+
+def remap(src, maps, dst=None):
+    """Apply maps from :func:`perspective_maps` (bilinear, black border)."""
+    return cv2.remap(src, maps[0], maps[1], cv2.INTER_LINEAR, dst=dst,
+                     borderMode=cv2.BORDER_CONSTANT)
+
+
+def _points_key(points):
+    points = np.asarray(points)
+    return (points.shape, points.dtype.str, points.tobytes())
+
+
+class GeometryCache:
+    """Per-geometry masks and warp maps, rebuilt only when their inputs change."""
+
+    def __init__(self):
+        # name -> (key, value)
+        self._entries = {}
+        # Number of entries built so far; constant in steady state
+        self.builds = 0
+
+    def _get(self, name, key, build):
+        entry = self._entries.get(name)
+        if entry is None or entry[0] != key:
+            entry = (key, build())
+            self._entries[name] = entry
+            self.builds += 1
+        return entry[1]
+
+    def roi_mask(self, shape, polygon, name="roi_mask"):
+        """uint8 mask of ``shape`` that is 255 inside ``polygon`` and 0 outside."""
+        shape = tuple(shape)
+
+        def build():
+            mask = np.zeros(shape, np.uint8)
+            polygon_i32 = np.asarray(polygon, np.int32).reshape(1, -1, 2)
+            cv2.fillPoly(mask, polygon_i32, (255,) * (shape[2] if len(shape) > 2 else 1))
+            return mask
+
+        return self._get(name, (shape, _points_key(polygon)), build)
+
+    def warp_maps(self, src_pts, dst_pts, dsize, name="birds_eye"):
+        """Fixed-point remap tables for the perspective warp ``src_pts -> dst_pts``."""
+        src_pts = np.float32(src_pts)
+        dst_pts = np.float32(dst_pts)
+        dsize = tuple(dsize)
+
+        def build():
+            matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
+            return perspective_maps(matrix, dsize)
+
+        key = (dsize, _points_key(src_pts), _points_key(dst_pts))
+        return self._get(name, key, build)
+
+    def warp_index(self, src_pts, dst_pts, dsize, src_size, name="birds_eye_index"):
+        """:func:`source_index` table for the perspective warp ``src_pts -> dst_pts``."""
+        src_pts = np.float32(src_pts)
+        dst_pts = np.float32(dst_pts)
+        dsize = tuple(dsize)
+        src_size = tuple(src_size)
+
+        def build():
+            matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
+            return source_index(matrix, dsize, src_size)
+
+        key = (dsize, src_size, _points_key(src_pts), _points_key(dst_pts))
+        return self._get(name, key, build)
+
+    def invalidate(self, name=None):
+        """Drop one entry (or all), e.g. after the camera was re-calibrated."""
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+
+class Roi:
+    """A rectangular region given as fractions of the frame size.
+
+    ``Roi(top=0.5)`` is the lower half of the frame, where the road is.
+    :meth:`view` returns a zero-copy sub-view of a frame, and
+    :meth:`to_frame` shifts line segments found inside the region back to
+    full-frame coordinates.
+    """
+
+    def __init__(self, top=0.0, bottom=1.0, left=0.0, right=1.0):
+        if not (0.0 <= top < bottom <= 1.0 and 0.0 <= left < right <= 1.0):
+            raise ValueError(f"Invalid ROI fractions {(top, bottom, left, right)}")
+        self.top = top
+        self.bottom = bottom
+        self.left = left
+        self.right = right
+
+    def bounds(self, shape):
+        """Pixel bounds ``(y0, y1, x0, x1)`` for a frame of ``shape``."""
+        height, width = shape[:2]
+        return (int(height * self.top), int(height * self.bottom),
+                int(width * self.left), int(width * self.right))
+
+    def offset(self, shape):
+        """``(x, y)`` of the region's top-left corner in the full frame."""
+        y0, _, x0, _ = self.bounds(shape)
+        return x0, y0
+
+    def view(self, frame):
+        y0, y1, x0, x1 = self.bounds(frame.shape)
+        return frame[y0:y1, x0:x1]
+
+    def to_frame(self, lines, shape):
+        """Shift ``(x1, y1, x2, y2)`` segments (as from HoughLinesP) in place."""
+        if lines is None:
+            return None
+        x0, y0 = self.offset(shape)
+        segments = lines.reshape(-1, 4)
+        segments[:, 0::2] += x0
+        segments[:, 1::2] += y0
+        return lines
+
+    def __repr__(self):
+        return f"Roi(top={self.top}, bottom={self.bottom}, left={self.left}, right={self.right})"
+
+
+# The road: everything from half-way down the frame (see 04_roi_crop)
+ROAD_ROI = Roi(top=0.5)
@@ -0,0 +1,239 @@
+"""Per-frame lane results as a fixed-layout binary record.
+
+A result is one NumPy structured record of ``LANE_RESULT_SIZE`` bytes
+(little-endian, no padding), so a controller decodes it with
+``np.frombuffer`` in about a microsecond, without pickle or JSON:
+
+    version        u1      LANE_RESULT_VERSION
+    flags          u1      HAS_LEFT | HAS_RIGHT | BIRDS_EYE | TRACKED
+    num_segments   u2      valid rows of ``segments``
+    frame_id       u8      frame the result was computed from
+    capture_ns     i8      capture time of that frame (time.monotonic_ns())
+    result_ns      i8      when the result was produced
+    left, right    3 x f4  lane polynomials x = a*y**2 + b*y + c, image pixels
+                           (bird's-eye pixels if BIRDS_EYE is set)
+    offset_px      f4      image centre minus lane centre at the bottom row
+                           (> 0: car right of the lane centre), NaN if unknown
+    heading_rad    f4      angle of the lane centre line at the bottom row
+                           (> 0: lane turns right), NaN if unknown
+    segments       32 x 4 i2  Hough segments (x1, y1, x2, y2), full-frame pixels
+
+Results are published on the ``cam0_lanes`` topic and written to a small
+results ring (a :class:`~fira_drive.ring.FrameRing` of one-row byte
+"frames"), so a controller can either follow the topic or poll the latest:
+
+    lanes = LaneResultRing.attach()
+    result = lanes.latest()
+    if result is not None and result["flags"] & HAS_LEFT:
+        ...
+"""
+
+import math
+import time
+
+import numpy as np
+
+from .ring import FrameRing
+
+
+LANE_RESULT_VERSION = 1
+MAX_SEGMENTS = 32
+
+HAS_LEFT = 1
+HAS_RIGHT = 2
+# Polynomials, offset and heading are in bird's-eye (top-down) pixels
+BIRDS_EYE = 4
+# The lanes were followed from the previous frames, not searched from scratch
+TRACKED = 8
+
+LANE_RESULT_DTYPE = np.dtype([
+    ("version", "<u1"),
+    ("flags", "<u1"),
+    ("num_segments", "<u2"),
+    ("frame_id", "<u8"),
+    ("capture_ns", "<i8"),
+    ("result_ns", "<i8"),
+    ("left", "<f4", (3,)),
+    ("right", "<f4", (3,)),
+    ("offset_px", "<f4"),
+    ("heading_rad", "<f4"),
+    ("segments", "<i2", (MAX_SEGMENTS, 4)),
+])
+LANE_RESULT_SIZE = LANE_RESULT_DTYPE.itemsize
+
+DEFAULT_TOPIC = b"cam0_lanes"
+DEFAULT_RING = "cam0_lanes"
+DEFAULT_SLOTS = 8
+
+# Segments flatter than this (|dy/dx|) are not lane lines
+MIN_SLOPE = 0.3
+
+
+def empty_result():
+    """A zeroed result record (a 0-d structured array, updated in place)."""
+    return np.zeros((), dtype=LANE_RESULT_DTYPE)
+
+
+def _fit(points):
+    # x as a function of y: lane lines are close to vertical in the image
+    ys, xs = points[:, 1].astype(np.float64), points[:, 0].astype(np.float64)
+    low, high = ys.min(), ys.max()
+    if high == low:
+        return None
+    # Curvature is only fitted when there are points half-way along the
+    # line; segment end points alone would make the quadratic term noise
+    margin = (high - low) / 4
+    if np.any((ys > low + margin) & (ys < high - margin)):
+        return np.polyfit(ys, xs, 2)
+    return np.concatenate([[0.0], np.polyfit(ys, xs, 1)])
+
+
+def _start_result(out, frame_id, capture_ns, flags):
+    result = empty_result() if out is None else out
+    result["version"] = LANE_RESULT_VERSION
+    result["frame_id"] = frame_id
+    result["capture_ns"] = capture_ns
+    result["flags"] = flags
+    result["left"] = 0.0
+    result["right"] = 0.0
+    result["offset_px"] = math.nan
+    result["heading_rad"] = math.nan
+    return result
+
+
+def _set_lanes(result, polys, width, height):
+    # Offset and heading from the mean of both polynomials at the bottom row
+    for side, flag in (("left", HAS_LEFT), ("right", HAS_RIGHT)):
+        if polys.get(side) is not None:
+            result[side] = polys[side]
+            result["flags"] |= flag
+    if polys.get("left") is not None and polys.get("right") is not None:
+        y = height - 1
+        centre = (np.polyval(polys["left"], y) + np.polyval(polys["right"], y)) / 2
+        result["offset_px"] = width / 2 - centre
+        # dx/dy of the centre line; moving up the image is -y
+        slope = (np.polyval(np.polyder(polys["left"]), y)
+                 + np.polyval(np.polyder(polys["right"]), y)) / 2
+        result["heading_rad"] = math.atan(-slope)
+
+
+def fill_lanes(left, right, width, height, frame_id=0, capture_ns=0, flags=0, out=None):
+    """Fill a result record from lane polynomials found some other way.
+
+    ``left`` and ``right`` are ``(a, b, c)`` or None; ``flags`` adds e.g.
+    ``BIRDS_EYE | TRACKED``. There are no Hough segments.
+    """
+    result = _start_result(out, frame_id, capture_ns, flags)
+    result["num_segments"] = 0
+    result["segments"] = 0
+    _set_lanes(result, {"left": left, "right": right}, width, height)
+    result["result_ns"] = time.monotonic_ns()
+    return result
+
+
+def fit_lanes(lines, width, height, frame_id=0, capture_ns=0, out=None):
+    """Fill a result record from HoughLinesP ``lines`` for one frame.
+
+    Segments are split into left and right lane by the sign of their slope;
+    each side gets a quadratic fitted through its end points. Offset and
+    heading are taken from the mean of both polynomials at the bottom row.
+    """
+    result = _start_result(out, frame_id, capture_ns, 0)
+
+    segments = np.empty((0, 4), np.int32) if lines is None else lines.reshape(-1, 4)
+    count = min(len(segments), MAX_SEGMENTS)
+    result["num_segments"] = count
+    result["segments"][:count] = segments[:count]
+    result["segments"][count:] = 0
+
+    polys = {}
+    if len(segments):
+        dx = (segments[:, 2] - segments[:, 0]).astype(np.float32)
+        dy = (segments[:, 3] - segments[:, 1]).astype(np.float32)
+        steep = np.abs(dy) > MIN_SLOPE * np.abs(dx)
+        # In image coordinates (y down) the left line leans right going up
+        for side, mask in (("left", steep & (dx * dy < 0)),
+                           ("right", steep & (dx * dy > 0))):
+            if mask.any():
+                polys[side] = _fit(segments[mask].reshape(-1, 2))
+    _set_lanes(result, polys, width, height)
+
+    result["result_ns"] = time.monotonic_ns()
+    return result
+
+
+def unpack_lane_result(data):
+    """Decode a published record. Raises ValueError for unknown versions."""
+    if len(data) != LANE_RESULT_SIZE or data[0] != LANE_RESULT_VERSION:
+        raise ValueError(f"Unsupported lane result ({len(data)} bytes, "
+                         f"version {data[0] if len(data) else None})")
+    return np.frombuffer(data, dtype=LANE_RESULT_DTYPE).reshape(())
+
+
+class LaneResultRing:
+    """Lane results in a shared-memory ring, newest readable without ZeroMQ."""
+
+    def __init__(self, ring):
+        self.ring = ring
+        self._out = ring.empty_frame()
+
+    @classmethod
+    def create(cls, name=DEFAULT_RING, num_slots=DEFAULT_SLOTS, replace=False):
+        return cls(FrameRing.create(name, shape=(1, LANE_RESULT_SIZE), num_slots=num_slots,
+                                    replace=replace))
+
+    @classmethod
+    def attach(cls, name=DEFAULT_RING):
+        return cls(FrameRing.attach(name))
+
+    def write(self, result):
+        """Store ``result`` in the next slot and return the slot's id."""
+        slot_id, view = self.ring.begin_write()
+        view.view(LANE_RESULT_DTYPE).reshape(())[...] = result
+        self.ring.commit(slot_id)
+        return slot_id
+
+    def latest(self):
+        """Copy of the newest result, or None if there is none yet."""
+        _, data = self.ring.read_latest(out=self._out)
+        if data is None:
+            return None
+        return data.view(LANE_RESULT_DTYPE).reshape(()).copy()
+
+    def close(self):
+        self.ring.close()
+
+    def unlink(self):
+        self.ring.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.ring.owner:
+            self.unlink()
+
+
+class LanePublisher:
+    """Writes each result to a :class:`LaneResultRing` and publishes it on ``topic``."""
+
+    def __init__(self, socket, topic=DEFAULT_TOPIC, ring_name=DEFAULT_RING,
+                 num_slots=DEFAULT_SLOTS):
+        self.socket = socket
+        self.topic = topic
+        self.results = LaneResultRing.create(ring_name, num_slots)
+
+    def publish(self, result):
+        self.results.write(result)
+        self.socket.send_multipart([self.topic, result.tobytes()])
+
+    def close(self):
+        self.results.close()
+        self.results.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,120 @@
+"""Lighting normalisation on the luma plane that only re-plans on drift.
+
+08_clahe_normalize runs a full CLAHE on every frame, although the lighting
+of a track changes far more slowly than the frame rate. The
+:class:`LightingNormalizer` splits that work:
+
+    statistics  a luma histogram of every ``step``-th pixel in both
+                directions (a nearest-neighbour resize, ~1/16 of the
+                pixels), folded into a running average across frames; the
+                lighting is summed up by its dark, median and bright
+                percentiles
+    re-plan     only when one of those percentiles has moved more than
+                ``drift`` grey levels since the current table was built:
+                the dark..bright range is stretched to 0..255 (exposure),
+                then equalised with CLAHE's contrast clipping, as one table
+                for the whole frame instead of one per tile
+    apply       every frame: a single ``cv2.LUT`` pass through that table
+
+    normalize = LightingNormalizer()
+    out = normalize(gray)              # or normalize(gray, dst=buffer)
+
+It works on 8-bit grayscale (the producer's ``gray`` plane); BGR frames are
+converted first. The Y of YUV that 08 equalises is the same luma.
+"""
+
+import cv2
+import numpy as np
+
+
+# Percentiles of the luma histogram that describe the lighting
+PERCENTILES = (0.01, 0.5, 0.99)
+
+
+class LightingNormalizer:
+    """Global exposure stretch + clipped equalisation, re-planned on drift."""
+
+    def __init__(self, clip_limit=2.0, step=4, drift=6.0, smoothing=0.25):
+        self.clip_limit = clip_limit
+        self.step = step
+        self.drift_threshold = drift
+        self.smoothing = smoothing
+
+        self.histogram = None       # running luma histogram, sums to 1
+        self.levels = None          # its PERCENTILES, grey levels
+        self.planned = None         # levels the table was built from
+        self.lut = np.arange(256, dtype=np.uint8)
+        self.drift = 0.0
+        self.frames = 0
+        self.rebuilds = 0
+        self._gray = None
+        self._sample = None
+
+    def _luma(self, frame):
+        if frame.ndim == 2:
+            return frame
+        if self._gray is None or self._gray.shape != frame.shape[:2]:
+            self._gray = np.empty(frame.shape[:2], np.uint8)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def sample_histogram(self, gray):
+        """Normalised histogram of every ``step``-th pixel of ``gray``."""
+        height, width = gray.shape
+        size = (max(width // self.step, 1), max(height // self.step, 1))
+        if self._sample is None or self._sample.shape != size[::-1]:
+            self._sample = np.empty(size[::-1], np.uint8)
+        sample = cv2.resize(gray, size, dst=self._sample, interpolation=cv2.INTER_NEAREST)
+        histogram = cv2.calcHist([sample], [0], None, [256], [0, 256]).ravel()
+        return histogram / histogram.sum()
+
+    def build_lut(self, histogram, levels):
+        """Table stretching ``levels`` to full range, then equalising with clipping."""
+        low, _, high = levels
+        stretch = np.clip(np.rint((np.arange(256) - low) * 255 / max(high - low, 1)), 0, 255)
+        stretch = stretch.astype(np.intp)
+        # Histogram after the stretch, equalised with CLAHE's clip limit;
+        # what is clipped off is spread evenly over all levels
+        stretched = np.bincount(stretch, weights=histogram, minlength=256)
+        clipped = np.minimum(stretched, self.clip_limit / 256)
+        clipped += (1.0 - clipped.sum()) / 256
+        equalise = np.clip(np.rint(np.cumsum(clipped) * 255), 0, 255).astype(np.uint8)
+        return equalise[stretch]
+
+    def update(self, frame):
+        """Fold ``frame`` into the statistics; re-plan if the lighting drifted.
+
+        Returns True when the table was rebuilt.
+        """
+        self.frames += 1
+        current = self.sample_histogram(self._luma(frame))
+        if self.histogram is None:
+            self.histogram = current
+        else:
+            self.histogram += self.smoothing * (current - self.histogram)
+        self.levels = np.searchsorted(np.cumsum(self.histogram), PERCENTILES).astype(np.float64)
+
+        if self.planned is not None:
+            self.drift = float(np.abs(self.levels - self.planned).max())
+            if self.drift <= self.drift_threshold:
+                return False
+        self.lut = self.build_lut(self.histogram, self.levels)
+        self.planned = self.levels
+        self.drift = 0.0
+        self.rebuilds += 1
+        return True
+
+    def apply(self, frame, dst=None):
+        """The current table applied to the luma of ``frame``."""
+        return cv2.LUT(self._luma(frame), self.lut, dst=dst)
+
+    def __call__(self, frame, dst=None):
+        gray = self._luma(frame)
+        self.update(gray)
+        return cv2.LUT(gray, self.lut, dst=dst)
+
+    def reset(self):
+        self.histogram = None
+        self.levels = None
+        self.planned = None
+        self.lut = np.arange(256, dtype=np.uint8)
+        self.drift = 0.0
@@ -0,0 +1,75 @@
+"""Per-frame metadata published on the ``cam0_metadata`` topic.
+
+Each message is a fixed 38-byte little-endian record:
+
+    version       u8   METADATA_VERSION
+    pixel_format  u8   one of PIXEL_FORMATS
+    slot          u16  ring slot holding the frame
+    frame_id      u64  monotonic frame counter (never wraps in practice)
+    capture_ns    i64  time.monotonic_ns() when the frame was grabbed (with a
+                       grab thread), or when it left the decoder (inline)
+    publish_ns    i64  time.monotonic_ns() when the notification was sent
+    width         u32
+    height        u32
+    channels      u16
+
+``time.monotonic_ns()`` uses the system-wide monotonic clock, so timestamps
+from the producer can be compared with the consumer's clock on the same host.
+"""
+
+import struct
+import time
+from collections import namedtuple
+
+
+METADATA_VERSION = 1
+METADATA_FORMAT = "<BBHQqqIIH"
+METADATA_SIZE = struct.calcsize(METADATA_FORMAT)
+
+PIXEL_FORMATS = {
+    1: "BGR8",
+    2: "GRAY8",
+}
+PIXEL_FORMAT_CODES = {name: code for code, name in PIXEL_FORMATS.items()}
+
+FrameMetadata = namedtuple(
+    "FrameMetadata",
+    "frame_id capture_ns publish_ns slot width height channels pixel_format")
+
+
+def pixel_format_for(channels):
+    return "GRAY8" if channels == 1 else "BGR8"
+
+
+def pack_metadata(meta):
+    return struct.pack(
+        METADATA_FORMAT, METADATA_VERSION, PIXEL_FORMAT_CODES[meta.pixel_format],
+        meta.slot, meta.frame_id, meta.capture_ns, meta.publish_ns,
+        meta.width, meta.height, meta.channels)
+
+
+def unpack_metadata(data):
+    """Decode a metadata message. Raises ValueError for unknown versions."""
+    if len(data) != METADATA_SIZE or data[0] != METADATA_VERSION:
+        raise ValueError(f"Unsupported frame metadata ({len(data)} bytes, "
+                         f"version {data[0] if data else None})")
+    (_, pixel_format, slot, frame_id, capture_ns, publish_ns,
+     width, height, channels) = struct.unpack(METADATA_FORMAT, data)
+    return FrameMetadata(frame_id, capture_ns, publish_ns, slot, width, height,
+                         channels, PIXEL_FORMATS.get(pixel_format, "UNKNOWN"))
+
+
+def frame_metadata(ring, frame_id, capture_ns, publish_ns=None):
+    """Build the metadata record for ``frame_id`` of ``ring``."""
+    if publish_ns is None:
+        publish_ns = time.monotonic_ns()
+    return FrameMetadata(
+        frame_id, capture_ns, publish_ns, ring.slot_of(frame_id),
+        ring.width, ring.height, ring.channels, pixel_format_for(ring.channels))
+
+
+def latency_ms(meta, now_ns=None):
+    """Milliseconds elapsed since the frame was captured."""
+    if now_ns is None:
+        now_ns = time.monotonic_ns()
+    return (now_ns - meta.capture_ns) / 1e6
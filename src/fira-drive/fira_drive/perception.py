@@ -0,0 +1,134 @@
+"""The perception-tests steps declared as one fused pipeline.
+
+Stage names follow the scripts they come from:
+
+    gray                      01_grayscale
+    lane_mask                 02_hsv_conversion (white/yellow paint, one table lookup)
+    gaussian, median          03_noise_filter
+    birds_eye                 05_birds_eye
+    binary, opening, closing  06_morphological_ops
+    edges                     07_canny_edges
+    clahe                     08_clahe_normalize (on the luma plane)
+    lighting                  08_clahe_normalize, incremental (fira_drive.lighting)
+    hough_edges, lines        09_hough_lines
+
+``build_pipeline(..., roi=geometry.ROAD_ROI)`` runs everything on the lower half of
+the frame only (the crop from 04_roi_crop); ``lines`` are still reported in
+full-frame coordinates.
+"""
+
+import cv2
+import numpy as np
+
+from . import stages
+from .geometry import GeometryCache
+from .pipeline import Pipeline
+from .tuning import DEFAULT_TUNING, morph_kernel
+
+
+# Defaults; fira-drive.toml can override them (see fira_drive.tuning)
+# Order: [top-left, top-right, bottom-right, bottom_left]
+BIRDS_EYE_SRC_PTS = np.float32(DEFAULT_TUNING.birds_eye.src_pts)
+
+MORPH_KERNEL = morph_kernel(DEFAULT_TUNING.morphology.kernel)
+
+# Masks and warp maps shared by every pipeline built in this process
+geometry_cache = GeometryCache()
+
+
+def birds_eye_dst_pts(width, height):
+    return np.float32([
+        [0, 0], [width, 0],
+        [width, height], [0, height]
+    ])
+
+
+def birds_eye_matrix(width, height, src_pts=BIRDS_EYE_SRC_PTS):
+    return cv2.getPerspectiveTransform(src_pts, birds_eye_dst_pts(width, height))
+
+
+def add_noise_filter(pipe):
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("gaussian", stages.gaussian_blur((5, 5)), "gray")
+    pipe.add("median", stages.median_blur(5), "gray")
+
+
+def add_colour_mask(pipe):
+    pipe.add("lane_mask", stages.colour_mask())
+
+
+def add_birds_eye(pipe, width, height, src_pts=BIRDS_EYE_SRC_PTS, roi=None):
+    # Precomputed fixed-point maps instead of warpPerspective on every frame
+    dst_pts = birds_eye_dst_pts(width, height)
+    if roi is not None:
+        # The calibration points are in full-frame pixels, the input is the ROI
+        src_pts = np.float32(src_pts) - np.float32(roi.offset((height, width)))
+    maps = geometry_cache.warp_maps(src_pts, dst_pts, (width, height))
+    pipe.add("birds_eye", stages.remap(maps, key=(src_pts, dst_pts, (width, height))))
+
+
+def add_morphology(pipe, params=DEFAULT_TUNING.morphology):
+    kernel = morph_kernel(params.kernel)
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("blur", stages.gaussian_blur((5, 5)), "gray")
+    pipe.add("binary", stages.threshold(params.threshold), "blur")
+    pipe.add("opening", stages.morphology(cv2.MORPH_OPEN, kernel), "binary")
+    pipe.add("closing", stages.morphology(cv2.MORPH_CLOSE, kernel), "opening")
+
+
+def add_canny(pipe, params=DEFAULT_TUNING.canny):
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("blur", stages.gaussian_blur((5, 5)), "gray")
+    pipe.add("edges", stages.canny(params.low, params.high), "blur")
+
+
+def add_clahe(pipe, params=DEFAULT_TUNING.clahe):
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("clahe", stages.clahe(params.clip_limit, params.tile_grid), "gray")
+
+
+def add_lighting(pipe, params=DEFAULT_TUNING.clahe):
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("lighting", stages.normalize_lighting(params.clip_limit), "gray")
+
+
+def add_hough(pipe, params=DEFAULT_TUNING.hough):
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("blur", stages.gaussian_blur((5, 5)), "gray")
+    pipe.add("hough_edges", stages.canny(params.canny_low, params.canny_high), "blur")
+    pipe.add("lines", stages.hough_lines_p(params.threshold, params.min_line_length,
+                                           params.max_line_gap), "hough_edges")
+
+
+STEPS = {
+    "noise_filter": add_noise_filter,
+    "colour_mask": add_colour_mask,
+    "birds_eye": add_birds_eye,
+    "morphology": add_morphology,
+    "canny": add_canny,
+    "clahe": add_clahe,
+    "lighting": add_lighting,
+    "hough": add_hough,
+}
+
+
+def build_pipeline(width, height, steps=None, roi=None, tuning=DEFAULT_TUNING):
+    """One pipeline with every step (or the named ``steps``) sharing stages.
+
+    Each step declares its own chain (re-declaring "gray" and "blur"); the
+    pipeline merges the identical stages so they run once per frame. With
+    ``roi`` the stages only see that part of the frame. Thresholds and
+    calibration come from ``tuning`` (a :class:`~fira_drive.tuning.Tuning`).
+    """
+    pipe = Pipeline(roi=roi)
+    for name in steps or list(STEPS):
+        if name == "birds_eye":
+            add_birds_eye(pipe, width, height, tuning.birds_eye.src_pts, roi=roi)
+        elif name == "lighting":
+            # The incremental equaliser shares CLAHE's clip limit
+            add_lighting(pipe, tuning.clahe)
+        elif name in tuning._fields:
+            STEPS[name](pipe, getattr(tuning, name))
+        else:
+            STEPS[name](pipe)
+    return pipe
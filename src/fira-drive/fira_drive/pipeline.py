@@ -0,0 +1,156 @@
+"""Perception pipeline declared as a DAG of named stages.
+
+    pipe = Pipeline()
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("blur", stages.gaussian_blur((5, 5)), "gray")
+    pipe.add("edges", stages.canny(100, 300), "blur")
+    pipe.add("hough_edges", stages.canny(50, 150), "blur")
+    pipe.add("lines", stages.hough_lines_p(), "hough_edges")
+
+    results = pipe.run(frame, outputs=["edges", "lines"])
+
+Every stage is identified by its operation, parameters and inputs. Adding a
+stage that is identical to an existing one just gives the existing node a
+second name, so chains that were written separately share their common
+prefix and it is computed once per frame.
+
+Stage outputs are written into buffers from a :class:`~fira_drive.buffers.BufferPool`
+allocated on the first frame of a geometry, so results are only valid until
+the next :meth:`Pipeline.run`.
+
+With ``roi`` set (a :class:`~fira_drive.geometry.Roi`), the stages run on a
+zero-copy sub-view of the frame, e.g. only the road in the lower half, so
+image outputs have the size of the ROI. Line segments are shifted back to
+full-frame coordinates.
+"""
+
+import time
+
+from . import trace
+from .buffers import BufferPool
+
+
+FRAME = "frame"
+
+
+class Pipeline:
+    """A DAG of :class:`~fira_drive.stages.Op` nodes evaluated once per frame.
+
+    Pass ``reuse_buffers=False`` to get freshly allocated results instead.
+    """
+
+    def __init__(self, reuse_buffers=True, roi=None):
+        self.pool = BufferPool() if reuse_buffers else None
+        self.roi = roi
+        self._geometry = None
+        # canonical name -> (op, input names), in insertion (topological) order
+        self._nodes = {}
+        # any declared name -> canonical name
+        self._aliases = {FRAME: FRAME}
+        # (op key, canonical inputs) -> canonical name
+        self._by_key = {}
+
+    def add(self, name, op, *inputs):
+        """Declare stage ``name`` computing ``op(*inputs)``.
+
+        Inputs are names of earlier stages, or ``"frame"`` for the input
+        frame (the default when none are given). Returns the canonical name,
+        which differs from ``name`` when an identical stage already exists.
+        Re-declaring a name with the same operation and inputs is a no-op.
+        """
+        inputs = tuple(self.resolve(i) for i in inputs or (FRAME,))
+        key = (op.key, inputs)
+        canonical = self._by_key.get(key)
+
+        if name in self._aliases:
+            if self._aliases[name] == canonical:
+                return canonical
+            raise ValueError(f"Stage '{name}' is already defined differently")
+
+        if canonical is None:
+            canonical = name
+            self._nodes[name] = (op, inputs)
+            self._by_key[key] = name
+        self._aliases[name] = canonical
+        return canonical
+
+    def resolve(self, name):
+        try:
+            return self._aliases[name]
+        except KeyError:
+            raise KeyError(f"Unknown stage '{name}'") from None
+
+    @property
+    def names(self):
+        return [name for name in self._aliases if name != FRAME]
+
+    def _required(self, outputs):
+        needed = set()
+        stack = [self.resolve(name) for name in outputs]
+        while stack:
+            name = stack.pop()
+            if name == FRAME or name in needed:
+                continue
+            needed.add(name)
+            stack.extend(self._nodes[name][1])
+        return needed
+
+    def run(self, frame, outputs=None):
+        """Evaluate the stages needed for ``outputs`` (default: all) on ``frame``.
+
+        Returns a dict with every requested name, aliases included; shared
+        stages are computed only once. Intermediate results nobody asked for
+        are dropped as soon as their last consumer has run; without buffer
+        reuse that frees them early, with it every stage keeps its own
+        buffer for the next frame.
+        """
+        if outputs is None:
+            outputs = self.names
+        needed = self._required(outputs)
+        keep = {self.resolve(name) for name in outputs}
+
+        consumers = dict.fromkeys(needed, 0)
+        for name in needed:
+            for i in self._nodes[name][1]:
+                if i != FRAME:
+                    consumers[i] += 1
+
+        roi = self.roi
+        full_shape = frame.shape
+        if roi is not None:
+            frame = roi.view(frame)
+
+        pool = self.pool
+        if pool is not None and self._geometry != (frame.shape, frame.dtype):
+            # New geometry: the old buffers no longer fit any stage
+            pool.clear()
+            self._geometry = (frame.shape, frame.dtype)
+
+        values = {FRAME: frame}
+        tracing = trace.tracer.enabled
+        for name, (op, inputs) in self._nodes.items():
+            if name not in needed:
+                continue
+            args = [values[i] for i in inputs]
+            if tracing:
+                start_ns = time.monotonic_ns()
+            if pool is not None and op.out is not None:
+                result = op(*args, out=pool.get(name))
+                pool.put(name, result)
+            else:
+                result = op(*args)
+            if tracing:
+                trace.record(name, start_ns, time.monotonic_ns())
+            if roi is not None and op.segments:
+                result = roi.to_frame(result, full_shape)
+            values[name] = result
+            for i in inputs:
+                if i == FRAME:
+                    continue
+                consumers[i] -= 1
+                if consumers[i] == 0 and i not in keep:
+                    del values[i]
+        return {name: values[self.resolve(name)] for name in outputs}
+
+    def __len__(self):
+        return len(self._nodes)
@@ -0,0 +1,152 @@
+"""Derived planes computed once by the producer and stored next to the frame.
+
+Almost every perception step starts with ``cv2.cvtColor(frame,
+COLOR_BGR2GRAY)`` and several then only look at the road. Instead of every
+consumer converting (and reading) the full 921,600-byte BGR frame, the
+producer can publish derived planes in the same ring slot, under the same
+seqlock, and consumers read just the plane they need:
+
+    frame      the captured BGR frame                     640x480x3  921,600 B
+    gray       cv2.cvtColor(frame, COLOR_BGR2GRAY)        640x480    307,200 B
+    half       cv2.pyrDown(frame), one pyramid level down 320x240x3  230,400 B
+    half_gray  cv2.pyrDown(gray)                          320x240     76,800 B
+    road       ROAD_ROI of frame (the lower half)         640x240x3  460,800 B
+    road_gray  ROAD_ROI of gray                           640x240    153,600 B
+
+    planes = PlaneSet(["frame", "gray", "half_gray"], frame.shape)
+    ring = FrameRing.create("cam0", num_slots=4, planes=planes.layout)
+    frame_id = capture_into_ring(cap, ring, planes=planes)
+
+    with FrameSource("cam0", plane="gray") as source: ...
+
+The captured frame is the plane ``"frame"``, the name a single-plane ring
+gives its only plane, so a consumer asking for ``plane="frame"`` works with
+either. The first plane listed is the ring's primary plane; leaving out
+``frame`` publishes the derived planes instead of the frame. Planes another plane is
+derived from but that are not published are computed into scratch buffers.
+"""
+
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+from . import trace
+from .geometry import ROAD_ROI
+from .ring import PRIMARY_PLANE
+
+
+CAPTURED = PRIMARY_PLANE
+
+# source plane, shape(source shape) -> shape, derive(src, dst)
+Recipe = namedtuple("Recipe", "source shape derive")
+
+
+def _gray_shape(shape):
+    return shape[:2]
+
+
+def _to_gray(src, dst):
+    cv2.cvtColor(src, cv2.COLOR_BGR2GRAY, dst=dst)
+
+
+def _half_shape(shape):
+    return ((shape[0] + 1) // 2, (shape[1] + 1) // 2) + tuple(shape[2:])
+
+
+def _pyr_down(src, dst):
+    cv2.pyrDown(src, dst=dst, dstsize=(dst.shape[1], dst.shape[0]))
+
+
+def _roi_shape(shape):
+    y0, y1, x0, x1 = ROAD_ROI.bounds(shape)
+    return (y1 - y0, x1 - x0) + tuple(shape[2:])
+
+
+def _roi_copy(src, dst):
+    np.copyto(dst, ROAD_ROI.view(src))
+
+
+RECIPES = {
+    "gray": Recipe(CAPTURED, _gray_shape, _to_gray),
+    "half": Recipe(CAPTURED, _half_shape, _pyr_down),
+    "half_gray": Recipe("gray", _half_shape, _pyr_down),
+    "road": Recipe(CAPTURED, _roi_shape, _roi_copy),
+    "road_gray": Recipe("gray", _roi_shape, _roi_copy),
+}
+PLANE_NAMES = (CAPTURED, *RECIPES)
+
+
+class PlaneSet:
+    """The planes a producer publishes for frames of ``frame_shape``.
+
+    ``layout`` is the ``planes=`` argument for ``FrameRing.create``;
+    :meth:`derive` fills in the derived planes of a slot from the captured
+    frame before it is committed.
+    """
+
+    def __init__(self, names, frame_shape, dtype=np.uint8):
+        names = list(names)
+        if not names:
+            raise ValueError("At least one plane is needed")
+        unknown = [name for name in names if name not in PLANE_NAMES]
+        if unknown:
+            raise ValueError(f"Unknown planes {unknown} (known: {', '.join(PLANE_NAMES)})")
+        if len(set(names)) != len(names):
+            raise ValueError(f"Planes listed twice: {names}")
+        self.names = names
+        self.frame_shape = tuple(frame_shape)
+        self.dtype = np.dtype(dtype)
+
+        # Every derived plane after the plane it is derived from
+        self.steps = []
+        shapes = {CAPTURED: self.frame_shape}
+
+        def resolve(name):
+            if name in shapes:
+                return
+            recipe = RECIPES[name]
+            resolve(recipe.source)
+            shapes[name] = recipe.shape(shapes[recipe.source])
+            self.steps.append((name, recipe))
+
+        for name in names:
+            resolve(name)
+        self.shapes = shapes
+        self.layout = [(name, shapes[name], self.dtype) for name in names]
+
+        # The captured frame is decoded straight into its plane when it is
+        # published, otherwise into a scratch frame like other intermediates
+        self.scratch = {name: np.empty(shape, self.dtype)
+                        for name, shape in shapes.items() if name not in names}
+
+    @property
+    def captured_in_ring(self):
+        return CAPTURED in self.names
+
+    def capture_target(self, ring, frame_id):
+        """Where the captured frame of ``frame_id`` should be decoded to."""
+        if self.captured_in_ring:
+            return ring.view(frame_id, CAPTURED)
+        return self.scratch[CAPTURED]
+
+    def derive(self, ring, frame_id, frame):
+        """Compute the derived planes of ``frame_id`` (slot still being written)."""
+        buffers = {CAPTURED: frame}
+        with trace.span("derive_planes", frame_id):
+            for name, recipe in self.steps:
+                dst = self.scratch[name] if name in self.scratch else ring.view(frame_id, name)
+                recipe.derive(buffers[recipe.source], dst)
+                buffers[name] = dst
+
+    def write(self, ring, frame):
+        """Like ``ring.write``: copy ``frame`` in, derive the planes, commit."""
+        frame_id, _ = ring.begin_write()
+        target = self.capture_target(ring, frame_id)
+        np.copyto(target, frame.reshape(target.shape), casting="no")
+        self.derive(ring, frame_id, target)
+        ring.commit(frame_id)
+        return frame_id
+
+    def __repr__(self):
+        return f"PlaneSet({self.names}, {self.frame_shape})"
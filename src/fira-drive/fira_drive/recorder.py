@@ -0,0 +1,68 @@
+"""Record every frame published on a ring into a :class:`~fira_drive.archive.FrameArchive`.
+
+The recorder is an ordinary subscriber that handles every notification in
+order (not latest-only) and copies each frame once, straight from the ring
+slot into the archive's file mapping. The kernel writes the pages back in
+the background, so recording costs one memcpy per frame and the recorder
+sleeps on the socket the rest of the time.
+"""
+
+import time
+
+from .archive import FrameArchive
+from .frames import DEFAULT_ENDPOINT
+from .ring import FrameRing
+from .subscriber import FrameSubscriber
+
+
+class Recorder:
+    """Appends frames from ring ``name`` to a new archive at ``path``.
+
+    ``skipped`` counts frames that were published but never seen (gaps in
+    the frame ids) and ``torn`` those overwritten in the ring before they
+    could be copied; both should stay zero at camera rate.
+    """
+
+    def __init__(self, path, capacity, name="cam0", endpoint=DEFAULT_ENDPOINT, topic=None,
+                 preallocate=True, context=None):
+        if topic is None:
+            topic = f"{name}_metadata".encode()
+        self.ring = FrameRing.attach(name)
+        self.subscriber = FrameSubscriber(self.ring, endpoint, topic, context=context)
+        self.archive = FrameArchive.create(path, self.ring.shape, self.ring.dtype,
+                                           capacity, preallocate=preallocate)
+        self.torn = 0
+
+    @property
+    def recorded(self):
+        return len(self.archive)
+
+    @property
+    def skipped(self):
+        return self.subscriber.skipped
+
+    @property
+    def full(self):
+        return self.recorded >= self.archive.capacity
+
+    def poll(self, timeout_ms=None):
+        """Record the next published frame. Returns its metadata, or None on timeout."""
+        meta = self.subscriber.recv_metadata(timeout_ms)
+        if meta is None:
+            return None
+        position = self.archive.append_from_ring(
+            self.ring, meta.frame_id, meta.capture_ns, time.monotonic_ns())
+        if position is None and not self.full:
+            self.torn += 1
+        return meta
+
+    def close(self):
+        self.subscriber.close()
+        self.ring.close()
+        self.archive.close(trim=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
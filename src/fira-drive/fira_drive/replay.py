@@ -0,0 +1,158 @@
+"""Recorded and synthetic frame sources for running without a camera.
+
+Every source is an iterator of ``(frame, timestamp_ns)`` pairs, where the
+timestamp is relative to the start of the recording (None if the source has
+no timing, like a directory of images):
+
+    video_frames("lap.avi")            any file cv2.VideoCapture can read
+    image_frames("lap_images/")        sorted .png/.jpg/.bmp files
+    archive_frames("lap.fira")         a raw FrameArchive, zero-copy
+    synthetic_track(640, 480)          an endless generated road
+
+``open_source`` picks one from a path (or ``"synthetic"``), and
+:class:`ReplayTimer` paces them: at the recorded timing, at a fixed FPS or
+as fast as possible. ``capture/replay_to_shared_memory.py`` publishes the
+frames on the same ring and topic as the camera producer.
+"""
+
+import math
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .archive import SUFFIX as ARCHIVE_SUFFIX
+from .archive import FrameArchive
+from .scheduler import CaptureScheduler
+
+
+ORIGINAL = "original"
+FIXED = "fixed"
+FAST = "fast"
+TIMING_MODES = (ORIGINAL, FIXED, FAST)
+
+SYNTHETIC = "synthetic"
+IMAGE_SUFFIXES = {".png", ".jpg", ".jpeg", ".bmp"}
+
+
+def video_frames(path):
+    cap = cv2.VideoCapture(str(path))
+    if not cap.isOpened():
+        raise FileNotFoundError(f"Could not open video {path}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            # Position of the frame just decoded, from the container
+            yield frame, int(cap.get(cv2.CAP_PROP_POS_MSEC) * 1e6)
+    finally:
+        cap.release()
+
+
+def image_frames(path):
+    files = sorted(p for p in Path(path).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if not files:
+        raise FileNotFoundError(f"No images in {path}")
+    for file in files:
+        frame = cv2.imread(str(file), cv2.IMREAD_COLOR)
+        if frame is not None:
+            yield frame, None
+
+
+def archive_frames(path):
+    archive = FrameArchive.open(path)
+    start = int(archive.index[0]["capture_ns"]) if len(archive) else 0
+    for i in range(len(archive)):
+        # Zero-copy: a slice of the memory-mapped file
+        yield archive.frames[i], int(archive.index[i]["capture_ns"]) - start
+
+
+def synthetic_track(width=640, height=480, fps=30.0, count=None, seed=0):
+    """An endless (or ``count``-frame) drive along a generated winding road.
+
+    Two lane lines (white left, yellow right) in perspective on noisy
+    asphalt; the road curves and the car drifts across the lane over time,
+    and the lighting changes slowly, so every perception step gets something
+    to work on. Deterministic for a given ``seed``.
+    """
+    rng = np.random.default_rng(seed)
+    # A few noise textures, cycled, so generation stays cheap
+    textures = [rng.integers(-12, 13, (height, width, 3)).astype(np.int16) for _ in range(4)]
+    horizon = int(height * 0.45)
+    ys = np.arange(horizon, height, 4, dtype=np.float64)
+    depth = (ys - horizon) / (height - horizon)   # 0 at the horizon, 1 at the bottom
+    frame = np.empty((height, width, 3), np.uint8)
+    base = np.empty((height, width, 3), np.int16)
+
+    i = 0
+    while count is None or i < count:
+        t = i / fps
+        curve = 0.35 * math.sin(t * 0.4 + seed)
+        drift = 0.12 * math.sin(t * 0.9)
+        light = 1.0 + 0.35 * math.sin(t * 0.25)
+
+        base[:horizon] = (int(150 * light), int(130 * light), int(110 * light))
+        base[horizon:] = int(75 * light)
+        base += textures[i % len(textures)]
+        np.clip(base, 0, 255, out=base)
+        frame[:] = base
+
+        centre = width * (0.5 + drift * depth + curve * (1 - depth) ** 2)
+        half_width = width * (0.04 + 0.38 * depth)
+        for side, colour in ((-1, (255, 255, 255)), (1, (0, 220, 255))):
+            xs = centre + side * half_width
+            points = np.stack([xs, ys], axis=1).astype(np.int32).reshape(-1, 1, 2)
+            cv2.polylines(frame, [points], False, colour, 6, cv2.LINE_AA)
+
+        yield frame, int(i * 1e9 / fps)
+        i += 1
+
+
+def open_source(spec, width=640, height=480, fps=30.0):
+    """The frame source for a path, or for ``"synthetic"``."""
+    if spec == SYNTHETIC:
+        return synthetic_track(width, height, fps)
+    path = Path(spec)
+    if path.is_dir():
+        return image_frames(path)
+    if path.suffix == ARCHIVE_SUFFIX:
+        return archive_frames(path)
+    return video_frames(path)
+
+
+class ReplayTimer:
+    """Paces replayed frames.
+
+    ``original`` follows the recorded timestamps (frames without one fall
+    back to ``fps``), ``fixed`` publishes at ``fps`` and ``fast`` does not
+    wait at all. Like the capture scheduler, waits are against a schedule
+    on the monotonic clock, so they do not drift.
+    """
+
+    def __init__(self, mode=ORIGINAL, fps=30.0, clock=time.monotonic, sleep=time.sleep):
+        if mode not in TIMING_MODES:
+            raise ValueError(f"Unknown timing mode '{mode}'")
+        self.mode = mode
+        self.clock = clock
+        self.sleep = sleep
+        self._scheduler = CaptureScheduler(target_fps=fps, clock=clock, sleep=sleep)
+        self._start = None
+
+    def wait(self, timestamp_ns):
+        if self.mode == FAST:
+            return
+        if self.mode == FIXED or timestamp_ns is None:
+            self._scheduler.wait()
+            return
+        now = self.clock()
+        if self._start is None:
+            self._start = now - timestamp_ns / 1e9
+        delay = self._start + timestamp_ns / 1e9 - now
+        if delay > 0:
+            self.sleep(delay)
+
+    def restart(self):
+        """Call when the source starts over (looping), so timestamps restart at zero."""
+        self._start = None
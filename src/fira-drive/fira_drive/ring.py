@@ -0,0 +1,319 @@
+"""Self-describing shared-memory frame ring.
+
+Layout of the segment (all integers little-endian):
+
+    [ header (64 bytes) ][ plane table ][ control block ][ slot 0 ] ... [ slot N-1 ]
+
+The header describes the geometry, dtype and slot count so consumers no longer
+hard-code them. The control block is an array of uint64 values: the write
+index (number of committed frames) followed by one sequence counter per slot.
+
+A slot holds one or more planes of the same frame, e.g. the BGR frame plus
+a grayscale and a half-resolution copy computed once by the producer (see
+:mod:`fira_drive.planes`). The plane table has one 48-byte entry per plane
+(name, width, height, channels, dtype, offset within the slot). Plane 0 is
+the primary plane: the header geometry, ``shape`` and ``dtype`` describe
+it, and it is what the methods return when no ``plane`` is given.
+
+Each slot is guarded by a seqlock. To write frame ``n`` into slot
+``n % num_slots`` the producer sets the counter to ``2n + 1`` (odd = busy),
+copies the pixels and then sets it to ``2n + 2``. A reader samples the counter
+before and after using the slot; if it was odd, or it changed, or it does not
+belong to the requested frame, the frame is torn/stale and is discarded.
+"""
+
+import struct
+import weakref
+from collections import namedtuple
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+
+MAGIC = b"FIRA"
+VERSION = 2
+
+# magic, version, header_size, width, height, channels, dtype, num_slots,
+# slot_size, control_offset, data_offset, num_planes
+HEADER_FORMAT = "<4sHHIII8sIQQQI"
+HEADER_SIZE = 64
+ALIGNMENT = 64
+
+# name, width, height, channels, dtype, offset within the slot
+PLANE_FORMAT = "<16sIII8sQ"
+PLANE_ENTRY_SIZE = 48
+PRIMARY_PLANE = "frame"
+
+DEFAULT_NAME = "cam0"
+DEFAULT_SLOTS = 4
+
+
+def _align(value, alignment=ALIGNMENT):
+    return (value + alignment - 1) // alignment * alignment
+
+
+def _attach_untracked(name):
+    # Before Python 3.13 attaching registers the segment with the resource
+    # tracker, which unlinks it (under the producer's feet) when a consumer
+    # exits. Only the creator should own the segment's lifetime.
+    try:
+        return SharedMemory(name=name, create=False, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return SharedMemory(name=name, create=False)
+    finally:
+        resource_tracker.register = register
+
+
+Plane = namedtuple("Plane", "name shape dtype offset")
+
+
+def _shape(width, height, channels):
+    return (height, width) if channels == 1 else (height, width, channels)
+
+
+class FrameRing:
+    """A fixed number of frame slots in one shared-memory segment.
+
+    Use :meth:`create` in the producer and :meth:`attach` in consumers.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        buf = shm.buf
+
+        (magic, version, header_size, width, height, channels, dtype,
+         num_slots, slot_size, control_offset,
+         data_offset, num_planes) = struct.unpack_from(HEADER_FORMAT, buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"Shared memory '{shm.name}' is not a frame ring")
+        if version != VERSION:
+            raise ValueError(
+                f"Frame ring version {version} is not supported (expected {VERSION})")
+
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.dtype = np.dtype(dtype.rstrip(b"\0").decode())
+        self.num_slots = num_slots
+        self.slot_size = slot_size
+        self.data_offset = data_offset
+        self.shape = _shape(width, height, channels)
+        self.frame_size = height * width * channels * self.dtype.itemsize
+
+        self.planes = {}
+        for i in range(num_planes):
+            (name, p_width, p_height, p_channels, p_dtype,
+             offset) = struct.unpack_from(PLANE_FORMAT, buf, header_size + i * PLANE_ENTRY_SIZE)
+            name = name.rstrip(b"\0").decode()
+            self.planes[name] = Plane(name, _shape(p_width, p_height, p_channels),
+                                      np.dtype(p_dtype.rstrip(b"\0").decode()), offset)
+        self.primary = next(iter(self.planes))
+
+        # Every array below, and every view handed out, is a view of this
+        # one: the segment stays mapped until the last of them is freed,
+        # then the finalizer unmaps it (see close())
+        self._root = np.frombuffer(buf, dtype=np.uint8)
+        self._unmap = weakref.finalize(self._root.base, shm.close)
+        # A caller may still hold a frame view when the interpreter exits
+        self._unmap.atexit = False
+
+        def array(offset, dtype, shape):
+            dtype = np.dtype(dtype)
+            size = int(np.prod(shape)) * dtype.itemsize
+            return self._root[offset:offset + size].view(dtype).reshape(shape)
+
+        # control[0] is the write index, control[1 + i] the seqlock of slot i
+        self._control = array(control_offset, np.uint64, (1 + num_slots,))
+        self._seq = self._control[1:]
+        self._plane_slots = {
+            plane.name: [array(data_offset + i * slot_size + plane.offset, plane.dtype,
+                               plane.shape)
+                         for i in range(num_slots)]
+            for plane in self.planes.values()
+        }
+        self._slots = self._plane_slots[self.primary]
+
+    @classmethod
+    def create(cls, name=DEFAULT_NAME, shape=(480, 640, 3), dtype=np.uint8,
+               num_slots=DEFAULT_SLOTS, planes=None, replace=False):
+        """Create a new ring.
+
+        ``planes`` is a list of ``(name, shape, dtype)``, the first being the
+        primary plane; it replaces ``shape`` and ``dtype``, which otherwise
+        describe the single plane ``"frame"``.
+
+        An existing segment called ``name`` may belong to a running producer,
+        so it raises FileExistsError; ``replace=True`` unlinks it instead, for
+        a caller that knows the segment is a stale one of its own.
+        """
+        if planes is None:
+            planes = [(PRIMARY_PLANE, shape, dtype)]
+        if not planes:
+            raise ValueError("A frame ring needs at least one plane")
+
+        entries = []
+        offset = 0
+        for plane_name, plane_shape, plane_dtype in planes:
+            encoded = plane_name.encode()
+            if len(encoded) > 16:
+                raise ValueError(f"Plane name '{plane_name}' is longer than 16 bytes")
+            plane_dtype = np.dtype(plane_dtype)
+            height, width = plane_shape[:2]
+            channels = plane_shape[2] if len(plane_shape) > 2 else 1
+            entries.append((encoded, width, height, channels, plane_dtype, offset))
+            offset = _align(offset + height * width * channels * plane_dtype.itemsize)
+        if len({entry[0] for entry in entries}) != len(entries):
+            raise ValueError("Plane names must be unique")
+
+        control_offset = HEADER_SIZE + PLANE_ENTRY_SIZE * len(entries)
+        data_offset = _align(control_offset + 8 * (1 + num_slots))
+        slot_size = offset
+        size = data_offset + num_slots * slot_size
+
+        try:
+            shm = SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            if not replace:
+                raise FileExistsError(
+                    f"Shared memory '{name}' already exists: another process is using "
+                    f"it, or a crashed one left it behind (remove {name} from /dev/shm)"
+                ) from None
+            stale = SharedMemory(name=name, create=False)
+            stale.close()
+            stale.unlink()
+            shm = SharedMemory(name=name, create=True, size=size)
+
+        shm.buf[:data_offset] = bytes(data_offset)
+        _, width, height, channels, dtype, _ = entries[0]
+        struct.pack_into(
+            HEADER_FORMAT, shm.buf, 0,
+            MAGIC, VERSION, HEADER_SIZE, width, height, channels,
+            dtype.str.encode(), num_slots, slot_size, control_offset, data_offset,
+            len(entries))
+        for i, (encoded, width, height, channels, dtype, offset) in enumerate(entries):
+            struct.pack_into(PLANE_FORMAT, shm.buf, HEADER_SIZE + i * PLANE_ENTRY_SIZE,
+                             encoded, width, height, channels, dtype.str.encode(), offset)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=DEFAULT_NAME):
+        """Attach to an existing ring. Raises FileNotFoundError if there is none."""
+        return cls(_attach_untracked(name))
+
+    def _slots_of(self, plane):
+        if plane is None:
+            return self._slots
+        try:
+            return self._plane_slots[plane]
+        except KeyError:
+            raise KeyError(f"Frame ring has no plane '{plane}' "
+                           f"(planes: {', '.join(self.planes)})") from None
+
+    # --- Producer side ---
+
+    @property
+    def write_index(self):
+        """Number of frames committed so far; the latest frame id is this minus one."""
+        return int(self._control[0])
+
+    def slot_of(self, frame_id):
+        return frame_id % self.num_slots
+
+    def begin_write(self):
+        """Mark the next slot busy and return ``(frame_id, view)`` to fill in."""
+        frame_id = self.write_index
+        slot = frame_id % self.num_slots
+        self._seq[slot] = 2 * frame_id + 1
+        return frame_id, self._slots[slot]
+
+    def commit(self, frame_id):
+        """Publish a frame started with :meth:`begin_write`."""
+        self._seq[frame_id % self.num_slots] = 2 * frame_id + 2
+        self._control[0] = frame_id + 1
+
+    def write(self, frame):
+        """Copy a whole frame into the next slot and return its frame id."""
+        frame_id, view = self.begin_write()
+        np.copyto(view, frame.reshape(self.shape), casting="no")
+        self.commit(frame_id)
+        return frame_id
+
+    # --- Consumer side ---
+
+    def view(self, frame_id, plane=None):
+        """Zero-copy view of the slot holding ``frame_id`` (its primary plane by default).
+
+        The contents may be overwritten at any time; call :meth:`is_valid`
+        after using the view to find out whether it was torn.
+        """
+        return self._slots_of(plane)[frame_id % self.num_slots]
+
+    def is_valid(self, frame_id):
+        """True if ``frame_id`` is committed and still present in its slot."""
+        if frame_id < 0:
+            return False
+        return int(self._seq[frame_id % self.num_slots]) == 2 * frame_id + 2
+
+    def read(self, frame_id, out=None, plane=None):
+        """Copy ``frame_id`` into ``out``. Returns the frame, or None if it was torn."""
+        if not self.is_valid(frame_id):
+            return None
+        source = self._slots_of(plane)[frame_id % self.num_slots]
+        if out is None:
+            out = np.empty_like(source)
+        np.copyto(out, source)
+        if not self.is_valid(frame_id):
+            return None
+        return out
+
+    def read_latest(self, out=None, retries=8, plane=None):
+        """Copy the newest complete frame, retrying if the writer overtakes us.
+
+        Returns ``(frame_id, frame)`` or ``(None, None)`` if nothing was
+        published yet or every attempt was torn.
+        """
+        for _ in range(retries):
+            frame_id = self.write_index - 1
+            if frame_id < 0:
+                break
+            frame = self.read(frame_id, out, plane)
+            if frame is not None:
+                return frame_id, frame
+        return None, None
+
+    def empty_frame(self, plane=None):
+        """Allocate an array with the geometry of a plane (for ``out=``)."""
+        if plane is None:
+            return np.empty(self.shape, dtype=self.dtype)
+        return np.empty(self.planes[plane].shape, dtype=self.planes[plane].dtype)
+
+    # --- Lifecycle ---
+
+    def close(self):
+        """Drop this ring's views of the segment.
+
+        The segment is unmapped as soon as no frame view is left, which is
+        right away unless the caller still holds one.
+        """
+        self._root = None
+        self._slots = []
+        self._plane_slots = {}
+        self._seq = None
+        self._control = None
+
+    def unlink(self):
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        if self.owner:
+            self.unlink()
@@ -0,0 +1,73 @@
+"""Capture loop pacing.
+
+The scheduler runs either free (publish every frame as soon as it is
+captured) or paced to a target FPS. Paced mode sleeps until the next tick of
+a fixed schedule on the monotonic clock instead of sleeping a fixed period
+after each frame, so processing time and sleep overshoot do not accumulate
+as drift.
+"""
+
+import struct
+import time
+
+
+# frames, dropped, overruns
+STATS_FORMAT = ">QQQ"
+
+
+class CaptureScheduler:
+    """Paces the producer loop and counts dropped frames and overruns.
+
+    ``target_fps=None`` (or 0) runs free. Call :meth:`wait` at the top of each
+    iteration, then :meth:`frame_done` or :meth:`frame_dropped`.
+
+    An overrun is an iteration that started more than one period late; the
+    ticks it missed are counted as dropped frames and the schedule skips
+    ahead instead of trying to catch up with a burst of frames.
+    """
+
+    def __init__(self, target_fps=None, clock=time.monotonic, sleep=time.sleep):
+        self.period = 1.0 / target_fps if target_fps else 0.0
+        self.clock = clock
+        self.sleep = sleep
+        self.frames = 0
+        self.dropped = 0
+        self.overruns = 0
+        self._next_tick = None
+
+    @property
+    def paced(self):
+        return self.period > 0
+
+    def wait(self):
+        """Block until the next tick (no-op when free-running)."""
+        if not self.paced:
+            return
+
+        now = self.clock()
+        if self._next_tick is None:
+            self._next_tick = now
+        elif now < self._next_tick:
+            self.sleep(self._next_tick - now)
+        else:
+            late = now - self._next_tick
+            if late > self.period:
+                missed = int(late // self.period)
+                self.overruns += 1
+                self.dropped += missed
+                self._next_tick += missed * self.period
+        self._next_tick += self.period
+
+    def frame_done(self):
+        self.frames += 1
+
+    def frame_dropped(self):
+        self.dropped += 1
+
+    def pack_stats(self):
+        return struct.pack(STATS_FORMAT, self.frames, self.dropped, self.overruns)
+
+
+def unpack_stats(data):
+    """Decode a stats message into ``(frames, dropped, overruns)``."""
+    return struct.unpack(STATS_FORMAT, data)
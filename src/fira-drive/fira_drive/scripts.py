@@ -0,0 +1,33 @@
+"""Load the numbered ``perception-tests`` scripts as modules.
+
+Their file names (``05_birds_eye.py``) are not importable, so the
+benchmarks and the scripts that reuse another script's step load them by
+name:
+
+    morphological_ops = load_step("06_morphological_ops", "morphological_ops")
+
+Every call executes the script again and returns a new module with its
+own buffers; a script's ``main()`` only runs when it is started directly.
+"""
+
+import importlib.util
+from pathlib import Path
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parents[1] / "perception-tests"
+
+
+def load_script(script):
+    """The script ``perception-tests/<script>.py`` as a new module."""
+    path = SCRIPTS_DIR / f"{script}.py"
+    if not path.is_file():
+        raise FileNotFoundError(f"No perception-tests script '{script}'")
+    spec = importlib.util.spec_from_file_location(f"perception_tests_{script}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_step(script, name):
+    """The function (or other attribute) ``name`` of a freshly loaded script."""
+    return getattr(load_script(script), name)
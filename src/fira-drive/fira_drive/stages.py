@@ -0,0 +1,137 @@
+"""Pipeline operations wrapping the OpenCV calls used by the perception steps.
+
+Each factory returns an :class:`Op`, whose ``key`` (operation name plus
+parameters) lets :class:`~fira_drive.pipeline.Pipeline` recognise identical
+stages and compute them once. Ops that write a full-size image accept a
+preallocated output buffer, passed to OpenCV as its ``dst`` argument.
+"""
+
+import cv2
+import numpy as np
+
+from . import geometry
+from .colour_mask import LANE_RULES, ColourMask, normalize_rules
+from .lighting import LightingNormalizer
+
+
+def _freeze(value):
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.shape, value.dtype.str, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class Op:
+    """A callable pipeline operation with hashable identifying parameters.
+
+    ``out`` names the keyword through which ``func`` accepts a destination
+    array (``"dst"`` for most OpenCV calls), or None if its output size is
+    not known in advance. ``key`` replaces the parameters in the identity
+    when they are large derived data (e.g. remap tables) that are fully
+    determined by something smaller. ``segments`` marks ops that return
+    ``(x1, y1, x2, y2)`` line segments rather than an image, so a pipeline
+    running on an ROI can map them back to full-frame coordinates.
+    """
+
+    def __init__(self, name, func, out="dst", key=None, segments=False, **params):
+        self.name = name
+        self.func = func
+        self.out = out
+        self.segments = segments
+        self.params = params
+        self.key = (name, _freeze(params) if key is None else _freeze(key))
+
+    def __call__(self, *inputs, out=None):
+        if out is not None and self.out is not None:
+            return self.func(*inputs, **self.params, **{self.out: out})
+        return self.func(*inputs, **self.params)
+
+    def __repr__(self):
+        args = ", ".join(f"{k}={v!r}" for k, v in self.params.items())
+        return f"{self.name}({args})"
+
+
+def _threshold(src, thresh, maxval, type, dst=None):
+    return cv2.threshold(src, thresh, maxval, type, dst=dst)[1]
+
+
+_clahe_engines = {}
+
+def _clahe(src, clip_limit, tile_grid_size, dst=None):
+    engine = _clahe_engines.get((clip_limit, tile_grid_size))
+    if engine is None:
+        engine = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size)
+        _clahe_engines[(clip_limit, tile_grid_size)] = engine
+    return engine.apply(src, dst=dst)
+
+
+def cvt_color(code):
+    return Op("cvtColor", cv2.cvtColor, code=code)
+
+
+def gaussian_blur(ksize=(5, 5), sigma=0):
+    return Op("GaussianBlur", cv2.GaussianBlur, ksize=tuple(ksize), sigmaX=sigma)
+
+
+def median_blur(ksize=5):
+    return Op("medianBlur", cv2.medianBlur, ksize=ksize)
+
+
+def threshold(thresh=200, maxval=255, type=cv2.THRESH_BINARY):
+    return Op("threshold", _threshold, thresh=thresh, maxval=maxval, type=type)
+
+
+def morphology(op, kernel):
+    return Op("morphologyEx", cv2.morphologyEx, op=op, kernel=kernel)
+
+
+def canny(threshold1, threshold2):
+    return Op("Canny", cv2.Canny, out="edges", threshold1=threshold1, threshold2=threshold2)
+
+
+def warp_perspective(matrix, dsize):
+    return Op("warpPerspective", cv2.warpPerspective, M=matrix, dsize=tuple(dsize))
+
+
+def remap(maps, key):
+    """Warp through precomputed maps (see :class:`~fira_drive.geometry.GeometryCache`).
+
+    ``key`` identifies the maps, typically the calibration they came from.
+    """
+    return Op("remap", geometry.remap, key=key, maps=maps)
+
+
+def clahe(clip_limit=2.0, tile_grid_size=(8, 8)):
+    return Op("CLAHE", _clahe, clip_limit=clip_limit, tile_grid_size=tuple(tile_grid_size))
+
+
+_colour_masks = {}
+
+def colour_mask(rules=LANE_RULES, bits=8):
+    """Lane paint mask through a :class:`~fira_drive.colour_mask.ColourMask` table.
+
+    Tables are built here, at declaration, and shared by identical stages.
+    """
+    rules = normalize_rules(rules)
+    engine = _colour_masks.get((rules, bits))
+    if engine is None:
+        engine = ColourMask(rules, bits)
+        _colour_masks[(rules, bits)] = engine
+    return Op("colourMask", engine, key=(rules, bits))
+
+
+def normalize_lighting(clip_limit=2.0, step=4, drift=6.0):
+    """:class:`~fira_drive.lighting.LightingNormalizer` on a grayscale input.
+
+    The op keeps the running statistics, so each pipeline needs its own.
+    """
+    normalizer = LightingNormalizer(clip_limit=clip_limit, step=step, drift=drift)
+    return Op("normalizeLighting", normalizer, key=(clip_limit, step, drift))
+
+
+def hough_lines_p(threshold=50, min_line_length=50, max_line_gap=10, rho=1, theta=np.pi / 180):
+    return Op("HoughLinesP", cv2.HoughLinesP, out=None, segments=True, rho=rho, theta=theta, threshold=threshold,
+              minLineLength=min_line_length, maxLineGap=max_line_gap)
@@ -0,0 +1,89 @@
+"""Frame subscriber: waits for frame metadata and reads the frame from the ring."""
+
+import zmq
+
+from . import trace
+from .metadata import unpack_metadata
+
+
+DEFAULT_ENDPOINT = "tcp://localhost:5555"
+DEFAULT_TOPIC = b"cam0_metadata"
+
+
+class FrameSubscriber:
+    """Receives frame notifications and copies the announced frames out of a ring.
+
+    By default every notification is handled in order, like the original
+    perception loops. With ``latest_only=True`` the subscriber drains all
+    queued notifications before reading and keeps only the newest, so a
+    consumer slower than the camera always works on the freshest frame
+    instead of falling further behind.
+
+    ZMQ_CONFLATE cannot be used here because it does not support multipart
+    messages, which is how metadata is published.
+
+    ``plane`` selects which plane of the ring is read (the primary one by
+    default; see :mod:`fira_drive.planes`).
+    """
+
+    def __init__(self, ring, endpoint=DEFAULT_ENDPOINT, topic=DEFAULT_TOPIC,
+                 latest_only=False, context=None, plane=None):
+        self.ring = ring
+        self.plane = plane
+        self.latest_only = latest_only
+        self.context = context or zmq.Context.instance()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.connect(endpoint)
+        self.socket.setsockopt(zmq.SUBSCRIBE, topic)
+
+        # Frames the consumer never got to see: drained notifications, gaps in
+        # the frame ids and frames overwritten before they could be copied
+        self.skipped = 0
+        self._last_frame_id = None
+
+    def recv_metadata(self, timeout_ms=None):
+        """Wait for the next notification and return its metadata.
+
+        In latest-only mode all queued notifications are drained first and
+        only the newest is returned. Returns None if ``timeout_ms`` expires.
+        """
+        if timeout_ms is not None and not self.socket.poll(timeout_ms):
+            return None
+        meta = unpack_metadata(self.socket.recv_multipart()[1])
+        if self.latest_only:
+            while True:
+                try:
+                    parts = self.socket.recv_multipart(zmq.NOBLOCK)
+                except zmq.Again:
+                    break
+                meta = unpack_metadata(parts[1])
+
+        if self._last_frame_id is not None:
+            self.skipped += max(meta.frame_id - self._last_frame_id - 1, 0)
+        self._last_frame_id = meta.frame_id
+        return meta
+
+    def recv(self, out=None, timeout_ms=None):
+        """Return ``(meta, frame)`` for the next readable frame.
+
+        ``out`` is the destination buffer (see ``FrameRing.empty_frame(plane)``).
+        Returns ``(None, None)`` if ``timeout_ms`` expires first.
+        """
+        while True:
+            meta = self.recv_metadata(timeout_ms)
+            if meta is None:
+                return None, None
+            with trace.span("ring_read", meta.frame_id):
+                frame = self.ring.read(meta.frame_id, out=out, plane=self.plane)
+            if frame is not None:
+                return meta, frame
+            self.skipped += 1
+
+    def close(self):
+        self.socket.close(linger=0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,144 @@
+"""Pairing frames of several cameras by capture time.
+
+Cameras in the capture daemon (see :mod:`fira_drive.cameras`) run free and
+independently, so their frames are not captured together. A consumer that
+needs synchronised views subscribes to all of them and pairs frames whose
+``capture_ns`` lie within a tolerance of each other:
+
+    with SyncedFrameSource(["cam0", "cam1"], tolerance_ms=10) as source:
+        for metas, frames in source:
+            left, right = frames["cam0"], frames["cam1"]
+            ...
+
+Frames that find no partner in time are dropped and counted in
+``unpaired``; neither camera is slowed down to wait for the other.
+"""
+
+import time
+from collections import deque
+
+import zmq
+
+from .metadata import unpack_metadata
+from .ring import FrameRing
+
+
+DEFAULT_ENDPOINT = "tcp://localhost:5555"
+DEFAULT_TOLERANCE_MS = 10.0
+DEFAULT_DEPTH = 4
+
+
+class FramePairer:
+    """Matches metadata from several cameras into sets with close capture times.
+
+    Each camera keeps its last ``depth`` unmatched frames. When a frame
+    arrives, the closest pending frame of every other camera is looked up;
+    if all of them lie within ``tolerance_ns`` of it, the set is returned
+    and every pending frame up to the matched ones is discarded, so each
+    frame is used at most once and sets come out in capture order.
+    """
+
+    def __init__(self, names, tolerance_ns, depth=DEFAULT_DEPTH):
+        if len(names) < 2:
+            raise ValueError("Pairing needs at least two cameras")
+        self.names = list(names)
+        self.tolerance_ns = tolerance_ns
+        self.pending = {name: deque(maxlen=depth) for name in self.names}
+        self.pairs = 0
+        self.unpaired = 0
+
+    def add(self, name, meta):
+        """Add a frame of camera ``name``; return ``{name: meta}`` once a set is complete."""
+        pending = self.pending[name]
+        if len(pending) == pending.maxlen:
+            self.unpaired += 1
+        pending.append(meta)
+
+        matched = {name: meta}
+        for other in self.names:
+            if other == name:
+                continue
+            candidates = self.pending[other]
+            if not candidates:
+                return None
+            best = min(candidates, key=lambda m: abs(m.capture_ns - meta.capture_ns))
+            if abs(best.capture_ns - meta.capture_ns) > self.tolerance_ns:
+                return None
+            matched[other] = best
+
+        for other, chosen in matched.items():
+            candidates = self.pending[other]
+            while candidates:
+                dropped = candidates.popleft()
+                if dropped is chosen:
+                    break
+                self.unpaired += 1
+        self.pairs += 1
+        return matched
+
+
+class SyncedFrameSource:
+    """Iterates over synchronised ``(metas, frames)`` of several cameras.
+
+    ``metas`` and ``frames`` are dicts keyed by camera name; the frames are
+    zero-copy ring views like :class:`~fira_drive.frames.FrameSource`
+    hands out, so call :meth:`is_valid` after using them. Raises
+    FileNotFoundError if a camera's ring does not exist yet.
+    """
+
+    def __init__(self, names, endpoint=DEFAULT_ENDPOINT, tolerance_ms=DEFAULT_TOLERANCE_MS,
+                 context=None):
+        self.rings = {name: FrameRing.attach(name) for name in names}
+        # Pending frames older than the ring would already be overwritten
+        depth = min(ring.num_slots for ring in self.rings.values())
+        self.pairer = FramePairer(names, int(tolerance_ms * 1e6), depth)
+        self.context = context or zmq.Context.instance()
+        self.socket = self.context.socket(zmq.SUB)
+        self.socket.connect(endpoint)
+        self._topics = {}
+        for name in names:
+            topic = f"{name}_metadata".encode()
+            self._topics[topic] = name
+            self.socket.setsockopt(zmq.SUBSCRIBE, topic)
+
+    @property
+    def unpaired(self):
+        """Frames dropped without a partner, or overwritten before use."""
+        return self.pairer.unpaired
+
+    def next(self, timeout_ms=None):
+        """Return the next synchronised ``(metas, frames)``, or ``(None, None)`` on timeout."""
+        deadline = None if timeout_ms is None else time.monotonic() + timeout_ms / 1e3
+        while True:
+            if deadline is not None:
+                remaining = max(int((deadline - time.monotonic()) * 1e3), 0)
+                if not self.socket.poll(remaining):
+                    return None, None
+            topic, data = self.socket.recv_multipart()
+            metas = self.pairer.add(self._topics[topic], unpack_metadata(data))
+            if metas is None:
+                continue
+            if self.is_valid(metas):
+                return metas, {name: self.rings[name].view(meta.frame_id)
+                               for name, meta in metas.items()}
+            self.pairer.unpaired += len(metas)
+
+    def __iter__(self):
+        while True:
+            yield self.next()
+
+    def is_valid(self, metas):
+        """True if none of the frames in ``metas`` has been overwritten yet."""
+        return all(self.rings[name].is_valid(meta.frame_id) for name, meta in metas.items())
+
+    def close(self):
+        self.socket.close(linger=0)
+        # Only detach: the rings belong to the capture daemon
+        for ring in self.rings.values():
+            ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,224 @@
+"""Per-stage timing spans, off unless enabled.
+
+    from fira_drive import trace
+
+    with trace.span("canny", frame_id):
+        edges = cv2.Canny(blur, 100, 300)
+
+Each span is a fixed-size record (stage, frame id, start and end from
+``time.monotonic_ns()``) in a preallocated per-process ring; old records
+are overwritten when it wraps. Records are only ever appended by index, so
+recording takes no lock. When tracing is disabled :func:`span` returns a
+shared no-op context manager, which costs about as much as the ``with``
+statement itself. Per-stage hot loops test ``trace.tracer.enabled`` and call
+:func:`record` instead, which costs a flag test when disabled:
+
+    if trace.tracer.enabled:
+        start_ns = time.monotonic_ns()
+    ...
+    if trace.tracer.enabled:
+        trace.record("stage", start_ns, time.monotonic_ns())
+
+Tracing is enabled with :func:`enable`, or for a whole run through the
+``FIRA_TRACE`` environment variable:
+
+    FIRA_TRACE=1            print p50/p99/max per stage when the process exits
+    FIRA_TRACE=run.json     also write a Chrome trace (chrome://tracing,
+                            ui.perfetto.dev) to run.<pid>.json
+
+Capture-to-result latency is recorded as a span from the frame's
+``capture_ns`` (the producer's monotonic clock, shared by all processes on
+the host) to the moment the result is ready.
+"""
+
+import atexit
+import itertools
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+
+DEFAULT_CAPACITY = 1 << 16
+
+SPAN_DTYPE = np.dtype([
+    ("stage", "<u2"),
+    ("frame_id", "<i8"),
+    ("start_ns", "<i8"),
+    ("end_ns", "<i8"),
+])
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "stage", "frame_id", "start_ns")
+
+    def __init__(self, tracer, stage, frame_id):
+        self.tracer = tracer
+        self.stage = stage
+        self.frame_id = frame_id
+
+    def __enter__(self):
+        self.start_ns = time.monotonic_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.stage, self.start_ns, time.monotonic_ns(), self.frame_id)
+        return False
+
+
+class Tracer:
+    """A ring of span records plus the stage-name table."""
+
+    def __init__(self):
+        self.enabled = False
+        self.records = None
+        self.stages = []
+        self._stage_ids = {}
+        self._counter = itertools.count()
+        self._written = 0
+
+    def enable(self, capacity=DEFAULT_CAPACITY):
+        if self.records is None or len(self.records) != capacity:
+            self.records = np.zeros(capacity, dtype=SPAN_DTYPE)
+            self.clear()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self._counter = itertools.count()
+        self._written = 0
+
+    def _stage_id(self, stage):
+        stage_id = self._stage_ids.get(stage)
+        if stage_id is None:
+            stage_id = self._stage_ids[stage] = len(self.stages)
+            self.stages.append(stage)
+        return stage_id
+
+    def span(self, stage, frame_id=-1):
+        """Context manager timing its body as ``stage``."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, frame_id)
+
+    def record(self, stage, start_ns, end_ns, frame_id=-1):
+        """Add a span measured elsewhere, e.g. capture-to-result latency."""
+        if not self.enabled:
+            return
+        # next() on itertools.count is atomic under the GIL, so concurrent
+        # writers never get the same slot
+        i = next(self._counter)
+        self.records[i % len(self.records)] = (self._stage_id(stage), frame_id, start_ns, end_ns)
+        self._written = i + 1
+
+    def spans(self):
+        """The records still in the ring, oldest first."""
+        if self.records is None:
+            return np.zeros(0, dtype=SPAN_DTYPE)
+        written = self._written
+        capacity = len(self.records)
+        if written <= capacity:
+            return self.records[:written].copy()
+        start = written % capacity
+        return np.concatenate([self.records[start:], self.records[:start]])
+
+
+def summary(tracer):
+    """``{stage: (count, p50_ms, p99_ms, max_ms)}`` over the recorded spans."""
+    spans = tracer.spans()
+    result = {}
+    for stage_id, stage in enumerate(tracer.stages):
+        mine = spans[spans["stage"] == stage_id]
+        durations = mine["end_ns"] - mine["start_ns"]
+        if len(durations) == 0:
+            continue
+        p50, p99 = np.percentile(durations, [50, 99]) / 1e6
+        result[stage] = (len(durations), p50, p99, durations.max() / 1e6)
+    return result
+
+
+def format_summary(tracer):
+    lines = [f"{'stage':<24} {'count':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}"]
+    for stage, (count, p50, p99, worst) in summary(tracer).items():
+        lines.append(f"{stage:<24} {count:7d} {p50:9.3f} {p99:9.3f} {worst:9.3f}")
+    return "\n".join(lines)
+
+
+def chrome_trace(tracer, pid=None, process_name=None):
+    """The spans as a Chrome trace-event dict (complete "X" events, microseconds)."""
+    pid = os.getpid() if pid is None else pid
+    events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0,
+               "args": {"name": process_name or os.path.basename(sys.argv[0]) or "python"}}]
+    for stage_id, frame_id, start_ns, end_ns in tracer.spans().tolist():
+        event = {"name": tracer.stages[stage_id], "ph": "X", "pid": pid, "tid": 0,
+                 "ts": start_ns / 1e3, "dur": (end_ns - start_ns) / 1e3}
+        if frame_id >= 0:
+            event["args"] = {"frame_id": frame_id}
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def dump_chrome_trace(tracer, path):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(tracer), f)
+
+
+def _null_span(stage, frame_id=-1):
+    return _NULL_SPAN
+
+
+def _null_record(stage, start_ns, end_ns, frame_id=-1):
+    pass
+
+
+# The process-wide tracer used by the fira_drive modules and scripts.
+# span() and record() are swapped for no-ops while it is disabled, so a
+# disabled span costs one call and an empty ``with``.
+tracer = Tracer()
+span = _null_span
+record = _null_record
+
+
+def enable(capacity=DEFAULT_CAPACITY):
+    global span, record
+    tracer.enable(capacity)
+    span = tracer.span
+    record = tracer.record
+
+
+def disable():
+    global span, record
+    tracer.disable()
+    span = _null_span
+    record = _null_record
+
+
+def _report_at_exit(setting):
+    print(format_summary(tracer), file=sys.stderr)
+    if setting.endswith(".json"):
+        path = f"{setting[:-len('.json')]}.{os.getpid()}.json"
+        dump_chrome_trace(tracer, path)
+        print(f"Chrome trace written to {path}", file=sys.stderr)
+
+
+_setting = os.environ.get("FIRA_TRACE", "")
+if _setting and _setting != "0":
+    enable()
+    atexit.register(_report_at_exit, _setting)
@@ -0,0 +1,312 @@
+"""Lane tracking across frames in bird's-eye coordinates.
+
+09_hough_lines searches the whole frame for lines on every frame. The
+:class:`LaneTracker` instead remembers where each lane was, predicts where
+it is now, and only looks at a narrow band around the prediction:
+
+    predict   each lane is a Kalman filter over its x position at three
+              bird's-eye rows (bottom, middle, top), i.e. a quadratic
+              x = a*y**2 + b*y + c, with a random-walk motion model
+    search    every ``row_step``-th bird's-eye row, the pixels within
+              ``margin`` of the predicted x are sampled straight from the
+              camera frame through a cached warp index table (no full
+              warp, no Canny); bright pixels give one centroid per row
+    update    a quadratic through the row centroids is the measurement;
+              its noise grows as fewer rows are covered
+    fallback  when every lane is lost (too few rows found for
+              ``max_misses`` frames), or every ``reacquire_every`` frames
+              while one is missing, the frame is warped and searched in
+              full with Canny + HoughLinesP (:meth:`detect`, thresholds
+              from ``hough``, a :class:`~fira_drive.tuning.Hough`)
+
+The left lane must stay ``min_separation`` pixels left of the right one
+at the reference rows, so both filters cannot end up on the same line.
+
+A tracked frame samples a few thousand pixels; only fallback frames pay
+for the full search. :meth:`update` returns the left and right
+polynomials (bird's-eye pixels, None while a lane is lost) and fills a
+lane result record with ``BIRDS_EYE``, plus ``TRACKED`` on tracked frames.
+"""
+
+import cv2
+import numpy as np
+
+from .geometry import GeometryCache, remap
+from .lanes import BIRDS_EYE, TRACKED, fill_lanes
+from .perception import BIRDS_EYE_SRC_PTS, birds_eye_dst_pts
+from .tuning import DEFAULT_TUNING
+
+
+# BGR weights of cv2.COLOR_BGR2GRAY in 1/256ths, for sampling brightness
+# from colour frames
+GRAY_WEIGHTS = (29, 150, 77)
+
+DETECT = "detect"
+TRACK = "track"
+
+
+class LaneFilter:
+    """Kalman filter for one lane: x at three reference rows, random walk."""
+
+    def __init__(self, rows, process_noise=3.0):
+        rows = np.asarray(rows, np.float64)
+        self.rows = rows
+        # Quadratic coefficients from the three x values
+        self._to_poly = np.linalg.inv(np.vander(rows, 3))
+        self.q = process_noise ** 2
+        self.x = None
+        self.P = None
+
+    @property
+    def active(self):
+        return self.x is not None
+
+    def reset(self, z, r):
+        self.x = np.array(z, np.float64)
+        self.P = np.diag(np.full(3, r ** 2))
+
+    def predict(self):
+        self.P = self.P + np.eye(3) * self.q
+
+    def update(self, z, r):
+        # H is the identity: the measurement is x at the same three rows
+        S = self.P + np.eye(3) * r ** 2
+        K = self.P @ np.linalg.inv(S)
+        self.x = self.x + K @ (np.asarray(z, np.float64) - self.x)
+        self.P = (np.eye(3) - K) @ self.P
+
+    def drop(self):
+        self.x = None
+        self.P = None
+
+    @property
+    def poly(self):
+        return None if self.x is None else self._to_poly @ self.x
+
+    def at_rows(self, poly):
+        return np.polyval(poly, self.rows)
+
+
+class LaneTracker:
+    """Follows the two lane lines of a camera through bird's-eye space.
+
+    ``width`` x ``height`` is the camera frame and the bird's-eye image;
+    ``src_pts`` are the bird's-eye calibration points of 05_birds_eye
+    (see :meth:`set_src_pts` for changing them). Frames may be BGR or
+    grayscale (e.g. the producer's ``gray`` plane).
+    """
+
+    def __init__(self, width, height, src_pts=BIRDS_EYE_SRC_PTS, margin=40, row_step=8,
+                 threshold=180, min_rows=8, min_coverage=0.25, max_misses=3,
+                 reacquire_every=15, min_separation=None, process_noise=3.0,
+                 measurement_noise=4.0, geometry=None, hough=DEFAULT_TUNING.hough):
+        self.width = width
+        self.height = height
+        self.hough = hough
+        self.margin = margin
+        self.threshold = threshold
+        self.min_rows = min_rows
+        self.min_coverage = min_coverage
+        self.max_misses = max_misses
+        self.reacquire_every = reacquire_every
+        self.min_separation = width / 6 if min_separation is None else min_separation
+        self.measurement_noise = measurement_noise
+
+        self.geometry = geometry or GeometryCache()
+        self.src_pts = None
+        self.set_src_pts(src_pts)
+
+        self.rows = np.arange(height - 1, -1, -row_step)
+        self.offsets = np.arange(-margin, margin + 1)
+        reference_rows = (height - 1, (height - 1) / 2, 0)
+        self.lanes = {side: LaneFilter(reference_rows, process_noise)
+                      for side in ("left", "right")}
+        self.misses = {side: 0 for side in self.lanes}
+        self.coverage = {side: 0.0 for side in self.lanes}
+
+        self.frames = 0
+        self.detections = 0
+        self.mode = None
+        self._since_detect = 0
+        self._gray = np.empty((height, width), np.uint8)
+        self._bev = np.empty((height, width), np.uint8)
+        self._blur = np.empty((height, width), np.uint8)
+        self._edges = np.empty((height, width), np.uint8)
+
+    def set_src_pts(self, src_pts):
+        """Use new calibration points. Returns True if they changed.
+
+        The warp tables are rebuilt and, since the tracked polynomials were
+        in the old bird's-eye space, the lanes are searched for again.
+        """
+        src_pts = np.float32(src_pts)
+        if self.src_pts is not None and np.array_equal(src_pts, self.src_pts):
+            return False
+        size = (self.width, self.height)
+        dst_pts = birds_eye_dst_pts(self.width, self.height)
+        self.maps = self.geometry.warp_maps(src_pts, dst_pts, size)
+        self.index = self.geometry.warp_index(src_pts, dst_pts, size, size)
+        if self.src_pts is not None:
+            self.reset()
+        self.src_pts = src_pts
+        return True
+
+    # --- Search ---
+
+    def _bright(self, frame, flat_index):
+        # np.take on the flat bytes is several times faster than fancy
+        # indexing whole pixels
+        data = frame.reshape(-1)
+        if frame.ndim == 2:
+            return data.take(flat_index) >= self.threshold
+        flat_index = flat_index * frame.shape[2]
+        luma = np.zeros(flat_index.shape, np.uint16)
+        for channel, weight in enumerate(GRAY_WEIGHTS):
+            luma += data.take(flat_index + channel).astype(np.uint16) * weight
+        return luma >= self.threshold << 8
+
+    def search(self, frame, poly, margin=None):
+        """Row centroids of bright pixels within ``margin`` of ``poly``.
+
+        Returns ``(rows, xs, coverage)``; coverage is the fraction of the
+        rows (where the prediction lies inside the image) with a centroid.
+        """
+        offsets = self.offsets if margin is None else np.arange(-margin, margin + 1)
+        predicted = np.rint(np.polyval(poly, self.rows)).astype(np.int32)
+        cols = predicted[:, None] + offsets[None, :]
+        inside = (cols >= 0) & (cols < self.width)
+        np.clip(cols, 0, self.width - 1, out=cols)
+
+        flat_index = self.index[self.rows[:, None], cols]
+        valid = inside & (flat_index >= 0)
+        bright = valid & self._bright(frame, np.maximum(flat_index, 0))
+
+        counts = bright.sum(axis=1)
+        found = counts > 0
+        xs = (bright * cols).sum(axis=1)[found] / counts[found]
+        in_view = valid.any(axis=1).sum()
+        coverage = found.sum() / in_view if in_view else 0.0
+        return self.rows[found], xs, coverage
+
+    def detect(self, frame):
+        """Full search: warp, Canny, HoughLinesP; rough polynomials per side."""
+        self.detections += 1
+        params = self.hough
+        gray = frame
+        if frame.ndim == 3:
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        bev = remap(gray, self.maps, dst=self._bev)
+        blur = cv2.GaussianBlur(bev, (5, 5), 0, dst=self._blur)
+        edges = cv2.Canny(blur, params.canny_low, params.canny_high, edges=self._edges)
+        lines = cv2.HoughLinesP(edges, 1, np.pi / 180, params.threshold,
+                                minLineLength=params.min_line_length,
+                                maxLineGap=params.max_line_gap)
+
+        polys = {"left": None, "right": None}
+        if lines is None:
+            return polys
+        segments = lines.reshape(-1, 4).astype(np.float64)
+        dx = segments[:, 2] - segments[:, 0]
+        dy = segments[:, 3] - segments[:, 1]
+        # Seen from above, lane lines run up the image
+        along = np.abs(dy) > np.abs(dx)
+        centre_x = (segments[:, 0] + segments[:, 2]) / 2
+        for side, mask in (("left", along & (centre_x < self.width / 2)),
+                           ("right", along & (centre_x >= self.width / 2))):
+            if not mask.any():
+                continue
+            points = segments[mask].reshape(-1, 2)
+            degree = 2 if np.ptp(points[:, 1]) > self.height / 2 else 1
+            poly = np.polyfit(points[:, 1], points[:, 0], degree)
+            polys[side] = np.concatenate([np.zeros(3 - len(poly)), poly])
+        return polys
+
+    # --- Per frame ---
+
+    def _measure(self, frame, poly, margin=None):
+        rows, xs, coverage = self.search(frame, poly, margin)
+        if len(rows) < self.min_rows or coverage < self.min_coverage:
+            return None, coverage
+        degree = 2 if np.ptp(rows) > self.height / 2 else 1
+        fit = np.polyfit(rows, xs, degree)
+        return np.concatenate([np.zeros(3 - len(fit)), fit]), coverage
+
+    def _noise(self, coverage):
+        # Fewer rows found: trust the measurement less
+        return self.measurement_noise / max(coverage, 0.05) ** 0.5
+
+    def _separated(self, left_x, right_x):
+        return np.all(right_x - left_x >= self.min_separation)
+
+    def _fits_beside(self, side, xs):
+        other = self.lanes["right" if side == "left" else "left"]
+        if not other.active:
+            return True
+        if side == "left":
+            return self._separated(xs, other.x)
+        return self._separated(other.x, xs)
+
+    def _needs_detection(self):
+        active = [lane.active for lane in self.lanes.values()]
+        if not any(active):
+            return True
+        return not all(active) and self._since_detect >= self.reacquire_every
+
+    def update(self, frame, frame_id=0, capture_ns=0, out=None):
+        """Track (or detect) the lanes in ``frame``; returns ``(left, right)``.
+
+        With ``out`` (see :func:`fira_drive.lanes.empty_result`) the record
+        is filled in as well.
+        """
+        self.frames += 1
+        self._since_detect += 1
+        self.mode = TRACK
+
+        for side, lane in self.lanes.items():
+            if not lane.active:
+                continue
+            lane.predict()
+            measured, coverage = self._measure(frame, lane.poly)
+            self.coverage[side] = coverage
+            if measured is None:
+                self.misses[side] += 1
+                if self.misses[side] > self.max_misses:
+                    lane.drop()
+                continue
+            self.misses[side] = 0
+            lane.update(lane.at_rows(measured), self._noise(coverage))
+
+        left, right = self.lanes["left"], self.lanes["right"]
+        if left.active and right.active and not self._separated(left.x, right.x):
+            # Both followed the same line; keep the better supported one
+            weaker = "left" if self.coverage["left"] < self.coverage["right"] else "right"
+            self.lanes[weaker].drop()
+
+        if self._needs_detection():
+            self.mode = DETECT
+            self._since_detect = 0
+            for side, rough in self.detect(frame).items():
+                lane = self.lanes[side]
+                if lane.active or rough is None:
+                    continue
+                # Refine the Hough estimate with a wider band search
+                measured, coverage = self._measure(frame, rough, margin=2 * self.margin)
+                self.coverage[side] = coverage
+                if measured is None:
+                    continue
+                xs = lane.at_rows(measured)
+                if self._fits_beside(side, xs):
+                    lane.reset(xs, self._noise(coverage))
+                    self.misses[side] = 0
+
+        left, right = self.lanes["left"].poly, self.lanes["right"].poly
+        if out is not None:
+            flags = BIRDS_EYE | (TRACKED if self.mode == TRACK else 0)
+            fill_lanes(left, right, self.width, self.height, frame_id, capture_ns,
+                       flags=flags, out=out)
+        return left, right
+
+    def reset(self):
+        for side, lane in self.lanes.items():
+            lane.drop()
+            self.misses[side] = 0
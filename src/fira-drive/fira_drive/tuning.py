@@ -0,0 +1,252 @@
+"""Track tuning parameters from ``fira-drive.toml``, reloaded while running.
+
+The thresholds and calibration points of the perception steps live under
+``[tool.fira-drive.tuning]``, one table per step:
+
+    [tool.fira-drive.tuning.canny]          # 07_canny_edges
+    low = 100
+    high = 300
+
+    [tool.fira-drive.tuning.hough]          # 09_hough_lines
+    canny_low = 50
+    canny_high = 150
+    threshold = 50
+    min_line_length = 50
+    max_line_gap = 10
+
+    [tool.fira-drive.tuning.morphology]     # 06_morphological_ops
+    threshold = 200
+    kernel = 5
+
+    [tool.fira-drive.tuning.clahe]          # 08_clahe_normalize
+    clip_limit = 2.0
+    tile_grid = [8, 8]                      # full CLAHE only (08 --clahe)
+
+    [tool.fira-drive.tuning.birds_eye]      # 05_birds_eye
+    src_pts = [[240, 300], [400, 300], [640, 450], [0, 450]]
+
+Missing tables and keys keep the values above (:data:`DEFAULT_TUNING`).
+A consumer reads :attr:`TuningWatcher.current` once per frame:
+
+    with TuningWatcher() as watcher:
+        for meta, frame in source:
+            tuning = watcher.current
+            edges = cv2.Canny(blurred, tuning.canny.low, tuning.canny.high)
+
+The scripts create their watcher in ``main()``, so importing a script's
+step (as the benchmarks do) never reads the file; the steps take their
+values as a ``params`` argument that defaults to :data:`DEFAULT_TUNING`.
+
+The watcher polls the file's modification time on its own thread, off the
+frame loop. A changed file is parsed and validated there and, if valid,
+the new immutable :class:`Tuning` replaces ``current`` in one assignment,
+so every frame is processed with one consistent set of values. An invalid
+file is reported and the previous values stay in effect.
+
+Data derived from the values is cached by its inputs (:func:`morph_kernel`,
+:class:`~fira_drive.geometry.GeometryCache` warp maps, the CLAHE engines of
+:mod:`~fira_drive.stages`), so a reload only rebuilds what changed.
+"""
+
+import functools
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .config import find_config, load_config
+
+
+Canny = namedtuple("Canny", "low high")
+Hough = namedtuple("Hough", "canny_low canny_high threshold min_line_length max_line_gap")
+Morphology = namedtuple("Morphology", "threshold kernel")
+Clahe = namedtuple("Clahe", "clip_limit tile_grid")
+BirdsEye = namedtuple("BirdsEye", "src_pts")
+Tuning = namedtuple("Tuning", "canny hough morphology clahe birds_eye")
+
+# The values the perception-tests scripts were written with
+DEFAULT_TUNING = Tuning(
+    canny=Canny(low=100, high=300),
+    hough=Hough(canny_low=50, canny_high=150, threshold=50, min_line_length=50,
+                max_line_gap=10),
+    morphology=Morphology(threshold=200, kernel=5),
+    clahe=Clahe(clip_limit=2.0, tile_grid=(8, 8)),
+    # Order: [top-left, top-right, bottom-right, bottom_left]
+    birds_eye=BirdsEye(src_pts=((240, 300), (400, 300), (640, 450), (0, 450))),
+)
+
+SECTION = "tuning"
+
+
+@functools.lru_cache(maxsize=8)
+def morph_kernel(size):
+    """Square ``size`` x ``size`` structuring element, built once per size.
+
+    The array is shared; do not modify it.
+    """
+    return np.ones((size, size), np.uint8)
+
+
+def _number(value, where, integer=False, low=None, high=None):
+    kinds = (int,) if integer else (int, float)
+    # bool is an int, but never a sensible threshold
+    if isinstance(value, bool) or not isinstance(value, kinds):
+        raise ValueError(f"{where} must be {'an integer' if integer else 'a number'}, "
+                         f"not {value!r}")
+    if low is not None and value < low:
+        raise ValueError(f"{where} = {value} is below {low}")
+    if high is not None and value > high:
+        raise ValueError(f"{where} = {value} is above {high}")
+    return value
+
+
+def _pair(value, where, **limits):
+    if not isinstance(value, (list, tuple)) or len(value) != 2:
+        raise ValueError(f"{where} must be a pair of numbers, not {value!r}")
+    return tuple(_number(v, where, **limits) for v in value)
+
+
+def _ordered(low, high, where):
+    if low > high:
+        raise ValueError(f"{where}: low ({low}) is above high ({high})")
+
+
+def _quadrilateral(points, where):
+    # getPerspectiveTransform needs four points with no three on one line;
+    # a repeated point is the degenerate case of that
+    if len(set(points)) < len(points):
+        raise ValueError(f"{where}: {points!r} repeats a point")
+    for i in range(4):
+        (ax, ay), (bx, by), (cx, cy) = (points[j] for j in range(4) if j != i)
+        if abs((bx - ax) * (cy - ay) - (by - ay) * (cx - ax)) < 1e-6:
+            raise ValueError(f"{where}: three of the points {points!r} lie on one line")
+    return points
+
+
+def _validate(tuning):
+    canny, hough, morphology, clahe, birds_eye = tuning
+    for name in Canny._fields:
+        _number(getattr(canny, name), f"canny.{name}", integer=True, low=0)
+    _ordered(canny.low, canny.high, "canny")
+    for name in Hough._fields:
+        _number(getattr(hough, name), f"hough.{name}", integer=True, low=0)
+    # HoughLinesP rejects a threshold of 0
+    _number(hough.threshold, "hough.threshold", integer=True, low=1)
+    _ordered(hough.canny_low, hough.canny_high, "hough.canny")
+    _number(morphology.threshold, "morphology.threshold", integer=True, low=0, high=255)
+    _number(morphology.kernel, "morphology.kernel", integer=True, low=1, high=31)
+    _number(clahe.clip_limit, "clahe.clip_limit", low=0)
+    tile_grid = _pair(clahe.tile_grid, "clahe.tile_grid", integer=True, low=1)
+    if not isinstance(birds_eye.src_pts, (list, tuple)) or len(birds_eye.src_pts) != 4:
+        raise ValueError(f"birds_eye.src_pts must be 4 points, not {birds_eye.src_pts!r}")
+    src_pts = _quadrilateral(tuple(_pair(point, "birds_eye.src_pts")
+                                   for point in birds_eye.src_pts), "birds_eye.src_pts")
+    # Store sequences as tuples so a Tuning is immutable and comparable
+    return tuning._replace(clahe=clahe._replace(tile_grid=tile_grid),
+                           birds_eye=birds_eye._replace(src_pts=src_pts))
+
+
+def parse_tuning(table, base=DEFAULT_TUNING):
+    """The ``[tool.fira-drive.tuning]`` ``table`` applied on top of ``base``.
+
+    Raises ValueError naming the offending entry for unknown tables or
+    keys, wrong types and out-of-range values.
+    """
+    if not isinstance(table, dict):
+        raise ValueError(f"{SECTION} must be a table")
+    sections = {}
+    for name, values in table.items():
+        if name not in Tuning._fields:
+            raise ValueError(f"Unknown tuning table '{name}' "
+                             f"(expected one of {', '.join(Tuning._fields)})")
+        section = getattr(base, name)
+        if not isinstance(values, dict):
+            raise ValueError(f"{SECTION}.{name} must be a table")
+        unknown = set(values) - set(section._fields)
+        if unknown:
+            raise ValueError(f"Unknown key(s) in {SECTION}.{name}: {', '.join(sorted(unknown))}")
+        sections[name] = section._replace(**values)
+    return _validate(base._replace(**sections))
+
+
+def load_tuning(path=None):
+    """:class:`Tuning` from the configuration file (defaults if there is none)."""
+    return parse_tuning(load_config(path).get(SECTION, {}))
+
+
+class TuningWatcher:
+    """Keeps :attr:`current` in step with the tuning in the configuration file.
+
+    The file is loaded once on construction (an invalid file raises
+    ValueError there); after :meth:`start` it is checked every ``interval``
+    seconds. Without a configuration file the defaults are used.
+    """
+
+    def __init__(self, path=None, interval=0.5):
+        self.path = path or find_config()
+        self.interval = interval
+        self.current = DEFAULT_TUNING
+        self.reloads = 0
+        self.errors = 0
+        self.error = None
+        self._stamp = None
+        self._stopping = threading.Event()
+        self._thread = None
+        if self.path is not None:
+            self._stamp = self._file_stamp()
+            self.current = load_tuning(self.path)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def check(self):
+        """Reload if the file changed since the last check. Returns True if ``current`` changed."""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            tuning = load_tuning(self.path)
+        except Exception as e:  # TOML syntax errors have their own type
+            self.errors += 1
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"Ignoring {self.path}: {self.error}")
+            return False
+        self.error = None
+        if tuning == self.current:
+            return False
+        # One reference assignment: readers see the old or the new set
+        self.current = tuning
+        self.reloads += 1
+        print(f"Reloaded tuning from {self.path}")
+        return True
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.check()
+
+    def start(self):
+        if self.path is None or self._thread is not None:
+            return self
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="tuning-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
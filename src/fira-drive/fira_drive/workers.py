@@ -0,0 +1,282 @@
+"""Run a perception step in several worker processes fed from the frame ring.
+
+    from fira_drive.workers import WorkerPool
+
+    with WorkerPool(hough_lines, workers=4) as pool:
+        for meta, lines in pool:
+            ...
+
+The supervisor subscribes to the frame metadata and only hands frame ids to
+the workers; each worker attaches to the ring itself and runs the step on a
+zero-copy view of the slot. Results come back over a ZeroMQ PULL socket and
+are yielded in frame-id order.
+
+Frames are assigned round-robin to the workers of a step. With several
+named steps (:meth:`WorkerPool.by_stage`) every frame goes to one worker
+of each step and the yielded result is a dict ``{step name: result}``.
+
+Results are pickled on their way back, so steps should return something
+compact (line segments, a lane estimate), not full images.
+
+A frame whose result has not come back ``timeout`` seconds after it was
+handed out (a worker stuck in the step without dying) is skipped, so the
+frames after it are still yielded, and the stuck worker is killed and
+replaced like one that died.
+"""
+
+import collections
+import multiprocessing as mp
+import pickle
+import signal
+import time
+
+import zmq
+
+from . import trace
+from .frames import DEFAULT_ENDPOINT
+from .ring import FrameRing
+from .subscriber import FrameSubscriber
+
+
+# Status of a frame handed to a worker
+OK = 0
+STALE = 1   # overwritten in the ring before or while the step ran
+LOST = 2    # the worker died with the frame in flight
+TIMED_OUT = 3  # no result within the pool's timeout
+
+# How often the supervisor looks for dead workers
+HEALTH_CHECK_S = 0.1
+
+
+def _worker_main(ring_name, step, tasks, endpoint, worker_id):
+    # Ctrl+C is for the supervisor, which stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    ring = FrameRing.attach(ring_name)
+    socket = zmq.Context.instance().socket(zmq.PUSH)
+    socket.connect(endpoint)
+    name = getattr(step, "__name__", "step")
+    try:
+        while True:
+            frame_id = tasks.get()
+            if frame_id is None:
+                break
+            status, result = STALE, None
+            if ring.is_valid(frame_id):
+                with trace.span(name, frame_id):
+                    result = step(ring.view(frame_id))
+                if ring.is_valid(frame_id):
+                    status = OK
+                else:
+                    result = None
+            socket.send(pickle.dumps((worker_id, frame_id, status, result), pickle.HIGHEST_PROTOCOL))
+    finally:
+        socket.close(linger=1000)
+        ring.close()
+
+
+class _Worker:
+    def __init__(self, group, step, index):
+        self.group = group
+        self.step = step
+        self.index = index
+        self.process = None
+        self.tasks = None
+        self.inflight = set()
+
+
+class WorkerPool:
+    """Supervisor for worker processes running ``step(frame) -> result``.
+
+    Each worker has at most ``depth`` frames queued. When every worker of a
+    step is busy, new frames wait in a queue of ``max_pending`` entries
+    (default: one per worker) and the oldest are dropped when it is full, so
+    the pool always catches up to the camera. A worker that dies is replaced
+    without touching the capture; its in-flight frames are skipped, and so
+    is a frame without a result ``timeout`` seconds after it was handed out.
+
+    Counters: ``frames`` (results yielded), ``dropped`` (backpressure),
+    ``stale`` (overwritten in the ring), ``lost`` (in a crashed worker),
+    ``timed_out`` and ``restarts``.
+    """
+
+    def __init__(self, step, workers=2, name="cam0", endpoint=DEFAULT_ENDPOINT,
+                 topic=None, depth=2, max_pending=None, timeout=1.0, context=None):
+        steps = step if isinstance(step, dict) else {None: step}
+        if topic is None:
+            topic = f"{name}_metadata".encode()
+        self.name = name
+        self.depth = depth
+        self.timeout = timeout
+        self.context = context or zmq.Context.instance()
+
+        self._groups = {group: [_Worker(group, func, i) for i in range(workers)]
+                        for group, func in steps.items()}
+        self._workers = [w for group in self._groups.values() for w in group]
+        self._next = dict.fromkeys(self._groups, 0)
+        if max_pending is None:
+            max_pending = workers
+        self._pending = collections.deque(maxlen=max_pending)
+        # frame_id -> [meta, {group: result}, status, deadline]; dispatched,
+        # not yet yielded
+        self._inflight = {}
+
+        self.frames = 0
+        self.dropped = 0
+        self.stale = 0
+        self.lost = 0
+        self.timed_out = 0
+        self.restarts = 0
+
+        self.results = self.context.socket(zmq.PULL)
+        port = self.results.bind_to_random_port("tcp://127.0.0.1")
+        self._results_endpoint = f"tcp://127.0.0.1:{port}"
+
+        self.ring = FrameRing.attach(name)
+        self.subscriber = FrameSubscriber(self.ring, endpoint, topic, context=self.context)
+        for worker in self._workers:
+            self._start(worker)
+
+    @classmethod
+    def by_stage(cls, steps, workers=1, **kwargs):
+        """One set of ``workers`` per named step; results are ``{name: result}``."""
+        return cls(dict(steps), workers=workers, **kwargs)
+
+    @property
+    def pids(self):
+        """Process ids of the current workers."""
+        return [worker.process.pid for worker in self._workers]
+
+    def _start(self, worker):
+        worker.tasks = mp.SimpleQueue()
+        worker.inflight = set()
+        worker.process = mp.Process(
+            target=_worker_main, daemon=True,
+            args=(self.name, worker.step, worker.tasks, self._results_endpoint,
+                  self._workers.index(worker)))
+        worker.process.start()
+
+    def _restart(self, worker):
+        # Whatever it was working on will never come back
+        for frame_id in worker.inflight:
+            entry = self._inflight.get(frame_id)
+            if entry is not None:
+                entry[2] = LOST
+        self._start(worker)
+        self.restarts += 1
+
+    def _check_workers(self):
+        for worker in self._workers:
+            if not worker.process.is_alive():
+                self._restart(worker)
+
+    def _free_worker(self, group):
+        """The next worker of ``group`` (round-robin) with room for a frame."""
+        workers = self._groups[group]
+        for i in range(len(workers)):
+            worker = workers[(self._next[group] + i) % len(workers)]
+            if len(worker.inflight) < self.depth:
+                self._next[group] = (worker.index + 1) % len(workers)
+                return worker
+        return None
+
+    def _dispatch(self):
+        while self._pending:
+            # A frame is only sent out once every step has a worker for it
+            chosen = [self._free_worker(group) for group in self._groups]
+            if None in chosen:
+                return
+            meta = self._pending.popleft()
+            if not self.ring.is_valid(meta.frame_id):
+                self.stale += 1
+                continue
+            self._inflight[meta.frame_id] = [meta, {}, OK, time.monotonic() + self.timeout]
+            for worker in chosen:
+                worker.inflight.add(meta.frame_id)
+                worker.tasks.put(meta.frame_id)
+
+    def _collect(self, message):
+        worker_id, frame_id, status, result = pickle.loads(message)
+        worker = self._workers[worker_id]
+        worker.inflight.discard(frame_id)
+        entry = self._inflight.get(frame_id)
+        if entry is None:
+            return
+        if status != OK:
+            entry[2] = entry[2] or status
+        entry[1][worker.group] = result
+
+    def _ready(self):
+        """Yield finished frames in order, stopping at the first unfinished one."""
+        while self._inflight:
+            frame_id = min(self._inflight)
+            meta, results, status, deadline = self._inflight[frame_id]
+            if status != LOST and len(results) < len(self._groups):
+                if time.monotonic() < deadline:
+                    return
+                # A worker is stuck on it; do not hold back the frames behind it
+                status = TIMED_OUT
+                for worker in self._workers:
+                    if frame_id in worker.inflight:
+                        # SIGKILL also ends a stopped process
+                        worker.process.kill()
+                        worker.process.join()
+                        worker.inflight.discard(frame_id)
+                        self._restart(worker)
+            del self._inflight[frame_id]
+            if status == OK:
+                self.frames += 1
+                trace.record("capture_to_result", meta.capture_ns, time.monotonic_ns(),
+                             meta.frame_id)
+                yield meta, results if None not in self._groups else results[None]
+            elif status == STALE:
+                self.stale += 1
+            elif status == TIMED_OUT:
+                self.timed_out += 1
+            else:
+                self.lost += 1
+
+    def __iter__(self):
+        poller = zmq.Poller()
+        poller.register(self.subscriber.socket, zmq.POLLIN)
+        poller.register(self.results, zmq.POLLIN)
+        next_check = time.monotonic()
+        while True:
+            events = dict(poller.poll(HEALTH_CHECK_S * 1e3))
+            if self.results in events:
+                while True:
+                    try:
+                        self._collect(self.results.recv(zmq.NOBLOCK))
+                    except zmq.Again:
+                        break
+            if self.subscriber.socket in events:
+                while True:
+                    meta = self.subscriber.recv_metadata(timeout_ms=0)
+                    if meta is None:
+                        break
+                    if len(self._pending) == self._pending.maxlen:
+                        self.dropped += 1
+                    self._pending.append(meta)
+            if time.monotonic() >= next_check:
+                self._check_workers()
+                next_check = time.monotonic() + HEALTH_CHECK_S
+            self._dispatch()
+            yield from self._ready()
+
+    def close(self):
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.tasks.put(None)
+        for worker in self._workers:
+            worker.process.join(timeout=1.0)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.subscriber.close()
+        self.results.close(linger=0)
+        # Only detach: the segment belongs to the producer
+        self.ring.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,60 +1,55 @@
-import struct
+import sys
+from pathlib import Path
+
 import cv2
-import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Configuration (Must match your Producer)
-NUM_SLOTS = 4
-WIDTH, HEIGHT, CHANNELS = 640, 480, 3 
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.colour_mask import ColourMask
+
+
+# White and yellow lane paint straight from BGR: the HSV ranges and gray
+# threshold are evaluated once for every colour into a lookup table, so
+# each frame is one gather instead of cvtColor + inRange + bitwise ops
+lane_colours = ColourMask()
+
+pool = BufferPool()
+
+def hsv_channels(frame):
+    # 1. Convert to HSV
+    hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=pool.array("hsv", frame.shape))
+
+    # 2. Extract individual channels for visualization
+    # H = Hue (Color), S = Saturation (Intensity), V = Value (Brightness)
+    # (views into the HSV buffer, so nothing is copied)
+    return hsv_frame[:, :, 0], hsv_frame[:, :, 1], hsv_frame[:, :, 2]
 
-# ZeroMQ Setup
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
+def lane_mask(frame):
+    return lane_colours(frame, dst=pool.array("lane_mask", frame.shape[:2]))
 
 def main():
     try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
+        source = FrameSource('cam0')
     except FileNotFoundError:
         print("Start the Producer first!")
         return
 
-    try:
-        while True:
-            parts = socket.recv_multipart()
-            sequence_number = struct.unpack('>I', parts[1])[0]
-
-            if sequence_number % 2 != 0:
-                continue
-
-            slot_index = (sequence_number // 2) % NUM_SLOTS
-            start = slot_index * BUFFER_SIZE
-            
-            # 1. Get raw BGR frame
-            raw_data = np.frombuffer(buff[start : start + BUFFER_SIZE], dtype=np.uint8)
-            frame = raw_data.reshape((HEIGHT, WIDTH, CHANNELS))
+    debug = DebugPublisher()
 
-            # 2. Convert to HSV
-            hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-            # 3. Extract individual channels for visualization
-            # H = Hue (Color), S = Saturation (Intensity), V = Value (Brightness)
-            h, s, v = cv2.split(hsv_frame)
+    with source, debug:
+        for meta, frame in source:
+            h, s, v = hsv_channels(frame)
 
             # Displaying the Hue channel is best for finding specific colors
-            cv2.imshow("Original BGR", frame)
-            cv2.imshow("HSV - Hue Channel (Colors)", h)
-            cv2.imshow("HSV - Saturation Channel", s)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+            debug.show("original", frame)
+            debug.show("hue", h)
+            debug.show("saturation", s)
+            debug.show("lane_mask", lane_mask(frame))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -1,64 +1,53 @@
-import struct
+import sys
+from pathlib import Path
+
 import cv2
-import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
 
-def main():
-    try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
-    except FileNotFoundError:
-        print("Start the Producer first!")
-        return
+pool = BufferPool()
 
-    try:
-        while True:
-            parts = socket.recv_multipart()
-            seq = struct.unpack('>I', parts[1])[0]
+def noise_filters(frame):
+    plane = frame.shape[:2]
 
-            if seq % 2 != 0: continue # Skip if not ready
+    # --- PRE-PROCESSING: NOISE FILTERS ---
+    
+    # 1. Grayscale first (Commonly done before blurring)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.array("gray", plane))
 
-            idx = (seq // 2) % NUM_SLOTS
-            start = idx * BUFFER_SIZE
-            
-            # Get raw frame
-            raw_data = np.frombuffer(buff[start : start + BUFFER_SIZE], dtype=np.uint8)
-            frame = raw_data.reshape((HEIGHT, WIDTH, CHANNELS))
+    # 2. Gaussian Blur 
+    # (5, 5) is the kernel size. Must be ODD numbers. 
+    # Larger numbers = more blur = less noise = slower processing.
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=pool.array("blurred", plane))
 
-            # --- PRE-PROCESSING: NOISE FILTERS ---
-            
-            # 1. Grayscale first (Commonly done before blurring)
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    # 3. Median Blur (Excellent for 'salt and pepper' noise)
+    # Good if you see random white/black dots.
+    median = cv2.medianBlur(gray, 5, dst=pool.array("median", plane))
 
-            # 2. Gaussian Blur 
-            # (5, 5) is the kernel size. Must be ODD numbers. 
-            # Larger numbers = more blur = less noise = slower processing.
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    return gray, blurred, median
 
-            # 3. Median Blur (Excellent for 'salt and pepper' noise)
-            # Good if you see random white/black dots.
-            median = cv2.medianBlur(gray, 5)
+def main():
+    try:
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
 
-            # Display comparisons
-            cv2.imshow("1. Original Gray", gray)
-            cv2.imshow("2. Gaussian Blur (Smoothed)", blurred)
-            cv2.imshow("3. Median Blur (Noise Removed)", median)
+    debug = DebugPublisher()
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+    with source, debug:
+        for meta, (gray, blurred, median) in source.map(noise_filters):
+            # Display comparisons
+            debug.show("gray", gray)
+            debug.show("gaussian", blurred)
+            debug.show("median", median)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
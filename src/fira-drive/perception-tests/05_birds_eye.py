@@ -1,68 +1,82 @@
-import struct
+import sys
+from pathlib import Path
+
 import cv2
 import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.geometry import GeometryCache, remap
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
 
-def main():
-    try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
-    except FileNotFoundError:
-        print("Start the Producer first!")
-        return
+# --- TUNE THESE POINTS FOR YOUR TRACK ---
+# in fira-drive.toml, [tool.fira-drive.tuning.birds_eye]: 4 points on the raw
+# image that form a TRAPEZOID on the road (these are the defaults)
+# Order: [top-left, top-right, bottom-right, bottom_left]
+SRC_PTS = np.float32(DEFAULT_TUNING.birds_eye.src_pts)
 
-    # --- TUNE THESE POINTS FOR YOUR TRACK ---
-    # Pick 4 points on the raw image that form a TRAPEZOID on the road
-    # Order: [top-left, top-right, bottom-right, bottom_left]
-    src_pts = np.float32([
-        [240, 300], [400, 300],  # Top of the road section
-        [640, 450], [0, 450]     # Bottom of the road section
-    ])
-    
+pool = BufferPool()
+# Warp maps, rebuilt only when the resolution or the points change
+geometry = GeometryCache()
+
+def make_birds_eye(width, height, src_pts=SRC_PTS):
     # Map them to a perfect RECTANGLE in the output
     dst_pts = np.float32([
-        [0, 0], [WIDTH, 0],
-        [WIDTH, HEIGHT], [0, HEIGHT]
+        [0, 0], [width, 0],
+        [width, height], [0, height]
     ])
 
-    # Calculate the transformation matrix once
-    matrix = cv2.getPerspectiveTransform(src_pts, dst_pts)
+    def birds_eye(frame, points=src_pts):
+        # Calculate the transformation as fixed-point remap tables, so each
+        # frame is a cheap table lookup instead of a full perspective warp.
+        # The cache only rebuilds them when the points change (e.g. the
+        # tuned points passed in by main()).
+        maps = geometry.warp_maps(points, dst_pts, (width, height))
+
+        # --- WARP THE IMAGE ---
+        return remap(frame, maps, dst=pool.array("bev", (height, width) + frame.shape[2:]))
+
+    return birds_eye
 
+def main():
     try:
-        while True:
-            parts = socket.recv_multipart()
-            seq = struct.unpack('>I', parts[1])[0]
-            if seq % 2 != 0: continue 
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    try:
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
 
-            idx = (seq // 2) % NUM_SLOTS
-            frame = np.frombuffer(buff[idx*BUFFER_SIZE:(idx+1)*BUFFER_SIZE], dtype=np.uint8).reshape((HEIGHT, WIDTH, CHANNELS))
+    HEIGHT, WIDTH = source.shape[:2]
+    birds_eye = make_birds_eye(WIDTH, HEIGHT)
 
-            # --- WARP THE IMAGE ---
-            bev_frame = cv2.warpPerspective(frame, matrix, (WIDTH, HEIGHT))
+    debug = DebugPublisher()
 
-            # Draw the source points on the original frame so you can see what you are warping
-            debug_frame = frame.copy()
-            for pt in src_pts:
-                cv2.circle(debug_frame, tuple(pt.astype(int)), 10, (0, 255, 0), -1)
+    with source, debug, tuning:
+        for meta, frame in source:
+            src_pts = tuning.current.birds_eye.src_pts
+            bev_frame = birds_eye(frame, src_pts)
 
-            cv2.imshow("1. Original with Source Points", debug_frame)
-            cv2.imshow("2. Bird's Eye View", bev_frame)
+            # Draw the source points on the original frame so you can see what you are warping
+            # (only on the frames that actually go to the viewer)
+            if debug.wants("source_points"):
+                debug_frame = pool.array("debug", frame.shape)
+                np.copyto(debug_frame, frame)
+                for pt in np.float32(src_pts):
+                    cv2.circle(debug_frame, tuple(pt.astype(int)), 10, (0, 255, 0), -1)
+                debug.show("source_points", debug_frame)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+            debug.show("birds_eye", bev_frame)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
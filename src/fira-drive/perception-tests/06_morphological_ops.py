@@ -1,65 +1,74 @@
-import struct
+import functools
+import sys
+from pathlib import Path
+
 import cv2
-import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher, morph_kernel
+
+
+pool = BufferPool()
+
+def morphological_ops(frame, params=DEFAULT_TUNING.morphology):
+    plane = frame.shape[:2]
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
+    # The Kernel: the "brush" used to clean the image. A 5x5 kernel is
+    # usually strong enough for FIRA tracks (built once per size).
+    kernel = morph_kernel(params.kernel)
+
+    # --- PRE-PROCESSING STEPS BEFORE MORPHOLOGY ---
+    # 1. Grayscale & Blur
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.array("gray", plane))
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=pool.array("blurred", plane))
+    
+    # 2. Thresholding (Create a binary Black & White image)
+    # This makes the "lanes" white and the road black.
+    _, binary_mask = cv2.threshold(blurred, params.threshold, 255, cv2.THRESH_BINARY,
+                                   dst=pool.array("binary", plane))
+
+    # --- STEP 6: MORPHOLOGICAL TRANSFORMATIONS ---
+    
+    # OPENING (Erosion followed by Dilation) - Removes small white noise
+    opening = cv2.morphologyEx(binary_mask, cv2.MORPH_OPEN, kernel,
+                               dst=pool.array("opening", plane))
+    
+    # CLOSING (Dilation followed by Erosion) - Fills holes in the lane
+    closing = cv2.morphologyEx(opening, cv2.MORPH_CLOSE, kernel,
+                               dst=pool.array("closing", plane))
+
+    return binary_mask, opening, closing
 
 def main():
     try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
-    except FileNotFoundError:
-        print("Start the Producer first!")
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
         return
 
-    # Define a Kernel (The "brush" used to clean the image)
-    # A 5x5 kernel is usually strong enough for FIRA tracks.
-    kernel = np.ones((5, 5), np.uint8)
-
     try:
-        while True:
-            parts = socket.recv_multipart()
-            seq = struct.unpack('>I', parts[1])[0]
-            if seq % 2 != 0: continue 
-
-            idx = (seq // 2) % NUM_SLOTS
-            frame = np.frombuffer(buff[idx*BUFFER_SIZE:(idx+1)*BUFFER_SIZE], dtype=np.uint8).reshape((HEIGHT, WIDTH, CHANNELS))
-
-            # --- PRE-PROCESSING STEPS BEFORE MORPHOLOGY ---
-            # 1. Grayscale & Blur
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-            
-            # 2. Thresholding (Create a binary Black & White image)
-            # This makes the "lanes" white and the road black.
-            _, binary_mask = cv2.threshold(blurred, 200, 255, cv2.THRESH_BINARY)
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
 
-            # --- STEP 6: MORPHOLOGICAL TRANSFORMATIONS ---
-            
-            # OPENING (Erosion followed by Dilation) - Removes small white noise
-            opening = cv2.morphologyEx(binary_mask, cv2.MORPH_OPEN, kernel)
-            
-            # CLOSING (Dilation followed by Erosion) - Fills holes in the lane
-            closing = cv2.morphologyEx(opening, cv2.MORPH_CLOSE, kernel)
+    debug = DebugPublisher()
 
-            cv2.imshow("1. Raw Binary Mask (Noisy)", binary_mask)
-            cv2.imshow("2. After Opening (Noise Removed)", opening)
-            cv2.imshow("3. After Closing (Gaps Filled)", closing)
+    @functools.wraps(morphological_ops)
+    def step(frame):
+        return morphological_ops(frame, tuning.current.morphology)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+    with source, debug, tuning:
+        for meta, (binary_mask, opening, closing) in source.map(step):
+            debug.show("binary", binary_mask)
+            debug.show("opening", opening)
+            debug.show("closing", closing)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -1,54 +1,66 @@
-import struct
+import functools
+import sys
+from pathlib import Path
+
 import cv2
-import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher
+
+
+pool = BufferPool()
+
+def canny_edges(frame, params=DEFAULT_TUNING.canny):
+    plane = frame.shape[:2]
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
+    # --- PRE-PROCESSING FOR CANNY ---
+    # Canny works best on Grayscale and Blurred images. A producer started
+    # with --planes frame gray already did the conversion once for everybody.
+    if frame.ndim == 2:
+        gray = frame
+    else:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.array("gray", plane))
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0, dst=pool.array("blurred", plane))
+
+    # --- STEP 7: CANNY EDGE DETECTION ---
+    # Syntax: cv2.Canny(image, low_threshold, high_threshold)
+    # High threshold: usually 2-3x the low threshold
+    edges = cv2.Canny(blurred, params.low, params.high, edges=pool.array("edges", plane))
+
+    return blurred, edges
 
 def main():
     try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    try:
+        source = FrameSource('cam0', plane='gray')
+    except KeyError:
+        # The producer only publishes BGR frames
+        source = FrameSource('cam0')
     except FileNotFoundError:
         print("Start the Producer first!")
         return
 
-    try:
-        while True:
-            parts = socket.recv_multipart()
-            seq = struct.unpack('>I', parts[1])[0]
-            if seq % 2 != 0: continue 
-
-            idx = (seq // 2) % NUM_SLOTS
-            frame = np.frombuffer(buff[idx*BUFFER_SIZE:(idx+1)*BUFFER_SIZE], dtype=np.uint8).reshape((HEIGHT, WIDTH, CHANNELS))
-
-            # --- PRE-PROCESSING FOR CANNY ---
-            # Canny works best on Grayscale and Blurred images
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-            # --- STEP 7: CANNY EDGE DETECTION ---
-            # Syntax: cv2.Canny(image, low_threshold, high_threshold)
-            # Low threshold: 50
-            # High threshold: 150 (Usually 3x the low threshold)
-            edges = cv2.Canny(blurred, 100, 300)
-
-            cv2.imshow("1. Blurred Grayscale", blurred)
-            cv2.imshow("2. Canny Edge Detection", edges)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+    debug = DebugPublisher()
+
+    @functools.wraps(canny_edges)
+    def step(frame):
+        return canny_edges(frame, tuning.current.canny)
+
+    with source, debug, tuning:
+        for meta, (blurred, edges) in source.map(step):
+            debug.show("blurred", blurred)
+            debug.show("edges", edges)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
@@ -1,54 +1,97 @@
-import struct
+import sys
+import argparse
+from pathlib import Path
+
 import cv2
-import numpy as np
-import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.lighting import LightingNormalizer
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
 
-def main():
-    try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
-    except FileNotFoundError:
-        return
+# CLAHE objects (Arguments: clipLimit=contrast threshold, tileGridSize=section
+# size), created the first time the tuning asks for their parameters
+clahe_engines = {}
+
+def clahe_engine(params):
+    engine = clahe_engines.get(params)
+    if engine is None:
+        engine = cv2.createCLAHE(clipLimit=params.clip_limit, tileGridSize=params.tile_grid)
+        clahe_engines[params] = engine
+    return engine
+
+# Incremental alternative on the luma plane only: running brightness
+# statistics, and the equalisation table is only rebuilt when the lighting
+# drifts; every other frame is one LUT pass. Replaced when the tuned clip
+# limit changes.
+normalizer = LightingNormalizer(clip_limit=DEFAULT_TUNING.clahe.clip_limit)
+
+pool = BufferPool()
 
-    # Create CLAHE object (Arguments: clipLimit=contrast threshold, tileGridSize=section size)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8,8))
+def clahe_normalize(frame, params=DEFAULT_TUNING.clahe):
+    # 1. Convert to YUV (Luminance + Chrominance)
+    # We only want to equalize the 'Y' (Brightness) channel to avoid weird color shifts
+    img_yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV, dst=pool.array("yuv", frame.shape))
 
-    while True:
-        parts = socket.recv_multipart()
-        seq = struct.unpack('>I', parts[1])[0]
-        if seq % 2 != 0: continue 
+    # 2. Apply CLAHE to the Y channel
+    y = cv2.extractChannel(img_yuv, 0, dst=pool.array("y", frame.shape[:2]))
+    clahe_engine(params).apply(y, dst=y)
+    cv2.insertChannel(y, img_yuv, 0)
 
-        idx = (seq // 2) % NUM_SLOTS
-        frame = np.frombuffer(buff[idx*BUFFER_SIZE:(idx+1)*BUFFER_SIZE], dtype=np.uint8).reshape((HEIGHT, WIDTH, CHANNELS))
+    # 3. Convert back to BGR
+    return cv2.cvtColor(img_yuv, cv2.COLOR_YUV2BGR, dst=pool.array("normalized", frame.shape))
 
-        # 1. Convert to YUV (Luminance + Chrominance)
-        # We only want to equalize the 'Y' (Brightness) channel to avoid weird color shifts
-        img_yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+def normalize_lighting(frame, params=DEFAULT_TUNING.clahe):
+    global normalizer
+    if normalizer.clip_limit != params.clip_limit:
+        # Every table depends on the clip limit: start over with it
+        normalizer = LightingNormalizer(clip_limit=params.clip_limit)
 
-        # 2. Apply CLAHE to the Y channel
-        img_yuv[:,:,0] = clahe.apply(img_yuv[:,:,0])
+    # Grayscale in, grayscale out. A producer started with --planes frame gray
+    # already did the conversion once for everybody.
+    return normalizer(frame, dst=pool.array("lighting", frame.shape[:2]))
 
-        # 3. Convert back to BGR
-        normalized_frame = cv2.cvtColor(img_yuv, cv2.COLOR_YUV2BGR)
+def main(full_clahe=False):
+    try:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
 
-        cv2.imshow("1. Original Frame (Shadows/Glaring)", frame)
-        cv2.imshow("2. CLAHE Normalized (Balanced Contrast)", normalized_frame)
+    try:
+        if full_clahe:
+            # CLAHE works on the luma of the BGR frame
+            source = FrameSource('cam0')
+        else:
+            try:
+                source = FrameSource('cam0', plane='gray')
+            except KeyError:
+                # The producer only publishes BGR frames
+                source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
+
+    step = clahe_normalize if full_clahe else normalize_lighting
+    debug = DebugPublisher()
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    with source, debug, tuning:
+        for meta, frame in source:
+            normalized_frame = step(frame, tuning.current.clahe)
 
-    shm.close()
-    cv2.destroyAllWindows()
+            debug.show("original", frame)
+            debug.show("normalized", normalized_frame)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Normalise the lighting of the camera frames.")
+    parser.add_argument("--clahe", action="store_true",
+                        help="run the full CLAHE (clip_limit and tile_grid) on every frame "
+                             "instead of the incremental equaliser (clip_limit only)")
+    args = parser.parse_args()
+    try:
+        main(args.clahe)
+    except KeyboardInterrupt:
+        pass
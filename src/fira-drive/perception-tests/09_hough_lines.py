@@ -1,63 +1,84 @@
-import struct
+import sys
+from pathlib import Path
+
 import cv2
 import numpy as np
 import zmq
-from multiprocessing.shared_memory import SharedMemory
 
-# Config (Must match Producer)
-NUM_SLOTS, WIDTH, HEIGHT, CHANNELS = 4, 640, 480, 3
-BUFFER_SIZE = WIDTH * HEIGHT * CHANNELS
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.lanes import LanePublisher, empty_result, fit_lanes
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher
+
+
+pool = BufferPool()
+lane_result = empty_result()
+
+def hough_lines(frame, params=DEFAULT_TUNING.hough):
+    plane = frame.shape[:2]
 
-context = zmq.Context()
-socket = context.socket(zmq.SUB)
-socket.connect("tcp://localhost:5555")
-socket.setsockopt(zmq.SUBSCRIBE, b"cam0_metadata")
+    # --- PRE-PROCESSING PIPELINE ---
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=pool.array("gray", plane))
+    blur = cv2.GaussianBlur(gray, (5, 5), 0, dst=pool.array("blur", plane))
+    edges = cv2.Canny(blur, params.canny_low, params.canny_high, edges=pool.array("edges", plane))
+
+    # --- STEP 9: HOUGH LINE DETECTION ---
+    # Parameters:
+    # 1: rho (distance resolution in pixels)
+    # np.pi/180: theta (angle resolution in radians)
+    # threshold: min votes to be a 'line'
+    # minLineLength: skip short lines
+    # maxLineGap: join segments if they are close
+    return cv2.HoughLinesP(edges, 1, np.pi/180, params.threshold,
+                           minLineLength=params.min_line_length, maxLineGap=params.max_line_gap)
 
 def main():
     try:
-        shm = SharedMemory(name='cam0', create=False)
-        buff = shm.buf
-    except FileNotFoundError:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
         return
 
     try:
-        while True:
-            parts = socket.recv_multipart()
-            seq = struct.unpack('>I', parts[1])[0]
-            if seq % 2 != 0: continue 
-
-            idx = (seq // 2) % NUM_SLOTS
-            frame = np.frombuffer(buff[idx*BUFFER_SIZE:(idx+1)*BUFFER_SIZE], dtype=np.uint8).reshape((HEIGHT, WIDTH, CHANNELS))
-
-            # --- PRE-PROCESSING PIPELINE ---
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            blur = cv2.GaussianBlur(gray, (5, 5), 0)
-            edges = cv2.Canny(blur, 50, 150)
-
-            # --- STEP 9: HOUGH LINE DETECTION ---
-            # Parameters:
-            # 1: rho (distance resolution in pixels)
-            # np.pi/180: theta (angle resolution in radians)
-            # 50: threshold (min votes to be a 'line')
-            # minLineLength: skip short lines
-            # maxLineGap: join segments if they are close
-            lines = cv2.HoughLinesP(edges, 1, np.pi/180, 50, minLineLength=50, maxLineGap=10)
-
-            # Create a copy to draw on
-            line_image = frame.copy()
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        return
+
+    # Lane results leave the process as fixed-layout records: on the
+    # cam0_lanes topic and in the cam0_lanes results ring
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind("tcp://*:5556")
+    publisher = LanePublisher(socket)
+    HEIGHT, WIDTH = source.shape[:2]
+
+    debug = DebugPublisher()
+
+    with source, debug, publisher, socket, tuning:
+        for meta, frame in source:
+            lines = hough_lines(frame, tuning.current.hough)
+            if not source.is_valid(meta):
+                # Overwritten while the step ran: never publish a torn frame
+                continue
+            fit_lanes(lines, WIDTH, HEIGHT, meta.frame_id, meta.capture_ns, out=lane_result)
+            publisher.publish(lane_result)
+
+            if not debug.wants("hough_lines"):
+                continue
+
+            # Copy into a preallocated image to draw on
+            line_image = pool.array("line_image", frame.shape)
+            np.copyto(line_image, frame)
 
             if lines is not None:
-                for line in lines:
-                    x1, y1, x2, y2 = line[0]
+                for x1, y1, x2, y2 in lines.reshape(-1, 4):
                     cv2.line(line_image, (x1, y1), (x2, y2), (0, 255, 0), 3)
 
-            cv2.imshow("Detected Hough Lines", line_image)
-
-            if cv2.waitKey(1) & 0xFF == ord('q'):
-                break
-    finally:
-        shm.close()
-        cv2.destroyAllWindows()
+            debug.show("hough_lines", line_image)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
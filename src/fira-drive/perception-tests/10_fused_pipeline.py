@@ -0,0 +1,67 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.geometry import Roi
+from fira_drive.perception import build_pipeline
+from fira_drive.tuning import TuningWatcher
+
+
+def main(outputs, roi_top=None):
+    try:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    try:
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
+
+    # One pipeline for all the steps: grayscale and blur run once per frame
+    # and every named output (gray, gaussian, closing, edges, lines, ...) is
+    # available from the same result
+    HEIGHT, WIDTH = source.shape[:2]
+    # With --roi-top the stages only process the road below that fraction of
+    # the frame; the images shown are the ROI, the lines stay in frame pixels
+    roi = Roi(top=roi_top) if roi_top else None
+    built = tuning.current
+    pipeline = build_pipeline(WIDTH, HEIGHT, roi=roi, tuning=built)
+
+    def run(frame):
+        nonlocal pipeline, built
+        if tuning.current is not built:
+            # Re-declare the stages with the new values between frames; warp
+            # maps and CLAHE engines come from caches keyed by their inputs
+            built = tuning.current
+            pipeline = build_pipeline(WIDTH, HEIGHT, roi=roi, tuning=built)
+        return pipeline.run(frame, outputs)
+
+    debug = DebugPublisher()
+
+    with source, debug, tuning:
+        for meta, results in source.map(run):
+            for name in outputs:
+                if name == "lines":
+                    # Hough segments are coordinates, not an image
+                    print(f"frame {meta.frame_id}: "
+                          f"{0 if results[name] is None else len(results[name])} lines")
+                else:
+                    debug.show(name, results[name])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run all perception steps as one pipeline.")
+    parser.add_argument("outputs", nargs="*", default=["closing", "edges", "lines"],
+                        help="stage outputs to show")
+    parser.add_argument("--roi-top", type=float, default=None,
+                        help="only process the frame below this fraction of its height, e.g. 0.5")
+    args = parser.parse_args()
+    try:
+        main(args.outputs, args.roi_top)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,50 @@
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.scripts import load_step
+from fira_drive.tuning import TuningWatcher
+from fira_drive.workers import WorkerPool
+
+
+hough_step = load_step("09_hough_lines", "hough_lines")
+# Created in main(); every worker process polls the file on its own thread
+tuning = None
+
+def hough_lines(frame):
+    # Runs in a worker process: only the segments travel back, not images
+    global tuning
+    if tuning is None:
+        tuning = TuningWatcher()
+    return hough_step(frame, tuning.start().current.hough)
+
+def main(workers):
+    global tuning
+    try:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    try:
+        pool = WorkerPool(hough_lines, workers=workers)
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
+
+    # Results arrive in frame order even though the workers finish out of order
+    with pool:
+        try:
+            for meta, lines in pool:
+                count = 0 if lines is None else len(lines)
+                print(f"frame {meta.frame_id}: {count} lines  "
+                      f"(dropped {pool.dropped}, stale {pool.stale}, restarts {pool.restarts})")
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Hough step in several worker processes.")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    main(args.workers)
@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.geometry import remap
+from fira_drive.lanes import LanePublisher, empty_result
+from fira_drive.tracking import DETECT, LaneTracker
+from fira_drive.tuning import TuningWatcher
+
+
+pool = BufferPool()
+lane_result = empty_result()
+
+STATS_INTERVAL = 300  # Print statistics every N frames
+
+def draw_lanes(tracker, frame):
+    # Bird's-eye view of the frame with the tracked lanes and search bands
+    bev = remap(frame, tracker.maps, dst=pool.array("bev", frame.shape))
+    rows = np.arange(tracker.height)
+    for side, colour in (("left", (255, 0, 0)), ("right", (0, 0, 255))):
+        poly = tracker.lanes[side].poly
+        if poly is None:
+            continue
+        xs = np.polyval(poly, rows)
+        for offset, thickness in ((0, 3), (-tracker.margin, 1), (tracker.margin, 1)):
+            points = np.stack([xs + offset, rows], axis=1).astype(np.int32)
+            cv2.polylines(bev, [points.reshape(-1, 1, 2)], False, colour, thickness)
+    return bev
+
+def main():
+    try:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    # The tracker keeps state across frames, so it works on a private copy
+    # of each frame that was checked to be intact, never on the ring slot
+    try:
+        source = FrameSource('cam0', copy=True)
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
+
+    # Same results as 09_hough_lines (which it replaces), with the
+    # polynomials in bird's-eye pixels (BIRDS_EYE flag)
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind("tcp://*:5556")
+    publisher = LanePublisher(socket)
+    HEIGHT, WIDTH = source.shape[:2]
+    applied = tuning.current
+    tracker = LaneTracker(WIDTH, HEIGHT, applied.birds_eye.src_pts, hough=applied.hough)
+
+    debug = DebugPublisher()
+
+    with source, debug, publisher, socket, tuning:
+        for meta, frame in source:
+            if tuning.current is not applied:
+                # A reload: new points rebuild the warp tables and restart the search
+                applied = tuning.current
+                tracker.hough = applied.hough
+                tracker.set_src_pts(applied.birds_eye.src_pts)
+
+            tracker.update(frame, meta.frame_id, meta.capture_ns, out=lane_result)
+            publisher.publish(lane_result)
+
+            if tracker.frames % STATS_INTERVAL == 0:
+                print(f"{tracker.frames} frames, {tracker.detections} full searches, "
+                      f"last frame: {'searched' if tracker.mode == DETECT else 'tracked'}")
+
+            if debug.wants("lane_tracking"):
+                debug.show("lane_tracking", draw_lanes(tracker, frame))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
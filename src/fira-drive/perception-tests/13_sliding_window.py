@@ -0,0 +1,81 @@
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+import zmq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fira_drive.frames import FrameSource
+from fira_drive.debug import DebugPublisher
+from fira_drive.buffers import BufferPool
+from fira_drive.lanes import BIRDS_EYE, LanePublisher, empty_result, fill_lanes
+from fira_drive.scripts import load_step
+from fira_drive.sliding_window import search_lanes
+from fira_drive.tuning import TuningWatcher
+
+
+# Reuse the bird's-eye warp of 05 and the clean mask of 06 as they are
+make_birds_eye = load_step("05_birds_eye", "make_birds_eye")
+morphological_ops = load_step("06_morphological_ops", "morphological_ops")
+
+pool = BufferPool()
+lane_result = empty_result()
+
+def draw_lanes(mask, lanes):
+    # The mask with the search windows and the fitted lanes on top
+    view = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR, dst=pool.array("view", mask.shape + (3,)))
+    rows = np.arange(mask.shape[0])
+    for side, colour in (("left", (255, 0, 0)), ("right", (0, 0, 255))):
+        poly, windows = lanes[side]
+        for x0, y0, x1, y1 in windows:
+            cv2.rectangle(view, (x0, y0), (x1 - 1, y1 - 1), (0, 255, 0), 1)
+        if poly is not None:
+            points = np.stack([np.polyval(poly, rows), rows], axis=1).astype(np.int32)
+            cv2.polylines(view, [points.reshape(-1, 1, 2)], False, colour, 3)
+    return view
+
+def main():
+    try:
+        tuning = TuningWatcher()
+    except ValueError as e:
+        print(f"Invalid tuning: {e}")
+        return
+
+    try:
+        source = FrameSource('cam0')
+    except FileNotFoundError:
+        print("Start the Producer first!")
+        return
+
+    # Lane results in bird's-eye pixels (BIRDS_EYE flag), like 12_lane_tracking
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    socket.bind("tcp://*:5556")
+    publisher = LanePublisher(socket)
+    HEIGHT, WIDTH = source.shape[:2]
+    birds_eye = make_birds_eye(WIDTH, HEIGHT)
+
+    debug = DebugPublisher()
+
+    with source, debug, publisher, socket, tuning:
+        for meta, frame in source:
+            # 05 + 06: clean binary mask of the bird's-eye view
+            params = tuning.current
+            bev = birds_eye(frame, params.birds_eye.src_pts)
+            _, _, mask = morphological_ops(bev, params.morphology)
+            lanes = search_lanes(mask)
+            if not source.is_valid(meta):
+                # Overwritten while the step ran: never publish a torn frame
+                continue
+            fill_lanes(lanes["left"][0], lanes["right"][0], WIDTH, HEIGHT,
+                       meta.frame_id, meta.capture_ns, flags=BIRDS_EYE, out=lane_result)
+            publisher.publish(lane_result)
+
+            if debug.wants("sliding_window"):
+                debug.show("sliding_window", draw_lanes(mask, lanes))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        pass
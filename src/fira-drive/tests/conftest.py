@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# The package and the benchmark scripts, as the scripts themselves import them
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
@@ -0,0 +1,36 @@
+import pytest
+
+from check_allocations import STEPS, peak_growth, synthetic_frames
+from fira_drive.perception import build_pipeline
+from fira_drive.scripts import load_step
+
+
+WIDTH, HEIGHT = 640, 480
+WARMUP = 3
+# One 640x480 gray plane is 300 KiB; the check script's default allowance
+LIMIT = 64 * 1024
+
+
+@pytest.fixture(scope="module")
+def frames():
+    return synthetic_frames(WARMUP + 10, WIDTH, HEIGHT)
+
+
+def step_of(name):
+    if name == "05_birds_eye":
+        return load_step("05_birds_eye", "make_birds_eye")(WIDTH, HEIGHT)
+    if name == "fused pipeline":
+        return build_pipeline(WIDTH, HEIGHT).run
+    return load_step(name, STEPS[name])
+
+
+@pytest.mark.parametrize("name", [*STEPS, "05_birds_eye", "fused pipeline"])
+def test_step_does_not_allocate_per_frame(name, frames):
+    assert peak_growth(step_of(name), frames, WARMUP) <= LIMIT
+
+
+def test_check_catches_a_step_that_allocates(frames):
+    def allocating(frame):
+        return frame.copy()
+
+    assert peak_growth(allocating, frames, WARMUP) > LIMIT
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pytest
+
+from fira_drive.archive import FrameArchive
+from fira_drive.ring import FrameRing
+
+
+SHAPE = (4, 6, 3)
+
+
+def frames(count):
+    return [np.full(SHAPE, i, np.uint8) for i in range(count)]
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "lap.fira"
+    with FrameArchive.create(path, SHAPE, capacity=5) as archive:
+        for i, frame in enumerate(frames(3)):
+            assert archive.append(frame, frame_id=10 + i, capture_ns=1000 * i) == i
+
+    archive = FrameArchive.open(path)
+    assert (len(archive), archive.capacity, archive.shape) == (3, 5, SHAPE)
+    for i, frame in enumerate(frames(3)):
+        assert np.array_equal(archive.frames[i], frame)
+        assert tuple(archive.index[i])[:2] == (10 + i, 1000 * i)
+    archive.close()
+
+
+def test_full_archive_refuses_frames(tmp_path):
+    archive = FrameArchive.create(tmp_path / "lap.fira", SHAPE, capacity=2)
+    for frame in frames(2):
+        archive.append(frame, 0, 0)
+    assert archive.append(frames(1)[0], 0, 0) is None
+    assert len(archive) == 2
+    archive.close()
+
+
+def test_close_trim_keeps_only_written_records(tmp_path):
+    path = tmp_path / "lap.fira"
+    archive = FrameArchive.create(path, SHAPE, capacity=100)
+    for i, frame in enumerate(frames(3)):
+        archive.append(frame, i, i)
+    data_offset = archive.frames.offset
+    archive.close(trim=True)
+    assert os.path.getsize(path) == data_offset + 3 * np.prod(SHAPE)
+
+    archive = FrameArchive.open(path)
+    assert (len(archive), archive.capacity) == (3, 3)
+    assert np.array_equal(archive.frames[2], frames(3)[2])
+    archive.close()
+
+
+def test_append_from_ring(tmp_path):
+    ring = FrameRing.create("fira_test_archive", shape=SHAPE, num_slots=2, replace=True)
+    try:
+        archive = FrameArchive.create(tmp_path / "lap.fira", SHAPE, capacity=2)
+        first = ring.write(frames(2)[1])
+        assert archive.append_from_ring(ring, first, capture_ns=5) == 0
+        for _ in range(ring.num_slots):
+            ring.write(frames(1)[0])
+        # Overwritten in the ring: nothing is recorded
+        assert archive.append_from_ring(ring, first, capture_ns=5) is None
+        assert len(archive) == 1
+        assert np.array_equal(archive.frames[0], frames(2)[1])
+        archive.close()
+    finally:
+        ring.close()
+        ring.unlink()
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "lap.fira"
+    path.write_bytes(bytes(64))
+    with pytest.raises(ValueError):
+        FrameArchive.open(path)
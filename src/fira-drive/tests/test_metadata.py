@@ -0,0 +1,36 @@
+import pytest
+
+from fira_drive.metadata import (METADATA_SIZE, FrameMetadata, frame_metadata, latency_ms,
+                                 pack_metadata, unpack_metadata)
+from fira_drive.ring import FrameRing
+
+
+def test_round_trip():
+    meta = FrameMetadata(frame_id=2**40 + 3, capture_ns=123_456_789, publish_ns=123_999_000,
+                         slot=3, width=640, height=480, channels=3, pixel_format="BGR8")
+    data = pack_metadata(meta)
+    assert len(data) == METADATA_SIZE == 38
+    assert unpack_metadata(data) == meta
+
+
+def test_gray_frames():
+    meta = FrameMetadata(1, 0, 0, 1, 320, 240, 1, "GRAY8")
+    assert unpack_metadata(pack_metadata(meta)).pixel_format == "GRAY8"
+
+
+@pytest.mark.parametrize("data", [b"", b"\x01" * (METADATA_SIZE - 1), b"\x02" + bytes(METADATA_SIZE - 1)])
+def test_rejects_other_sizes_and_versions(data):
+    with pytest.raises(ValueError):
+        unpack_metadata(data)
+
+
+def test_from_ring():
+    ring = FrameRing.create("fira_test_metadata", shape=(48, 64), num_slots=4, replace=True)
+    try:
+        meta = frame_metadata(ring, 6, capture_ns=100, publish_ns=200)
+    finally:
+        ring.close()
+        ring.unlink()
+    assert (meta.slot, meta.width, meta.height, meta.channels) == (2, 64, 48, 1)
+    assert meta.pixel_format == "GRAY8"
+    assert latency_ms(meta, now_ns=2_000_100) == 2.0
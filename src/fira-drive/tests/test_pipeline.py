@@ -0,0 +1,60 @@
+import cv2
+import numpy as np
+import pytest
+
+from fira_drive import stages
+from fira_drive.perception import build_pipeline
+from fira_drive.pipeline import Pipeline
+
+
+def counting(op, calls):
+    """``op`` with every call recorded in ``calls``."""
+    func = op.func
+
+    def counted(*args, **kwargs):
+        calls.append(op.name)
+        return func(*args, **kwargs)
+
+    op.func = counted
+    return op
+
+
+def test_identical_stages_share_a_node():
+    pipe = Pipeline()
+    pipe.add("gray", stages.cvt_color(cv2.COLOR_BGR2GRAY))
+    pipe.add("blur", stages.gaussian_blur((5, 5)), "gray")
+    assert pipe.add("grey", stages.cvt_color(cv2.COLOR_BGR2GRAY)) == "gray"
+    assert pipe.add("smooth", stages.gaussian_blur((5, 5)), "grey") == "blur"
+    assert pipe.add("sharp", stages.gaussian_blur((3, 3)), "grey") == "sharp"
+    assert len(pipe) == 3
+    assert pipe.resolve("smooth") == "blur"
+
+
+def test_redefining_a_name_differently_fails():
+    pipe = Pipeline()
+    pipe.add("edges", stages.canny(100, 300))
+    assert pipe.add("edges", stages.canny(100, 300)) == "edges"
+    with pytest.raises(ValueError):
+        pipe.add("edges", stages.canny(50, 150))
+
+
+def test_shared_stages_run_once_per_frame():
+    calls = []
+    pipe = Pipeline()
+    for low, high in ((100, 300), (50, 150)):
+        pipe.add("gray", counting(stages.cvt_color(cv2.COLOR_BGR2GRAY), calls))
+        pipe.add("blur", counting(stages.gaussian_blur((5, 5)), calls), "gray")
+        pipe.add(f"edges_{low}", stages.canny(low, high), "blur")
+    frame = np.random.default_rng(0).integers(0, 256, (48, 64, 3), np.uint8)
+    results = pipe.run(frame, outputs=["edges_100", "edges_50"])
+    assert sorted(calls) == ["GaussianBlur", "cvtColor"]
+    blur = cv2.GaussianBlur(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+    assert np.array_equal(results["edges_100"], cv2.Canny(blur, 100, 300))
+    assert np.array_equal(results["edges_50"], cv2.Canny(blur, 50, 150))
+
+
+def test_steps_share_their_common_prefix():
+    pipe = build_pipeline(64, 48, steps=["noise_filter", "morphology", "canny", "hough"])
+    assert pipe.resolve("gaussian") == pipe.resolve("blur")
+    # gray, blur, median, binary, opening, closing, edges, hough_edges, lines
+    assert len(pipe) == 9
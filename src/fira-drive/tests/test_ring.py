@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+import ring_stress
+from fira_drive.ring import FrameRing
+
+
+NAME = "fira_test_ring"
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing.create(NAME, shape=(4, 6, 3), num_slots=3, replace=True)
+    yield ring
+    ring.close()
+    ring.unlink()
+
+
+def test_seqlock_rejects_torn_frames():
+    counts = ring_stress.run(readers=2, seconds=1.0, slots=4, shape=(240, 320, 3))
+    assert all(accepted > 0 for _, accepted, _, _ in counts)
+    assert sum(corrupt for *_, corrupt in counts) == 0
+
+
+def test_read_returns_written_frame(ring):
+    frame = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+    frame_id = ring.write(frame)
+    assert np.array_equal(ring.read(frame_id), frame)
+    assert ring.read_latest()[0] == frame_id
+
+
+def test_overwritten_frame_is_not_read(ring):
+    first = ring.write(np.zeros((4, 6, 3), np.uint8))
+    for _ in range(ring.num_slots):
+        ring.write(np.ones((4, 6, 3), np.uint8))
+    assert not ring.is_valid(first)
+    assert ring.read(first) is None
+
+
+def test_create_refuses_an_existing_segment(ring):
+    with pytest.raises(FileExistsError):
+        FrameRing.create(NAME, shape=(4, 6, 3))
+    # The live ring is untouched
+    frame_id = ring.write(np.full((4, 6, 3), 7, np.uint8))
+    assert ring.read(frame_id).max() == 7
+
+
+def test_create_replace_unlinks_a_stale_segment(ring):
+    replacement = FrameRing.create(NAME, shape=(2, 2), num_slots=2, replace=True)
+    try:
+        attached = FrameRing.attach(NAME)
+        assert attached.shape == (2, 2)
+        attached.close()
+    finally:
+        replacement.close()
+        # The fixture unlinks the name
+
+
+def test_close_leaves_held_views_mapped():
+    ring = FrameRing.create(NAME, shape=(4, 6, 3), num_slots=3, replace=True)
+    view = ring.view(ring.write(np.full((4, 6, 3), 7, np.uint8)))[1:]
+    ring.close()
+    assert view.max() == 7 and ring.shm.buf is not None
+    # Unmapped with the last view
+    del view
+    assert ring.shm.buf is None
+    ring.unlink()
@@ -0,0 +1,60 @@
+import pytest
+
+from fira_drive.metadata import FrameMetadata
+from fira_drive.sync import FramePairer
+
+
+MS = 1_000_000
+
+
+def meta(frame_id, capture_ms):
+    return FrameMetadata(frame_id, int(capture_ms * MS), 0, 0, 64, 48, 3, "BGR8")
+
+
+def test_pairs_frames_within_tolerance():
+    pairer = FramePairer(["cam0", "cam1"], tolerance_ns=5 * MS)
+    left, right = meta(1, 0), meta(1, 3)
+    assert pairer.add("cam0", left) is None
+    assert pairer.add("cam1", right) == {"cam0": left, "cam1": right}
+    assert (pairer.pairs, pairer.unpaired) == (1, 0)
+    assert not any(pairer.pending.values())
+
+
+def test_drops_frames_without_a_partner():
+    pairer = FramePairer(["cam0", "cam1"], tolerance_ns=5 * MS)
+    pairer.add("cam0", meta(1, 0))
+    assert pairer.add("cam1", meta(1, 20)) is None
+    later = meta(2, 21)
+    assert pairer.add("cam0", later)["cam0"] is later
+    # cam0's first frame was passed over and is never paired
+    assert (pairer.pairs, pairer.unpaired) == (1, 1)
+    assert not any(pairer.pending.values())
+
+
+def test_picks_the_closest_frame():
+    pairer = FramePairer(["cam0", "cam1"], tolerance_ns=10 * MS)
+    pairer.add("cam0", meta(1, 0))
+    closest = meta(2, 8)
+    pairer.add("cam0", closest)
+    assert pairer.add("cam1", meta(1, 7))["cam0"] is closest
+    assert pairer.unpaired == 1
+
+
+def test_pending_frames_are_bounded():
+    pairer = FramePairer(["cam0", "cam1"], tolerance_ns=MS, depth=2)
+    for i in range(5):
+        pairer.add("cam0", meta(i, i * 100))
+    assert len(pairer.pending["cam0"]) == 2
+    assert pairer.unpaired == 3
+
+
+def test_sets_need_every_camera():
+    pairer = FramePairer(["cam0", "cam1", "cam2"], tolerance_ns=5 * MS)
+    pairer.add("cam0", meta(1, 0))
+    assert pairer.add("cam1", meta(1, 1)) is None
+    assert sorted(pairer.add("cam2", meta(1, 2))) == ["cam0", "cam1", "cam2"]
+
+
+def test_needs_two_cameras():
+    with pytest.raises(ValueError):
+        FramePairer(["cam0"], tolerance_ns=MS)
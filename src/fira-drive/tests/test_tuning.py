@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from fira_drive.tuning import DEFAULT_TUNING, TuningWatcher, parse_tuning
+
+
+def test_empty_table_keeps_defaults():
+    assert parse_tuning({}) == DEFAULT_TUNING
+
+
+def test_overrides_only_given_keys():
+    tuning = parse_tuning({"canny": {"low": 80}, "clahe": {"tile_grid": [4, 4]}})
+    assert tuning.canny == DEFAULT_TUNING.canny._replace(low=80)
+    assert tuning.clahe.tile_grid == (4, 4)
+    assert tuning.hough == DEFAULT_TUNING.hough
+
+
+@pytest.mark.parametrize("table", [
+    {"sobel": {}},
+    {"canny": {"lo": 80}},
+    {"canny": 80},
+    {"canny": {"low": 80.5}},
+    {"canny": {"low": True}},
+    {"canny": {"low": 400}},
+    {"hough": {"threshold": 0}},
+    {"morphology": {"threshold": 256}},
+    {"clahe": {"clip_limit": -1}},
+    {"clahe": {"tile_grid": [8]}},
+    {"birds_eye": {"src_pts": [[0, 0], [1, 0], [1, 1]]}},
+    {"birds_eye": {"src_pts": [[0, 0], [0, 0], [1, 1], [0, 1]]}},
+    {"birds_eye": {"src_pts": [[0, 0], [1, 1], [2, 2], [0, 5]]}},
+])
+def test_rejects_invalid_tables(table):
+    with pytest.raises(ValueError):
+        parse_tuning(table)
+
+
+def write(path, text):
+    path.write_text(text)
+    # Make sure the mtime differs even on coarse filesystem clocks
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_watcher_reloads_and_keeps_values_on_errors(tmp_path):
+    path = tmp_path / "fira-drive.toml"
+    write(path, "[tool.fira-drive.tuning.canny]\nlow = 80\n")
+    watcher = TuningWatcher(path)
+    assert watcher.current.canny.low == 80
+    assert not watcher.check()
+
+    write(path, "[tool.fira-drive.tuning.canny]\nlow = 90\n")
+    assert watcher.check()
+    assert (watcher.current.canny.low, watcher.reloads) == (90, 1)
+
+    current = watcher.current
+    write(path, "[tool.fira-drive.tuning.canny]\nlow = -1\n")
+    assert not watcher.check()
+    assert watcher.current is current
+    assert watcher.errors == 1 and "canny.low" in watcher.error
+
+
+def test_watcher_rejects_an_invalid_file_on_start(tmp_path):
+    path = tmp_path / "fira-drive.toml"
+    path.write_text("[tool.fira-drive.tuning.hough]\nthreshold = 0\n")
+    with pytest.raises(ValueError):
+        TuningWatcher(path)
@@ -0,0 +1,60 @@
+import threading
+import time
+
+import zmq
+
+from fira_drive.metadata import frame_metadata, pack_metadata
+from fira_drive.ring import FrameRing
+from fira_drive.workers import WorkerPool
+
+
+NAME = "fira_test_workers"
+TOPIC = b"test_metadata"
+HANG_ID = 5
+
+
+def step(frame):
+    """Never returns for frame HANG_ID, as if stuck in the step."""
+    if frame[0, 0] == HANG_ID:
+        time.sleep(60)
+    return int(frame[0, 0])
+
+
+def produce(ring, socket, stop):
+    time.sleep(0.3)  # let the pool subscribe
+    while not stop.is_set():
+        frame_id, view = ring.begin_write()
+        view[:] = frame_id % 256
+        ring.commit(frame_id)
+        socket.send_multipart([TOPIC, pack_metadata(frame_metadata(ring, frame_id,
+                                                                    time.monotonic_ns()))])
+        time.sleep(0.02)
+
+
+def test_stuck_worker_is_replaced():
+    ring = FrameRing.create(NAME, shape=(8, 8), num_slots=16, replace=True)
+    socket = zmq.Context.instance().socket(zmq.PUB)
+    port = socket.bind_to_random_port("tcp://127.0.0.1")
+    stop = threading.Event()
+    producer = threading.Thread(target=produce, args=(ring, socket, stop))
+    results = []
+    try:
+        with WorkerPool(step, workers=1, name=NAME, endpoint=f"tcp://127.0.0.1:{port}",
+                        topic=TOPIC, timeout=0.5) as pool:
+            producer.start()
+            deadline = time.monotonic() + 10
+            for meta, result in pool:
+                assert result == meta.frame_id % 256
+                results.append(meta.frame_id)
+                if meta.frame_id > HANG_ID + 10 or time.monotonic() > deadline:
+                    break
+    finally:
+        stop.set()
+        if producer.is_alive():
+            producer.join()
+        socket.close(linger=0)
+        ring.close()
+        ring.unlink()
+    assert results[0] < HANG_ID < results[-1] - 10
+    assert HANG_ID not in results
+    assert pool.timed_out == 1 and pool.restarts == 1